@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+"""
+All Benchmark
+Compares the console `all` command printing the list of every string
+at once, as it did, with the streaming output it now uses: the peak
+memory allocated while printing and the total time. The output is
+written to the null device.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_all [objects]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+import models
+from console import HBNBCommand
+from models.user import User
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users are printed.
+
+    Prints the peak memory and the time of each way of printing.
+    """
+    models.storage.clear()
+    for i in range(count):
+        User().email = 'user{}@hbnb.io'.format(i)
+    console = HBNBCommand()
+    cases = [('list', lambda: print(console.get_objects('User'))),
+             ('stream', lambda: console.onecmd('all User'))]
+    for name, case in cases:
+        with open(os.devnull, 'w') as sink, patch('sys.stdout', new=sink):
+            start = time.perf_counter()
+            case()
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            case()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print('{:<7} peak {:>8.1f} MB  {:>8.0f} ms'.format(
+            name, peak / 2 ** 20, elapsed * 1e3))
+    models.storage.clear()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
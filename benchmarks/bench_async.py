@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+
+"""
+Async Benchmark
+Measures the longest stall of an event loop, as seen by a coroutine
+ticking every millisecond, while the objects are saved: once calling
+`save()` on the loop, and once awaiting `AsyncStorage.asave()`, which
+saves in a worker thread. The snapshot is written in a temporary
+directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_async [objects]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import models
+from models.engine.async_storage import AsyncStorage
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+async def measure(save):
+    """
+    Measure a Save
+    Args:
+        save (coroutine function): The save to run.
+
+    Returns the time of the save and the longest gap between two ticks.
+    """
+    done = False
+    longest = 0
+
+    async def tick():
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    ticker = asyncio.ensure_future(tick())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await save()
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker
+    return elapsed, longest
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users are saved.
+
+    Prints the time of the save and the longest stall of each way.
+    """
+    FileStorage.thread_safe = True
+    storage = AsyncStorage(models.storage)
+    cwd = os.getcwd()
+
+    async def blocking():
+        models.storage.save()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            models.storage.clear()
+            users = [User() for i in range(count)]
+            for name, save in (('blocking', blocking),
+                               ('async', storage.asave)):
+                for user in users:
+                    user.first_name = 'Betty'
+                elapsed, longest = asyncio.run(measure(save))
+                print('{:<8} save {:>8.0f} ms  longest stall {:>8.1f} ms'
+                      .format(name, elapsed * 1e3, longest * 1e3))
+        finally:
+            FileStorage.thread_safe = False
+            models.storage.clear()
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
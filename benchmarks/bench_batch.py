@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+"""
+Batch Benchmark
+Compares the time it takes to create and save objects one `save()` at
+a time, as `do_create` does, and within `storage.batch()`. The files
+are written in a temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_batch [objects]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import models
+from models.user import User
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users each case creates.
+
+    Prints the time each case takes.
+    """
+    storage = models.storage
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        for batched in (False, True):
+            storage.clear()
+            start = time.perf_counter()
+            if batched:
+                with storage.batch():
+                    for i in range(count):
+                        User().save()
+            else:
+                for i in range(count):
+                    User().save()
+            print('{:<8} {:>8.0f} ms'.format(
+                'batch' if batched else 'single',
+                (time.perf_counter() - start) * 1e3))
+            os.remove('objects.json')
+        storage.clear()
+    finally:
+        os.chdir(cwd)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+
+"""
+Compact Models Benchmark
+Measures the memory held by the instances built, as `reload()` does,
+from the JSON encoding of a generated dataset of places, reviews and
+users, with the regular model classes and with their compact variants.
+The memory is measured again once `to_dict()` was called on every
+instance, as a full save or listing does.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_compact [objects]
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+def generate(count):
+    """
+    Generate a Dataset
+    Args:
+        count (int): The number of objects to generate.
+
+    Returns the JSON encodings of the objects: one user for ten
+    places, each place with two reviews.
+    """
+    stamp = '2020-02-17T16:32:39.023915'
+    users = [str(uuid.uuid4()) for i in range(max(count // 40, 1))]
+    cities = [str(uuid.uuid4()) for i in range(100)]
+    rows = []
+    while len(rows) < count:
+        n = len(rows)
+        place_id = str(uuid.uuid4())
+        rows.append({'__class__': 'Place', 'id': place_id,
+                     'created_at': stamp, 'updated_at': stamp,
+                     'city_id': cities[n % len(cities)],
+                     'user_id': users[n % len(users)],
+                     'name': 'Place {}'.format(n), 'number_rooms': 3,
+                     'max_guest': 6, 'price_by_night': 100 + n % 300,
+                     'latitude': 37.77, 'longitude': -122.41})
+        for i in range(2):
+            rows.append({'__class__': 'Review', 'id': str(uuid.uuid4()),
+                         'created_at': stamp, 'updated_at': stamp,
+                         'place_id': place_id,
+                         'user_id': users[(n + i) % len(users)],
+                         'text': 'Great stay'})
+        if n % 10 == 0:
+            rows.append({'__class__': 'User', 'id': users[n % len(users)],
+                         'created_at': stamp, 'updated_at': stamp,
+                         'email': 'user{}@hbnb.io'.format(n),
+                         'first_name': 'Betty', 'last_name': 'Holberton'})
+    return [json.dumps(row) for row in rows[:count]]
+
+
+def measure(rows, compact):
+    """
+    Measure a Representation
+    Args:
+        rows (list): The JSON encoded dataset.
+        compact (bool): Whether to build compact instances.
+
+    Returns the bytes held by the instances once built and once
+    converted to dictionaries, and the build time, measured in a
+    separate run as tracing slows the allocations down.
+    """
+    classes = {'Place': Place, 'Review': Review, 'User': User}
+    if compact:
+        classes = {name: cls.compact_class()
+                   for name, cls in classes.items()}
+
+    def build():
+        """Build the instances"""
+        objects = []
+        for row in rows:
+            value = json.loads(row)
+            objects.append(classes[value['__class__']](**value))
+        return objects
+
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    built = tracemalloc.get_traced_memory()[0]
+    for obj in objects:
+        obj.to_dict()
+    converted = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return built, converted, elapsed
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): The number of objects to build.
+
+    Prints the memory per object, once built and after `to_dict()`,
+    and the build time of each variant.
+    """
+    rows = generate(count)
+    print('{:<8} {:>12} {:>16} {:>8}'.format(
+        '', 'built', 'after to_dict', 'build'))
+    for name, compact in (('regular', False), ('compact', True)):
+        built, converted, elapsed = measure(rows, compact)
+        print('{:<8} {:>10.0f} B {:>14.0f} B {:>7.2f}s'.format(
+            name, built / count, converted / count, elapsed))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+"""
+Concurrent Benchmark
+Runs several processes saving new users to the same snapshot, one save
+per user, with and without the concurrent mode of the file storage,
+and prints how many users the snapshot holds at the end and the time
+taken: without the mode, the last save of each process overwrites the
+others. The files are written in a temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_concurrent [processes] [saves]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def work(saves):
+    """
+    Work in a Process
+    Args:
+        saves (int): How many users the process creates and saves.
+    """
+    storage = FileStorage()
+    storage.clear()
+    storage.reload()
+    for i in range(saves):
+        User().save()
+
+
+def run(processes, saves):
+    """
+    Run the Benchmark
+    Args:
+        processes (int): How many processes save at the same time.
+        saves (int): How many users each process saves.
+
+    Prints the users kept and the time taken in each mode.
+    """
+    storage = FileStorage()
+    context = multiprocessing.get_context('fork')
+    cwd = os.getcwd()
+    for concurrent in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                FileStorage.concurrent = concurrent
+                storage.clear()
+                storage.save()
+                start = time.perf_counter()
+                workers = [context.Process(target=work, args=(saves,))
+                           for i in range(processes)]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                elapsed = time.perf_counter() - start
+                storage.clear()
+                storage.reload()
+                print('{:<10} {:>6} of {:>6} users kept  {:>8.0f} ms'.format(
+                    'concurrent' if concurrent else 'unlocked',
+                    storage.count(User), processes * saves, elapsed * 1e3))
+            finally:
+                FileStorage.concurrent = False
+                storage.clear()
+                os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+"""
+Geo Benchmark
+Compares the radius queries of the grid index of `models.engine.geo`
+with a linear scan computing the distance to every point, on random
+points spread over a region the size of a large country.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_geo [radius_km]
+"""
+
+import random
+import sys
+import time
+from models.engine.geo import GridIndex, distance_km
+
+SIZES = (10000, 100000, 1000000)
+QUERIES = 20
+
+
+def run(radius_km):
+    """
+    Run the Benchmark
+    Args:
+        radius_km (float): The radius of the queries, in kilometers.
+
+    Prints, for each dataset size, the time per query of both
+    methods and the time to build the index.
+    """
+    rng = random.Random(0)
+    print('{:>9} {:>10} {:>12} {:>12} {:>8}'.format(
+        'points', 'build', 'grid/query', 'scan/query', 'matches'))
+    for size in SIZES:
+        points = [(rng.uniform(30, 50), rng.uniform(-10, 20))
+                  for i in range(size)]
+        start = time.perf_counter()
+        grid = GridIndex()
+        for key, (latitude, longitude) in enumerate(points):
+            grid.set(key, latitude, longitude)
+        build = time.perf_counter() - start
+        centers = [rng.choice(points) for i in range(QUERIES)]
+
+        start = time.perf_counter()
+        found = [grid.near(lat, lon, radius_km) for lat, lon in centers]
+        indexed = (time.perf_counter() - start) / QUERIES
+
+        start = time.perf_counter()
+        scanned = []
+        for lat, lon in centers:
+            distances = [(distance_km(lat, lon, *point), key)
+                         for key, point in enumerate(points)]
+            scanned.append(sorted(pair for pair in distances
+                                  if pair[0] <= radius_km))
+        linear = (time.perf_counter() - start) / QUERIES
+        assert found == scanned
+        print('{:>9} {:>9.2f}s {:>10.2f}ms {:>10.1f}ms {:>8.0f}'.format(
+            size, build, indexed * 1000, linear * 1000,
+            sum(map(len, found)) / QUERIES))
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
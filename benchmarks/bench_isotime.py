@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+
+"""
+ISO Time Benchmark
+Compares the timestamp codec of `models.isotime` with the
+`datetime.strptime` / `isoformat` path it replaces, on the strings
+`BaseModel.to_dict` writes.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_isotime [iterations]
+"""
+
+import sys
+import timeit
+from datetime import datetime
+from models.isotime import ISO_FORMAT, format_datetime, parse_datetime
+
+
+def run(number):
+    """
+    Run the Benchmark
+    Args:
+        number (int): How many timestamps each case converts.
+
+    Prints the time per conversion of each case.
+    """
+    stamp = datetime(2020, 2, 17, 16, 32, 39, 23915)
+    text = stamp.isoformat()
+    cases = [
+        ('strptime', lambda: datetime.strptime(text, ISO_FORMAT)),
+        ('parse_datetime', lambda: parse_datetime(text)),
+        ('isoformat', lambda: stamp.isoformat()),
+        ('format_datetime', lambda: format_datetime(stamp)),
+    ]
+    for name, case in cases:
+        seconds = min(timeit.repeat(case, number=number, repeat=3))
+        print('{:<16} {:>8.0f} ns'.format(name, seconds / number * 1e9))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
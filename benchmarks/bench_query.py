@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+
+"""
+Query Benchmark
+Compares the top-k selection of `models.engine.query.top()`, which
+keeps the first instances in a heap, with sorting all the matching
+instances and slicing the list, on places with random prices.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_query [limit]
+"""
+
+import random
+import sys
+import time
+from types import SimpleNamespace
+from models.engine import query
+
+SIZES = (10000, 100000, 1000000)
+
+
+def run(limit):
+    """
+    Run the Benchmark
+    Args:
+        limit (int): How many instances each query keeps.
+
+    Prints, for each dataset size, the time of both methods.
+    """
+    for size in SIZES:
+        places = [SimpleNamespace(price_by_night=random.randrange(10000))
+                  for i in range(size)]
+        cases = [('sort', lambda: query.top(places, '-price_by_night')
+                  [:limit]),
+                 ('heap', lambda: query.top(places, '-price_by_night',
+                                            limit))]
+        timings = []
+        for name, case in cases:
+            start = time.perf_counter()
+            case()
+            timings.append('{} {:>8.1f} ms'.format(
+                name, (time.perf_counter() - start) * 1e3))
+        print('{:>8} places  {}'.format(size, '  '.join(timings)))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
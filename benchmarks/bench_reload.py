@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+"""
+Reload Benchmark
+Compares the time `FileStorage.reload()` takes on a large snapshot of
+places when it decodes the snapshot in the calling process and in a
+pool of worker processes. The files are written in a temporary
+directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_reload [objects] [workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def run(count, workers):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many places the snapshot holds.
+        workers (int): The number of worker processes to compare.
+
+    Prints the reload time with one process and with `workers`.
+    """
+    storage = models.storage
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        storage.clear()
+        for i in range(count):
+            place = Place()
+            place.name = 'Place {}'.format(i)
+            place.city_id = str(i % 97)
+            place.price_by_night = i % 300
+        storage.save()
+        FileStorage.parallel_threshold = 1
+        for number in (1, workers):
+            FileStorage.workers = number
+            storage.clear()
+            start = time.perf_counter()
+            storage.reload()
+            print('{:>2} worker(s) {:>8.0f} ms'.format(
+                number, (time.perf_counter() - start) * 1e3))
+        storage.clear()
+        os.remove('objects.json')
+    finally:
+        FileStorage.workers = 1
+        FileStorage.parallel_threshold = 50000
+        os.chdir(cwd)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1)
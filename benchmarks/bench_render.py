@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+"""
+Render Benchmark
+Measures the reads of the rendered forms of the objects, `str()` and
+`to_dict()` on every one of them a few times over, as the console
+does, once with the render cache off and once with it sized to hold
+them all, and prints the hits and misses of the cache.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_render [objects] [rounds]
+"""
+
+import sys
+import time
+import models
+from models.user import User
+
+
+def run(count, rounds):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users are read.
+        rounds (int): How many times each one is read.
+
+    Prints the time of the reads with and without the cache.
+    """
+    cache = models.render_cache
+    size = cache.size
+    models.storage.clear()
+    try:
+        users = [User() for i in range(count)]
+        for user in users:
+            user.first_name = 'Betty'
+            user.email = 'betty@holbertonschool.com'
+        for name, cached in (('off', 0), ('on', count)):
+            cache.size = cached
+            cache.clear()
+            start = time.perf_counter()
+            for i in range(rounds):
+                for user in users:
+                    str(user)
+                    user.to_dict()
+            elapsed = time.perf_counter() - start
+            print('{:<4} {:>8.0f} ms  hits {:>9}  misses {:>9}'
+                  .format(name, elapsed * 1e3, cache.hits, cache.misses))
+    finally:
+        cache.size = size
+        cache.clear()
+        models.storage.clear()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+
+"""
+Serializers Benchmark
+Compares the JSON and binary snapshot formats of
+`models.engine.serializers`: the time to encode and decode a snapshot
+of places and users, and the size of the file. Decoding includes the
+parsing of the timestamps the models do on instantiation, which the
+binary format saves.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_serializers [objects]
+"""
+
+import sys
+import timeit
+from datetime import datetime, timedelta
+from models.engine.serializers import SERIALIZERS
+from models.isotime import parse_datetime
+
+
+def records(count):
+    """
+    Build Records
+    Args:
+        count (int): How many records to build.
+
+    Returns records alternating places and users, as the storage
+    passes them to the serializers, with datetime timestamps.
+    """
+    start = datetime(2020, 2, 17, 16, 32, 39, 23915)
+    built = {}
+    for i in range(count):
+        stamp = start + timedelta(seconds=i)
+        id = '{:08x}-4d2c-4b8e-9f1a-{:012x}'.format(i, i)
+        if i % 2:
+            value = {'__class__': 'User', 'email': 'user{}@hbnb.io'.format(i),
+                     'first_name': 'Betty', 'last_name': 'Holberton'}
+        else:
+            value = {'__class__': 'Place', 'city_id': str(i % 97),
+                     'user_id': str(i % 89), 'name': 'Place {}'.format(i),
+                     'number_rooms': i % 5, 'max_guest': i % 9,
+                     'price_by_night': i % 300, 'latitude': 34.02,
+                     'longitude': -6.84, 'amenity_ids': []}
+        value.update(id=id, created_at=stamp, updated_at=stamp)
+        built[value['__class__'] + '.' + id] = value
+    return built
+
+
+def load(serializer, encoded):
+    """
+    Load a Snapshot
+    Args:
+        serializer (inst): The serializer of the snapshot.
+        encoded (bytes): The snapshot.
+
+    Decodes the snapshot and parses its timestamps.
+    """
+    for value in serializer.loads(encoded).values():
+        parse_datetime(value['created_at'])
+        parse_datetime(value['updated_at'])
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many objects the snapshot holds.
+
+    Prints, for each format, the encode and decode throughput in
+    objects per second and the size of the snapshot.
+    """
+    data = records(count)
+    for name, serializer in SERIALIZERS.items():
+        encoded = serializer.dumps(data)
+        encode = min(timeit.repeat(lambda: serializer.dumps(data),
+                                   number=1, repeat=5))
+        decode = min(timeit.repeat(lambda: load(serializer, encoded),
+                                   number=1, repeat=5))
+        print('{:<7} encode {:>9.0f} obj/s  decode {:>9.0f} obj/s  '
+              '{:>6.1f} B/obj'.format(name, count / encode, count / decode,
+                                      len(encoded) / count))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
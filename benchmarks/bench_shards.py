@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+"""
+Shards Benchmark
+Compares the time `FileStorage.save()` takes, after one review is
+updated, with a single snapshot and with one shard per class, and the
+time the first access to the reviews takes after a lazy reload.
+The files are written in a temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_shards [objects]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many objects of each of the three classes
+        are stored.
+
+    Prints, for each layout, the time of a save after one update and
+    the time of the first query on the reviews after a lazy reload.
+    """
+    storage = models.storage
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        for shards in (False, True):
+            FileStorage.shards = shards
+            FileStorage.lazy = False
+            storage.clear()
+            reviews = []
+            for i in range(count):
+                User()
+                Place()
+                reviews.append(Review())
+            storage.save()
+            start = time.perf_counter()
+            for review in reviews[:20]:
+                review.text = 'Great'
+                storage.save()
+            save = (time.perf_counter() - start) / 20
+            FileStorage.lazy = True
+            storage.clear()
+            storage.reload()
+            start = time.perf_counter()
+            storage.all(Review)
+            first = time.perf_counter() - start
+            print('{:<7} save {:>8.2f} ms  first access {:>8.2f} ms'.format(
+                'shards' if shards else 'single', save * 1e3, first * 1e3))
+            storage.clear()
+            for name in os.listdir('.'):
+                os.remove(name)
+    finally:
+        FileStorage.shards = False
+        FileStorage.lazy = False
+        os.chdir(cwd)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
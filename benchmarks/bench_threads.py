@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+
+"""
+Threads Benchmark
+Measures, in the thread-safe mode of the file storage, the longest
+wait of a thread reading the objects while another one saves them
+all: once holding the lock exclusive for the whole save, as a plain
+locked storage would, and once with the copy-on-write save, which
+encodes the objects under the shared lock and writes the snapshot
+outside of it. The snapshot is
+written in a temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_threads [objects]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users are saved.
+
+    Prints the time of the save and the longest read of each way.
+    """
+    storage = models.storage
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        FileStorage.thread_safe = True
+        try:
+            storage.clear()
+            users = [User() for i in range(count)]
+
+            def locked_save():
+                with storage.lock.write():
+                    storage.save()
+
+            for name, save in (('locked', locked_save),
+                               ('copy', storage.save)):
+                for user in users:
+                    user.first_name = 'Betty'
+                saver = threading.Thread(target=save)
+                longest = 0
+                start = time.perf_counter()
+                saver.start()
+                while saver.is_alive():
+                    before = time.perf_counter()
+                    storage.count(User)
+                    longest = max(longest, time.perf_counter() - before)
+                saver.join()
+                elapsed = time.perf_counter() - start
+                print('{:<7} save {:>8.0f} ms  longest read {:>8.1f} ms'
+                      .format(name, elapsed * 1e3, longest * 1e3))
+        finally:
+            FileStorage.thread_safe = False
+            storage.clear()
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+"""
+Transfer Benchmark
+Times the import of a CSV file and of a JSON Lines file of users, and
+the export of the imported users, through the storage API. The files
+are written in a temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_transfer [rows]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+import models
+
+
+def run(count):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many rows each file holds.
+
+    Prints the throughput of each import and export, in rows per
+    second, and the peak memory of the process.
+    """
+    storage = models.storage
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with open('users.csv', 'w') as f:
+            f.write('email,first_name,last_name\n')
+            for i in range(count):
+                f.write('user{0}@hbnb.io,Betty{0},Holberton\n'.format(i))
+        with open('users.jsonl', 'w') as f:
+            for i in range(count):
+                f.write('{{"__class__": "User", "email": "user{0}@hbnb.io", '
+                        '"first_name": "Betty{0}"}}\n'.format(i))
+        for name, cls in (('users.csv', 'User'), ('users.jsonl', None)):
+            storage.clear()
+            start = time.perf_counter()
+            storage.import_file(name, cls)
+            elapsed = time.perf_counter() - start
+            print('import {:<12} {:>9.0f} rows/s'.format(
+                name, count / elapsed))
+            start = time.perf_counter()
+            storage.export_file('out' + name, 'User')
+            elapsed = time.perf_counter() - start
+            print('export {:<12} {:>9.0f} rows/s'.format(
+                name, count / elapsed))
+        print('peak memory {:.0f} MB'.format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+        storage.clear()
+        for name in os.listdir('.'):
+            os.remove(name)
+    finally:
+        os.chdir(cwd)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
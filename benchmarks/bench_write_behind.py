@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+"""
+Write-Behind Benchmark
+Compares the latency of `save()` on a storage holding many objects,
+saving in the calling thread and in write-behind mode, where the
+saves are only asked for and made, several at a time, by a background
+thread. The final flush is timed apart. The snapshot is written in a
+temporary directory.
+
+Usage, from the root of the repository:
+    python3 -m benchmarks.bench_write_behind [objects] [saves]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+def run(count, saves):
+    """
+    Run the Benchmark
+    Args:
+        count (int): How many users the storage holds.
+        saves (int): How many users are changed and saved, one by one.
+
+    Prints the mean latency of a save and the time of the final flush
+    in each mode.
+    """
+    storage = models.storage
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            storage.clear()
+            users = [User() for i in range(count)]
+            storage.save()
+            for write_behind in (False, True):
+                FileStorage.write_behind = write_behind
+                start = time.perf_counter()
+                for user in users[:saves]:
+                    user.first_name = 'Betty'
+                    user.save()
+                elapsed = time.perf_counter() - start
+                start = time.perf_counter()
+                storage.flush()
+                flushed = time.perf_counter() - start
+                print('{:<12} save {:>8.2f} ms  flush {:>8.0f} ms'.format(
+                    'write-behind' if write_behind else 'direct',
+                    elapsed / saves * 1e3, flushed * 1e3))
+        finally:
+            FileStorage.write_behind = False
+            storage.clear()
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100)
@@ -8,18 +8,18 @@ databases. It enables the creation, modification,
 and deletion of instances for various classes.
 """
 
+import argparse
+import json
 import re
 import shlex
+import sys
+import time
 import cmd
+from itertools import islice
 import models
-from datetime import datetime
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
+from models.base_model import classes
+from models.engine.file_storage import ConflictError
+from models.engine.serializers import convert
 
 
 class HBNBCommand(cmd.Cmd):
@@ -31,19 +31,21 @@ class HBNBCommand(cmd.Cmd):
 
     Attributes:
         prompt (str): The command prompt displayed to the user.
-        allowed_classes (list): The list of allowed class names
-        for instance creation and manipulation.
+        allowed_classes (dict): The model registry: the classes
+        allowed for instance creation and manipulation, by name.
+        condition (Pattern): A condition of the where command.
     """
 
     prompt = '(hbnb)'
-    allowed_classes = ['BaseModel', 'User', 'State', 'City',
-                       'Amenity', 'Place', 'Review']
+    allowed_classes = classes
+    condition = re.compile(r'\s*(\w+)\s*(==|!=|<=|>=|<|>|=)\s*'
+                           r'("[^"]*"|\'[^\']*\'|[^,\s]+)\s*(?:,|$)')
 
     def do_quit(self, line):
         """
         Quit command:
 
-        Exits the program.
+        Exits the program, once the saves asked for are written.
 
         Args:
             line (str): The command line input.
@@ -52,13 +54,14 @@ class HBNBCommand(cmd.Cmd):
             bool: True to exit the program.
         """
 
+        models.storage.flush()
         return True
 
     def do_EOF(self, line):
         """
         EOF Command:
 
-        Exits the program.
+        Exits the program, once the saves asked for are written.
         Args:
             line (str): The command line input.
 
@@ -66,6 +69,7 @@ class HBNBCommand(cmd.Cmd):
             bool: True to exit the program.
         """
 
+        models.storage.flush()
         return True
 
     def do_create(self, line):
@@ -84,7 +88,7 @@ class HBNBCommand(cmd.Cmd):
         elif command not in self.allowed_classes:
             print("** class doesn't exist **")
         else:
-            new_obj = eval(command)()
+            new_obj = self.allowed_classes[command]()
             new_obj.save()
             print(new_obj.id)
 
@@ -107,7 +111,7 @@ class HBNBCommand(cmd.Cmd):
         elif arg == '':
             print('** instance id missing **')
         else:
-            inst_data = models.storage.all().get(command + '.' + arg)
+            inst_data = models.storage.get(command, arg)
             if inst_data is None:
                 print('** no instance found **')
             else:
@@ -129,12 +133,11 @@ class HBNBCommand(cmd.Cmd):
         elif arg == '':
             print('** instance id missing **')
         else:
-            key = command + '.' + arg
-            inst_data = models.storage.all().get(key)
+            inst_data = models.storage.get(command, arg)
             if inst_data is None:
                 print('** no instance found **')
             else:
-                del models.storage.all()[key]
+                models.storage.delete(inst_data)
                 models.storage.save()
 
     def do_all(self, line):
@@ -142,17 +145,234 @@ class HBNBCommand(cmd.Cmd):
         All Commad:
 
         Prints all string representations of instances based
-        on the class name.
+        on the class name, one at a time as they are formatted:
+        all [<class name>] [limit=N] [offset=N] [after=<id>]
+        [format=jsonl]
+        `limit` and `offset` select a page of the instances, `after`
+        starts after the instance of that id, as returned last by the
+        previous page, and `format=jsonl` prints the dictionary of
+        each instance as a JSON line instead of the list of strings.
         """
-        command = self.parseline(line)[0]
-        objs = models.storage.all()
-        if command is None:
-            print([str(objs[obj]) for obj in objs])
-        elif command in self.allowed_classes:
-            keys = objs.keys()
-            print([str(objs[key]) for key in keys if key.startswith(command)])
+        class_name = None
+        options = {'limit': '0', 'offset': '0', 'after': None,
+                   'format': 'list'}
+        for arg in line.split():
+            name, equal, value = arg.partition('=')
+            if not equal and class_name is None:
+                class_name = arg
+            elif name not in options or not value:
+                print('** invalid option: {} **'.format(arg))
+                return
+            else:
+                options[name] = value
+        if class_name is not None and class_name not in self.allowed_classes:
+            print("** class doesn't exist **")
+            return
+        try:
+            limit, offset = int(options['limit']), int(options['offset'])
+            if limit < 0 or offset < 0:
+                raise ValueError
+        except ValueError:
+            print('** invalid page **')
+            return
+        if options['format'] not in ('list', 'jsonl'):
+            print('** invalid format **')
+            return
+        objects = self.iter_objects(class_name, options['after'])
+        if objects is None:
+            print('** no instance found **')
+            return
+        objects = islice(objects, offset, offset + limit if limit else None)
+        self.print_objects(objects, options['format'])
+
+    def do_where(self, line):
+        """
+        Where Command:
+
+        Prints the string representations of the instances of a class
+        meeting conditions, in an order, up to a limit:
+        where <class name> <attribute> <operator> <value>, ...
+        [order_by=[-]<attribute>] [limit=N] [format=jsonl]
+        The operators are ==, =, !=, <, <=, > and >=. Quoted values
+        are strings; the others are numbers when they read as numbers.
+        """
+        class_name, _, text = line.strip().partition(' ')
+        if not class_name:
+            print('** class name missing **')
+            return
+        if class_name not in self.allowed_classes:
+            print("** class doesn't exist **")
+            return
+        conditions = []
+        options = {'order_by': None, 'limit': None, 'format': 'list'}
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = self.condition.match(text, position)
+            if match is None:
+                print('** invalid condition: {} **'.format(
+                    text[position:].strip()))
+                return
+            attr, op, value = match.group(1, 2, 3)
+            position = match.end()
+            if value[0] in '"\'':
+                value = value[1:-1]
+            else:
+                for number in (int, float):
+                    try:
+                        value = number(value)
+                        break
+                    except ValueError:
+                        pass
+            if attr in options and op == '=':
+                options[attr] = value
+            else:
+                conditions.append((attr, '==' if op == '=' else op, value))
+        limit = options['limit']
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            print('** invalid limit **')
+            return
+        if options['format'] not in ('list', 'jsonl'):
+            print('** invalid format **')
+            return
+        objects = models.storage.query(class_name, conditions,
+                                       options['order_by'], limit)
+        self.print_objects(objects, options['format'])
+
+    def print_objects(self, objects, format='list'):
+        """
+        Print Objects:
+
+        Prints instances as they are formatted: the list of their
+        string representations, or with `format` 'jsonl' one JSON
+        line of their dictionary each.
+
+        Args:
+            objects (iterable): The instances to print.
+            format (str): 'list' or 'jsonl'.
+        """
+        if format == 'jsonl':
+            self.write_chunks(json.dumps(obj.to_dict(), default=str) + '\n'
+                              for obj in objects)
+            return
+        items = (repr(str(obj)) for obj in objects)
+        first = next(items, None)
+        if first is None:
+            print('[]')
+            return
+        sys.stdout.write('[' + first)
+        self.write_chunks(', ' + item for item in items)
+        print(']')
+
+    def write_chunks(self, texts, size=1000):
+        """
+        Write Chunks:
+
+        Writes the strings of `texts` to the standard output, `size`
+        at a time, so that the output starts at once and only a chunk
+        is held in memory.
+
+        Args:
+            texts (iterable): The strings to write.
+            size (int): How many strings are written at once.
+        """
+        while True:
+            chunk = ''.join(islice(texts, size))
+            if not chunk:
+                return
+            sys.stdout.write(chunk)
+
+    def do_near(self, line):
+        """
+        Near Command:
+
+        Prints the string representations of the instances of a class
+        located within a radius, in kilometers, of a point, closest
+        first: near <class name> <latitude> <longitude> <radius>
+        """
+        args = line.split()
+        if len(args) == 0:
+            print('** class name missing **')
+        elif args[0] not in self.allowed_classes:
+            print("** class doesn't exist **")
+        elif not self.allowed_classes[args[0]].__geo__:
+            print('** class has no location **')
+        elif len(args) < 4:
+            print('** coordinates missing **')
         else:
+            try:
+                latitude, longitude, radius = map(float, args[1:4])
+            except ValueError:
+                print('** invalid coordinates **')
+                return
+            objs = models.storage.near(args[0], latitude, longitude, radius)
+            print([str(obj) for obj in objs])
+
+    def do_convert(self, line):
+        """
+        Convert Command:
+
+        Converts a snapshot file from one format to another, the
+        format written being chosen by the extension of the
+        destination ('.bin' for binary, JSON otherwise) unless given:
+        convert <source> <destination> [json|binary]
+        """
+        args = line.split()
+        if len(args) < 2:
+            print('** file name missing **')
+            return
+        try:
+            count = convert(args[0], args[1],
+                            args[2] if len(args) > 2 else None)
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+            return
+        except ValueError as error:
+            print('** {} **'.format(error))
+            return
+        print(count)
+
+    def do_import(self, line):
+        """
+        Import Command:
+
+        Imports the objects of a JSON Lines ('.jsonl') or CSV ('.csv')
+        file, and prints how many were imported. The class is needed
+        for the rows that do not name theirs:
+        import <file> [<class name>]
+        """
+        self.transfer(models.storage.import_file, line)
+
+    def do_export(self, line):
+        """
+        Export Command:
+
+        Exports the objects, of a class or all of them, to a JSON
+        Lines ('.jsonl') or CSV ('.csv') file, one class per CSV file,
+        and prints how many were exported:
+        export <file> [<class name>]
+        """
+        self.transfer(models.storage.export_file, line)
+
+    def transfer(self, method, line):
+        """
+        Transfer Method:
+
+        Runs the import or export `method` with the file and class of
+        `line`, printing the number of objects or the error.
+        """
+        args = line.split()
+        if len(args) == 0:
+            print('** file name missing **')
+        elif len(args) > 1 and args[1] not in self.allowed_classes:
             print("** class doesn't exist **")
+        else:
+            try:
+                print(method(args[0], args[1] if len(args) > 1 else None))
+            except FileNotFoundError:
+                print("** file doesn't exist **")
+            except ValueError as error:
+                print('** {} **'.format(error))
 
     def do_update(self, line):
         """
@@ -170,8 +390,7 @@ class HBNBCommand(cmd.Cmd):
         elif args_size == 1:
             print('** instance id missing **')
         else:
-            key = args[0] + '.' + args[1]
-            inst_data = models.storage.all().get(key)
+            inst_data = models.storage.get(args[0], args[1])
             if inst_data is None:
                 print('** no instance found **')
             elif args_size == 2:
@@ -181,8 +400,7 @@ class HBNBCommand(cmd.Cmd):
             else:
                 args[3] = self.analyze_parameter_value(args[3])
                 setattr(inst_data, args[2], args[3])
-                setattr(inst_data, 'updated_at', datetime.now())
-                models.storage.save()
+                inst_data.save()
 
     def analyze_parameter_value(self, value):
         """
@@ -218,14 +436,31 @@ class HBNBCommand(cmd.Cmd):
             Otherwise, it will show all instances in the file where all
             objects are stored.
         """
-        objects = models.storage.all()
+        return [str(val) for val in self.iter_objects(instance or None)]
 
-        if instance:
-            keys = objects.keys()
-            return [str(val) for key, val in objects.items()
-                    if key.startswith(instance)]
+    def iter_objects(self, class_name=None, after=None):
+        """
+        Iterate Objects:
+
+        Gets an iterator over the stored instances, in the order of
+        the storage, without formatting them.
+
+        Args:
+            class_name (str, optional): The class of the instances.
+            after (str, optional): The id of the instance after which
+            the iteration starts.
 
-        return [str(val) for key, val in objects.items()]
+        Returns:
+            iterator: The instances, or None if there is no instance of
+            id `after`.
+        """
+        objects = iter(models.storage.all(class_name).values())
+        if after is None:
+            return objects
+        for obj in objects:
+            if obj.id == after:
+                return objects
+        return None
 
     def default(self, line):
         """
@@ -247,15 +482,124 @@ class HBNBCommand(cmd.Cmd):
 
             if class_name in self.allowed_classes:
                 if method_name == 'all':
-                    print(self.get_objects(class_name))
+                    args = line[line.find('(') + 1:line.rfind(')')]
+                    self.do_all(class_name + ' ' + args.replace(',', ' '))
                 elif method_name == 'count':
-                    print(len(self.get_objects(class_name)))
+                    print(models.storage.count(class_name))
                 elif method_name == 'show':
                     class_id = splitted[2][1:-1]
                     self.do_show(class_name + ' ' + class_id)
                 elif method_name == 'destroy':
                     class_id = splitted[2][1:-1]
                     self.do_destroy(class_name + ' ' + class_id)
+                elif method_name == 'where':
+                    args = line[line.find('(') + 1:line.rfind(')')]
+                    self.do_where(class_name + ' ' + args)
+                elif method_name == 'near':
+                    args = line[line.find('(') + 1:line.rfind(')')]
+                    self.do_near(class_name + ' ' + args.replace(',', ' '))
+
+    def run_batch(self, lines, flush_every=0, report=sys.stderr):
+        """
+        Run a Batch:
+
+        Runs the commands of `lines` back to back within a storage
+        batch, so that the store is saved once at the end, or once
+        every `flush_every` commands, instead of after every command.
+        Stops at `quit` or `EOF`, waits for the saves asked for to be
+        written, then writes to `report` the throughput and the mean
+        time of each command. A command raising an error is reported
+        and the batch goes on, keeping the commands run before it. A
+        save rejected because another process changed the same objects
+        is reported too: their changes are kept, and the others saved.
+
+        Args:
+            lines (iterable): The command lines to run.
+            flush_every (int): How many commands run between two
+            saves, or 0 to save only at the end.
+            report (file): Where the timings are written, or None.
+
+        Returns:
+            int: The number of commands run.
+        """
+        timings = {}
+        count = 0
+        start = time.perf_counter()
+        done = stop = False
+        lines = iter(lines)
+        while not done:
+            try:
+                with models.storage.batch():
+                    for line in lines:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        match = re.match(r'\w+\.(\w+)\(', line)
+                        name = match.group(1) if match else \
+                            self.parseline(line)[0]
+                        began = time.perf_counter()
+                        try:
+                            stop = self.onecmd(self.precmd(line))
+                        except Exception as error:
+                            print('** {}: {} **'.format(
+                                type(error).__name__, error))
+                            stop = False
+                        timing = timings.setdefault(name, [0, 0.0])
+                        timing[0] += 1
+                        timing[1] += time.perf_counter() - began
+                        count += 1
+                        if stop:
+                            break
+                        if flush_every and count % flush_every == 0:
+                            break
+                    else:
+                        done = True
+            except ConflictError as error:
+                while error is not None:
+                    print('** {} **'.format(error))
+                    models.storage.resolve(error.keys)
+                    try:
+                        models.storage.save()
+                        error = None
+                    except ConflictError as again:
+                        error = again
+            done = done or stop
+        models.storage.flush()
+        elapsed = time.perf_counter() - start
+        if report is not None:
+            print('{} commands in {:.3f} s ({:.0f} commands/s)'.format(
+                count, elapsed, count / elapsed if elapsed else 0),
+                file=report)
+            for name, (number, seconds) in sorted(timings.items()):
+                print('{:<10} {:>8} {:>10.3f} ms'.format(
+                    name, number, seconds / number * 1e3), file=report)
+        return count
+
+    def precmd(self, line):
+        """
+        Precmd Method:
+
+        Reads again the objects other processes changed since the
+        last command before running the next one.
+        """
+        models.storage.refresh()
+        return line
+
+    def onecmd(self, line):
+        """
+        Onecmd Method:
+
+        Runs a command, reporting the objects another process changed
+        too instead of stopping when a save is rejected. Their changes
+        are kept and those of the command dropped, so that the next
+        saves go through.
+        """
+        try:
+            return super().onecmd(line)
+        except ConflictError as error:
+            print('** {} **'.format(error))
+            models.storage.resolve(error.keys)
+            return False
 
     def emptyline(self):
         """
@@ -268,5 +612,31 @@ class HBNBCommand(cmd.Cmd):
         pass
 
 
+def main(argv=None):
+    """
+    Main Function:
+
+    Runs the console interactively or, with `--batch FILE`, runs the
+    commands of FILE, '-' for the standard input, as a batch.
+
+    Args:
+        argv (list): The command line arguments.
+    """
+    parser = argparse.ArgumentParser(description='HBNB console')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands of FILE, '-' for stdin, "
+                             "saving once at the end")
+    parser.add_argument('--flush-every', metavar='N', type=int, default=0,
+                        help='with --batch, save every N commands')
+    args = parser.parse_args(argv)
+    if args.batch is None:
+        HBNBCommand().cmdloop()
+    elif args.batch == '-':
+        HBNBCommand().run_batch(sys.stdin, args.flush_every)
+    else:
+        with open(args.batch, mode='r', encoding='utf-8') as f:
+            HBNBCommand().run_batch(f, args.flush_every)
+
+
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
+    main()
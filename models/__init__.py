@@ -1,10 +1,21 @@
 """initializes the models package, creating a global
-FileStorage instance for managing data serialization
+storage instance for managing data serialization
 and deserialization, thereby enabling persistent
-storage across the application.
+storage across the application. The SQLite engine is
+used when HBNB_TYPE_STORAGE is 'db', the JSON file
+engine otherwise. The rendered forms of the instances are kept in
+a cache of HBNB_RENDER_CACHE_SIZE objects, 1024 by default.
 """
 
-from models.engine.file_storage import FileStorage
+from os import getenv
+from models.render_cache import RenderCache
 
-storage = FileStorage()
+render_cache = RenderCache(int(getenv('HBNB_RENDER_CACHE_SIZE', 1024)))
+
+if getenv('HBNB_TYPE_STORAGE') == 'db':
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
 storage.reload()
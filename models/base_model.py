@@ -11,10 +11,19 @@ representation format, and methods for
 data serialization and deserialization.
 """
 
+import copy
 from datetime import datetime
+from models.isotime import format_datetime, parse_datetime
 import models
+import sys
 import uuid
 
+classes = {}
+"""dict: The model classes, by name, as registered by `BaseModel`."""
+
+IMMUTABLE_TYPES = frozenset((bool, datetime, float, int, str, type(None)))
+"""frozenset: The attribute types that never change in place."""
+
 
 class BaseModel:
     """ Base Model class:
@@ -24,8 +33,32 @@ class BaseModel:
         id (str): A universally unique identifier for each instance.
         created_at (datetime): The timestamp when an instance is created.
         updated_at (datetime): Ths timestamp of the last update.
+        __indexed__ (tuple): The attributes the storage keeps an
+        index on, to look instances up by value.
+        __columns__ (tuple): The numeric attributes the storage keeps
+        in columns, to select instances by range.
+        __geo__ (tuple): The latitude and longitude attributes the
+        storage indexes, to look instances up by location.
     """
 
+    __indexed__ = ()
+    __columns__ = ()
+    __geo__ = ()
+
+    def __init_subclass__(cls, register=True, **kwargs):
+        """
+        Subclass Registration:
+        Registers every model class under its name, so that the
+        storage and the console can resolve it.
+
+        Args:
+            register (bool): False for the classes that must not
+            replace the registered class of the same name.
+        """
+        super().__init_subclass__(**kwargs)
+        if register:
+            classes[cls.__name__] = cls
+
     def __init__(self, *args, **kwargs):
         """
         Base Model Initialization:
@@ -34,44 +67,222 @@ class BaseModel:
         if kwargs:
             for arg, val in kwargs.items():
                 if arg in ('created_at', 'updated_at'):
-                    val = datetime.strptime(val, '%Y-%m-%dT%H:%M:%S.%f')
+                    val = parse_datetime(val)
 
                 if arg != '__class__':
-                    setattr(self, arg, val)
+                    super().__setattr__(arg, val)
         else:
             self.id = str(uuid.uuid4())
             self.created_at = datetime.now()
             self.updated_at = self.created_at
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """
+        Set Attribute:
+        Lets the storage assign the attribute, once it knows the
+        instance is about to change, then drops its rendered forms.
+        """
+        models.storage.assign(self, name, value)
+        models.render_cache.discard(self)
+
+    def __delattr__(self, name):
+        """
+        Delete Attribute:
+        Lets the storage delete the attribute, once it knows the
+        instance is about to change, then drops its rendered forms.
+        """
+        models.storage.unassign(self, name)
+        models.render_cache.discard(self)
+
     def __str__(self):
         """
         String Representation:
         Returns a string with the class name, instance ID,
-        and dictionary representation.
+        and dictionary representation, from the render cache.
         """
-        return '[{0}] ({1}) {2}'.format(
-                self.__class__.__name__, self.id, self.__dict__
-            )
+        return models.render_cache.get(self, 'str', BaseModel._render_str,
+                                       BaseModel._mutable_state)
 
     def save(self):
         """
         Update and Save:
-        Updates the instance's `updated_at` attribute
-        and saves the class data to a file.
+        Updates the instance's `updated_at` attribute, marks the
+        instance as changed in the storage and saves the class data
+        to a file.
         """
         self.updated_at = datetime.now()
+        models.storage.new(self)
         models.storage.save()
 
     def to_dict(self):
         """
         Convert to Dictionary:
         Converts the instance information to a dictionary
-        for human-readable format.
+        for human-readable format. The dictionary is a copy of the
+        one in the render cache.
+        """
+        return dict(models.render_cache.get(self, 'dict',
+                                            BaseModel._render_dict,
+                                            BaseModel._mutable_state))
+
+    def _mutable_state(self):
+        """
+        Mutable State:
+        Returns copies of the lists, dictionaries and sets among the
+        attributes, which change in place without an assignment, for
+        the render cache to tell when they did, or None if there are
+        none.
+        """
+        attributes = self._attributes()
+        for value in attributes.values():
+            if type(value) not in IMMUTABLE_TYPES:
+                break
+        else:
+            return None
+        return [(name, copy.deepcopy(value))
+                for name, value in attributes.items()
+                if isinstance(value, (list, dict, set))]
+
+    def _render_str(self):
         """
-        class_info = self.__dict__.copy()
+        Render the String:
+        Returns the string representation, formatted anew.
+        """
+        return '[{0}] ({1}) {2}'.format(
+                self.__class__.__name__, self.id, self._attributes()
+            )
+
+    def _render_dict(self):
+        """
+        Render the Dictionary:
+        Returns the dictionary representation, built anew.
+        """
+        class_info = self._attributes().copy()
         class_info['__class__'] = self.__class__.__name__
-        class_info['created_at'] = self.created_at.isoformat()
-        class_info['updated_at'] = self.updated_at.isoformat()
+        class_info['created_at'] = format_datetime(self.created_at)
+        class_info['updated_at'] = format_datetime(self.updated_at)
 
         return class_info
+
+    def _attributes(self):
+        """
+        Attributes:
+        Returns the dictionary of the instance attributes.
+        """
+        return self.__dict__
+
+    @classmethod
+    def schema(cls):
+        """
+        Schema:
+        Returns the public attributes declared on the class and on
+        the classes it inherits from, with their default values.
+        """
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if name.startswith('_') or callable(value) or \
+                        isinstance(value, (classmethod, staticmethod)):
+                    continue
+                fields[name] = value
+        return fields
+
+    @classmethod
+    def compact_class(cls):
+        """
+        Compact Class:
+        Returns the compact variant of the class, a subclass keeping
+        the instance id, timestamps and schema attributes in slots
+        rather than in the instance dictionary. It is created on first
+        use and not registered, so its instances still serialize under
+        the name of the class.
+        """
+        if issubclass(cls, CompactModel):
+            return cls
+        compact = cls.__dict__.get('_compact_class')
+        if compact is None:
+            defaults = cls.schema()
+            namespace = {
+                '__slots__': ('id', 'created_at', 'updated_at') +
+                tuple(defaults) + ('_extra',),
+                '__doc__': cls.__doc__,
+                '__module__': cls.__module__,
+                '__qualname__': cls.__qualname__,
+                '_defaults': defaults,
+            }
+            compact = type(cls)(cls.__name__, (CompactModel, cls),
+                                namespace, register=False)
+            cls._compact_class = compact
+        return compact
+
+
+class CompactModel:
+    """ Compact Model class:
+    mixin of the classes returned by `BaseModel.compact_class`. Unset
+    slots fall back to the defaults of the model class, and the string
+    foreign keys listed in `__indexed__` are interned, as many objects
+    share them. The `_extra` slot is only set once an attribute outside
+    of the slots is, so that the instance dictionary is not created
+    when there is nothing to put in it.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        """
+        Compact Model Initialization:
+        Interns the indexed attributes, then initializes the instance
+        as the model class does.
+        """
+        for name in self.__indexed__:
+            value = kwargs.get(name)
+            if type(value) is str:
+                kwargs[name] = sys.intern(value)
+        for name in kwargs:
+            if name != '__class__' and name not in type(self).__slots__:
+                object.__setattr__(self, '_extra', True)
+                break
+        super().__init__(*args, **kwargs)
+
+    def __setattr__(self, name, value):
+        """
+        Set Attribute:
+        Flags the instance when the attribute is not one of its slots,
+        before it is set and its rendered forms dropped.
+        """
+        if name not in type(self).__slots__:
+            object.__setattr__(self, '_extra', True)
+        super().__setattr__(name, value)
+
+    def __getattr__(self, name):
+        """
+        Get Attribute:
+        Returns the default of a schema attribute not set yet.
+        """
+        try:
+            return type(self)._defaults[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def _attributes(self):
+        """
+        Attributes:
+        Returns a dictionary of the slots set on the instance,
+        followed by the attributes of the instance dictionary.
+        """
+        attributes = {}
+        for name in type(self).__slots__[:-1]:
+            try:
+                attributes[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        try:
+            object.__getattribute__(self, '_extra')
+        except AttributeError:
+            return attributes
+        attributes.update(object.__getattribute__(self, '__dict__'))
+        return attributes
+
+
+classes[BaseModel.__name__] = BaseModel
@@ -17,7 +17,10 @@ class City(BaseModel):
     Attributes:
         state_id (str): The UUID of the State the City belongs to
         name (str): The City name
+        __indexed__ (tuple): Attributes indexed by the storage
 
     """
+    __indexed__ = ('state_id',)
+
     state_id = ''
     name = ''
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+
+"""
+Async Storage Module
+This module provides an asyncio facade over a storage engine: the
+blocking work of the storage, reading and writing files, runs in a
+worker thread while the event loop goes on.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncStorage:
+    """
+    Async Storage Class
+    This class wraps a storage for coroutines. `asave()`, `areload()`
+    and `aflush()` run the methods of the storage in the thread of its
+    executor, one at a time, and the saves asked for while another one
+    waits to start are made with it. `aall()` iterates over the
+    instances, handing control back to the loop between chunks. The
+    other attributes are those of the storage. As the storage is then
+    used from two threads, it must be in a thread-safe mode, which its
+    caller switches it to.
+    Attributes:
+        storage (FileStorage): The wrapped storage.
+        executor (Executor): Where the blocking work runs.
+        chunk (int): How many instances `aall()` yields before handing
+        control back to the loop.
+        __running (Task): The save in progress, if any.
+        __queued (Task): The save waiting for the one in progress, if
+        any, which the saves asked for meanwhile wait for too.
+    """
+
+    def __init__(self, storage, executor=None, chunk=1000):
+        """
+        Async Storage Initialization
+        Args:
+            storage (FileStorage): The storage to wrap, in thread-safe
+            or write-behind mode.
+            executor (Executor): Where the blocking work runs, by
+            default a thread of its own.
+            chunk (int): How many instances `aall()` yields at a time.
+
+        Raises ValueError if the storage is in neither mode.
+        """
+        if not (getattr(storage, 'thread_safe', False) or
+                getattr(storage, 'write_behind', False)):
+            raise ValueError('AsyncStorage needs a storage in thread-safe '
+                             'or write-behind mode')
+        self.storage = storage
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='AsyncStorage')
+        self.chunk = chunk
+        self.__running = None
+        self.__queued = None
+
+    def __getattr__(self, name):
+        """
+        Get Attribute
+        Returns the attribute `name` of the storage.
+        """
+        return getattr(self.storage, name)
+
+    async def asave(self):
+        """
+        Save
+        Saves the storage in the executor, after the save in progress
+        if any. The saves asked for before this one starts share it.
+        """
+        if self.__queued is None:
+            self.__queued = asyncio.ensure_future(
+                self.__save(self.__running))
+        await asyncio.shield(self.__queued)
+
+    async def areload(self):
+        """
+        Reload
+        Reloads the storage in the executor, once the saves asked for
+        before are made.
+        """
+        await self.__settle()
+        await self.__run(self.storage.reload)
+
+    async def aflush(self):
+        """
+        Flush
+        Flushes the storage in the executor, once the saves asked for
+        before are made: the saves of its write-behind mode are made
+        and the writes of its durability committed.
+        """
+        await self.__settle()
+        await self.__run(self.storage.flush)
+
+    async def aall(self, cls=None):
+        """
+        All Instances
+        Args:
+            cls (class or str): Optional class, or class name, to
+            restrict the instances to.
+
+        Asynchronous generator of the instances, of `cls` if given,
+        read in the executor, which may instantiate them.
+        """
+        objects = await self.__run(
+            lambda: list(self.storage.all(cls).values()))
+        for start in range(0, len(objects), self.chunk):
+            for obj in objects[start:start + self.chunk]:
+                yield obj
+            await asyncio.sleep(0)
+
+    async def __save(self, previous):
+        """
+        Save Task
+        Waits for the `previous` save, then saves in the executor.
+        """
+        if previous is not None:
+            await asyncio.wait([previous])
+        self.__running = self.__queued
+        self.__queued = None
+        try:
+            await self.__run(self.storage.save)
+        finally:
+            if self.__running is asyncio.current_task():
+                self.__running = None
+
+    async def __settle(self):
+        """
+        Settle
+        Waits for the saves in progress or asked for, whatever their
+        outcome, which their callers get.
+        """
+        tasks = [task for task in (self.__running, self.__queued)
+                 if task is not None]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def __run(self, function):
+        """
+        Run in the Executor
+        Returns the future of `function` run in the executor.
+        """
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, function)
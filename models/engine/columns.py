@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+
+"""
+Columns Module
+This module keeps numeric attributes of the stored objects in
+columns, one array of floats per attribute, to answer range and
+equality queries without going through the instances.
+NumPy is used to evaluate the queries when it is installed.
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float('nan')
+
+
+class ColumnStore:
+    """
+    Column Store Class
+    This class stores the numeric attributes of the objects of one
+    class. Each object owns a row; the rows of removed objects are
+    reused.
+    Attributes:
+        fields (tuple): The names of the attributes stored.
+        keys (list): The key of the object of each row, or None for a
+        free row.
+        rows (dict): The row of each key.
+        columns (dict): The array of each attribute, where values that
+        are not numbers are stored as NaN.
+    """
+
+    def __init__(self, fields):
+        """
+        Column Store Initialization
+        Args:
+            fields (tuple): The names of the attributes to store.
+        """
+        self.fields = tuple(fields)
+        self.keys = []
+        self.rows = {}
+        self.columns = {field: array('d') for field in self.fields}
+        self.__free = []
+
+    def __len__(self):
+        """
+        Length
+        Returns the number of objects stored.
+        """
+        return len(self.rows)
+
+    def set(self, key, obj):
+        """
+        Set a Row
+        Args:
+            key (str): The key of the object.
+            obj (inst): The object whose attributes are stored.
+        """
+        row = self.rows.get(key)
+        if row is None:
+            if self.__free:
+                row = self.__free.pop()
+                self.keys[row] = key
+            else:
+                row = len(self.keys)
+                self.keys.append(key)
+                for column in self.columns.values():
+                    column.append(NAN)
+            self.rows[key] = row
+        for field, column in self.columns.items():
+            column[row] = self.__number(getattr(obj, field, None))
+
+    def remove(self, key):
+        """
+        Remove a Row
+        Args:
+            key (str): The key of the object to remove.
+        """
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        self.keys[row] = None
+        for column in self.columns.values():
+            column[row] = NAN
+        self.__free.append(row)
+
+    def select(self, **predicates):
+        """
+        Select Rows
+        Args:
+            predicates (dict): The conditions on the attributes. A
+            number selects the rows equal to it, and a (low, high)
+            pair the rows within that inclusive range, where None
+            leaves a bound open.
+
+        Returns the keys of the rows matching every condition.
+        Raises KeyError for an attribute not stored in the columns.
+        """
+        for field in predicates:
+            if field not in self.columns:
+                raise KeyError(field)
+        if numpy is not None and predicates:
+            rows = self.__select_numpy(predicates)
+        else:
+            rows = self.__select_python(predicates)
+        keys = self.keys
+        return [keys[row] for row in rows if keys[row] is not None]
+
+    def __select_numpy(self, predicates):
+        """
+        Select with NumPy
+        Returns the matching rows, computed on whole columns at once.
+        """
+        mask = None
+        for field, bounds in predicates.items():
+            column = numpy.frombuffer(self.columns[field], dtype=numpy.float64)
+            low, high = self.__bounds(bounds)
+            if low is None:
+                match = column <= high
+            elif high is None:
+                match = column >= low
+            else:
+                match = (column >= low) & (column <= high)
+            mask = match if mask is None else mask & match
+        return numpy.flatnonzero(mask).tolist()
+
+    def __select_python(self, predicates):
+        """
+        Select without NumPy
+        Returns the matching rows, filtering the candidate rows one
+        condition after the other.
+        """
+        rows = None
+        for field, bounds in predicates.items():
+            column = self.columns[field]
+            low, high = self.__bounds(bounds)
+            if rows is None:
+                rows = range(len(column))
+            if low is None:
+                rows = [row for row in rows if column[row] <= high]
+            elif high is None:
+                rows = [row for row in rows if column[row] >= low]
+            else:
+                rows = [row for row in rows if low <= column[row] <= high]
+        return range(len(self.keys)) if rows is None else rows
+
+    @staticmethod
+    def __bounds(bounds):
+        """
+        Bounds
+        Returns the (low, high) pair of a condition.
+        """
+        if isinstance(bounds, (tuple, list)):
+            low, high = bounds
+            if low is None and high is None:
+                return float('-inf'), None
+            return low, high
+        return bounds, bounds
+
+    @staticmethod
+    def __number(value):
+        """
+        Number
+        Returns `value` as a float, or NaN if it is not a number.
+        """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return NAN
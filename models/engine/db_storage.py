@@ -0,0 +1,610 @@
+#!/usr/bin/python3
+
+"""
+DB Storage Module
+This module stores the classes in a SQLite database, with the same
+interface as the file storage, so that saving one object writes one
+row instead of rewriting every object.
+"""
+
+import json
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from os import getenv
+from models.base_model import classes
+from models.engine.geo import bounding_boxes, distance_km
+from models.engine import query, transfer
+import models.amenity
+import models.city
+import models.place
+import models.review
+import models.state
+import models.user
+
+
+class DBStorage:
+    """
+    DB Storage Class
+    This class represents the SQLite storage engine. Each model class
+    has its own table, holding the JSON encoding of each object in a
+    `data` column next to one column, indexed, per attribute listed in
+    the `__indexed__`, `__columns__` and `__geo__` of the class.
+    Changes are written to the database before every query, and
+    committed by `save()`.
+    Attributes:
+        __path (str): The path of the database file.
+        __connection (sqlite3.Connection): The open connection.
+        __identity (WeakValueDictionary): The instances already built
+        from the database, by <class name>.id key, so that a row is
+        always read back as the same instance.
+        __dirty (dict): The instances created or changed since the
+        last write, by key.
+        __deleted (set): The keys deleted since the last write.
+        __tables (dict): The mirrored columns of each table created.
+        __batch_depth (int): How many batches are open.
+        __batch_saved (bool): Whether a save was asked for in the batch.
+    """
+
+    def __init__(self, path=None):
+        """
+        DB Storage Initialization
+        Args:
+            path (str): The path of the database file, by default the
+            `HBNB_SQLITE_PATH` environment variable or 'hbnb.db'.
+        """
+        self.__path = path or getenv('HBNB_SQLITE_PATH', 'hbnb.db')
+        self.__connection = None
+        self.__identity = weakref.WeakValueDictionary()
+        self.__dirty = {}
+        self.__deleted = set()
+        self.__tables = {}
+        self.__batch_depth = 0
+        self.__batch_saved = False
+
+    def all(self, cls=None):
+        """
+        Get objects information
+        Args:
+            cls (class or str): Optional class, or class name, to
+            restrict the result to.
+
+        Returns a dict of the stored instances, by key.
+        """
+        self.__write()
+        objects = {}
+        for class_name in self.__table_names(cls):
+            rows = self.__connection.execute(
+                'SELECT data FROM "{}"'.format(class_name))
+            for data, in rows:
+                obj = self.__build(data)
+                objects[obj.__class__.__name__ + '.' + obj.id] = obj
+        return objects
+
+    def get(self, cls, id):
+        """
+        Get an object
+        Args:
+            cls (class or str): The class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns the stored instance, or None if there is none.
+        """
+        class_name = self.__class_name(cls)
+        obj = self.__identity.get(class_name + '.' + id)
+        if obj is not None:
+            return obj
+        self.__write()
+        if class_name not in self.__tables:
+            return None
+        row = self.__connection.execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(class_name),
+            (id,)).fetchone()
+        return None if row is None else self.__build(row[0])
+
+    def count(self, cls=None):
+        """
+        Count objects
+        Args:
+            cls (class or str): Optional class, or class name, whose
+            instances are counted.
+
+        Returns the number of stored instances, of `cls` if given.
+        """
+        self.__write()
+        return sum(self.__connection.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(class_name)).fetchone()[0]
+            for class_name in self.__table_names(cls))
+
+    def find(self, cls, **equals):
+        """
+        Find objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            equals (dict): The attribute values to match.
+
+        Returns a dict of the instances of `cls` whose attributes equal
+        every given value, filtered by the database on the mirrored
+        columns and in Python on the others.
+        """
+        class_name = self.__class_name(cls)
+        self.__write()
+        if class_name not in self.__tables:
+            return {}
+        mirrored = self.__tables[class_name]
+        clauses = []
+        params = []
+        for attr, value in equals.items():
+            if attr in mirrored:
+                clauses.append('"{}" = ?'.format(attr))
+                params.append(self.__sql_value(value))
+        objects = {}
+        for data, in self.__query(class_name, clauses, params):
+            obj = self.__build(data)
+            if all(getattr(obj, attr, None) == value
+                   for attr, value in equals.items()):
+                objects[class_name + '.' + obj.id] = obj
+        return objects
+
+    def select(self, cls, **predicates):
+        """
+        Select objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            predicates (dict): Conditions on attributes listed in the
+            class `__columns__`: a number to match exactly, or a
+            (low, high) pair of inclusive bounds, None for no bound.
+
+        Returns the ids of the instances of `cls` matching every
+        condition. Raises KeyError for an attribute not in a column.
+        """
+        class_name = self.__class_name(cls)
+        self.__write()
+        if class_name not in self.__tables:
+            return []
+        clauses = []
+        params = []
+        for attr, bounds in predicates.items():
+            if attr not in self.__tables[class_name]:
+                raise KeyError(attr)
+            if not isinstance(bounds, (tuple, list)):
+                bounds = (bounds, bounds)
+            clauses.append('typeof("{0}") IN (\'integer\', \'real\')'
+                           .format(attr))
+            for operator, bound in zip(('>=', '<='), bounds):
+                if bound is not None:
+                    clauses.append('"{}" {} ?'.format(attr, operator))
+                    params.append(bound)
+        return [row[0] for row in self.__query(class_name, clauses, params,
+                                               column='id')]
+
+    def query(self, cls, conditions=(), order_by=None, limit=None):
+        """
+        Query objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            conditions (iterable): (attribute, operator, value) triples
+            the instances must all meet, the operators being those of
+            `query.OPERATORS`.
+            order_by (str): The attribute to order the instances by,
+            prefixed with '-' for the descending order.
+            limit (int): The maximum number of instances returned.
+
+        Returns the list of the matching instances of `cls`. The
+        conditions on mirrored columns are evaluated by the database,
+        with their indexes, the others in Python, and the first
+        instances in order are picked with a heap when there is a
+        limit.
+        """
+        conditions = query.validate(conditions)
+        class_name = self.__class_name(cls)
+        self.__write()
+        if class_name not in self.__tables:
+            return []
+        clauses, params = self.__where(class_name, conditions)
+        objects = (self.__build(data) for data, in
+                   self.__query(class_name, clauses, params))
+        return query.top((obj for obj in objects
+                          if query.matches(obj, conditions)),
+                         order_by, limit)
+
+    def explain(self, cls, conditions=()):
+        """
+        Explain a Query
+        Args:
+            cls (class or str): The class, or class name, to search.
+            conditions (iterable): The conditions of the query.
+
+        Returns the plan SQLite uses to find the candidates of the
+        conditions.
+        """
+        conditions = query.validate(conditions)
+        class_name = self.__class_name(cls)
+        self.__write()
+        if class_name not in self.__tables:
+            return 'scan'
+        clauses, params = self.__where(class_name, conditions)
+        sql = 'EXPLAIN QUERY PLAN SELECT data FROM "{}"'.format(class_name)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return '; '.join(row[-1] for row in
+                         self.__connection.execute(sql, params))
+
+    def near(self, cls, latitude, longitude, radius_km):
+        """
+        Near objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            latitude (float): The latitude of the center, in degrees.
+            longitude (float): The longitude of the center, in degrees.
+            radius_km (float): The radius, in kilometers.
+
+        Returns the instances of `cls` located within the radius,
+        closest first.
+        """
+        south, north, spans = bounding_boxes(latitude, longitude, radius_km)
+        found = []
+        for west, east in spans:
+            for obj in self.within(cls, south, west, north, east):
+                lat_attr, lon_attr = obj.__geo__
+                distance = distance_km(latitude, longitude,
+                                       float(getattr(obj, lat_attr)),
+                                       float(getattr(obj, lon_attr)))
+                if distance <= radius_km:
+                    found.append((distance, obj.id, obj))
+        found.sort(key=lambda item: item[:2])
+        return [obj for distance, id, obj in found]
+
+    def within(self, cls, south, west, north, east):
+        """
+        Objects within a box
+        Args:
+            cls (class or str): The class, or class name, to search.
+            south (float): The lowest latitude.
+            west (float): The western longitude.
+            north (float): The highest latitude.
+            east (float): The eastern longitude.
+
+        Returns the instances of `cls` located within the box.
+        """
+        class_name = self.__class_name(cls)
+        self.__write()
+        model = classes.get(class_name)
+        if class_name not in self.__tables or not model or \
+                not model.__geo__:
+            return []
+        lat_attr, lon_attr = model.__geo__
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180.0), (-180.0, east)]
+        found = []
+        for low, high in spans:
+            clauses = ['"{}" BETWEEN ? AND ?'.format(lat_attr),
+                       '"{}" BETWEEN ? AND ?'.format(lon_attr)]
+            rows = self.__query(class_name, clauses,
+                                [south, north, low, high])
+            found.extend(self.__build(data) for data, in rows)
+        return found
+
+    def assign(self, obj, name, value):
+        """
+        Assign an Attribute
+        Args:
+            obj (inst): The object the attribute is assigned on.
+            name (str): The name of the attribute.
+            value: The value assigned.
+
+        Touches `obj`, then assigns the attribute.
+        """
+        self.touch(obj, name)
+        object.__setattr__(obj, name, value)
+
+    def unassign(self, obj, name):
+        """
+        Unassign an Attribute
+        Args:
+            obj (inst): The object the attribute is deleted from.
+            name (str): The name of the attribute.
+
+        Touches `obj`, then deletes the attribute.
+        """
+        self.touch(obj, name)
+        object.__delattr__(obj, name)
+
+    def touch(self, obj, name):
+        """
+        Touch an Object
+        Args:
+            obj (inst): The object one attribute is about to be
+            assigned on, or deleted from.
+            name (str): The name of the attribute.
+
+        Marks a stored object as changed, to be written again.
+        """
+        key = obj.__class__.__name__ + '.' + str(getattr(obj, 'id', ''))
+        if self.__identity.get(key) is obj:
+            self.__dirty[key] = obj
+
+    def new(self, obj):
+        """
+        Save a New Object
+        Args:
+            obj (inst): The object to add to the database.
+        """
+        key = obj.__class__.__name__ + '.' + obj.id
+        self.__identity[key] = obj
+        self.__dirty[key] = obj
+        self.__deleted.discard(key)
+
+    def delete(self, obj=None):
+        """
+        Delete an Object
+        Args:
+            obj (inst): The object to remove from the database.
+            Nothing is done if it is None.
+        """
+        if obj is None:
+            return
+        key = obj.__class__.__name__ + '.' + obj.id
+        self.__identity.pop(key, None)
+        self.__dirty.pop(key, None)
+        self.__deleted.add(key)
+
+    def save(self):
+        """
+        Commit the Changes
+        Writes the objects created, changed or deleted since the last
+        write, then commits the transaction. Within a batch nothing is
+        committed until the batch ends.
+        """
+        if self.__batch_depth:
+            self.__batch_saved = True
+            return
+        self.__write()
+        self.__connection.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Batch of Changes
+        Context manager within which `save()` only records that a save
+        is due: a single commit happens when the batch ends, if one was
+        asked for. If the batch ends with an exception the transaction
+        is rolled back and the instances built are forgotten, so that
+        the objects are read again in their state before the batch.
+        A batch opened within another one is part of it.
+        """
+        self.__batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self.__batch_depth == 1:
+                self.__batch_saved = False
+                self.reload()
+            raise
+        finally:
+            self.__batch_depth -= 1
+        if not self.__batch_depth and self.__batch_saved:
+            self.__batch_saved = False
+            self.save()
+
+    def import_file(self, file_path, cls=None, format=None):
+        """
+        Import a File
+        Args:
+            file_path (str): The JSON Lines or CSV file to read.
+            cls (class or str): The class, or class name, of the rows
+            that do not name theirs.
+            format (str): 'jsonl' or 'csv', or None to pick it from the
+            extension of the file.
+
+        Adds an object per row, validated against its class, and saves
+        once. Returns the number of objects imported.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        return transfer.import_file(self, file_path, cls, format)
+
+    def export_file(self, file_path, cls=None, format=None):
+        """
+        Export a File
+        Args:
+            file_path (str): The JSON Lines or CSV file to write.
+            cls (class or str): The class, or class name, of the
+            objects to export, required in CSV.
+            format (str): 'jsonl' or 'csv', or None to pick it from the
+            extension of the file.
+
+        Returns the number of objects exported.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        return transfer.export_file(self, file_path, cls, format)
+
+    def reload(self):
+        """
+        Connect to the Database
+        Opens the database in WAL mode, creates the table of each
+        registered class that does not have one, and discards the
+        changes not committed.
+        """
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(self.__path)
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+        else:
+            self.__connection.rollback()
+        self.clear()
+        for class_name in classes:
+            self.__table(class_name)
+        self.__connection.commit()
+
+    def clear(self):
+        """
+        Clear objects
+        Forgets the instances built and the changes not written yet.
+        """
+        self.__identity.clear()
+        self.__dirty.clear()
+        self.__deleted.clear()
+
+    def flush(self):
+        """
+        Flush the Saves
+        Does nothing: the database commits every save at once.
+        """
+
+    def refresh(self):
+        """
+        Refresh the Objects
+        Forgets the instances built without pending changes, so that
+        the next queries build them again from the rows other
+        connections may have committed since.
+        """
+        for key in list(self.__identity.keys()):
+            if key not in self.__dirty:
+                self.__identity.pop(key, None)
+
+    def close(self):
+        """
+        Close the Database
+        Closes the connection, discarding the changes not committed.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    @staticmethod
+    def __class_name(cls):
+        """
+        Class Name
+        Returns the name of `cls`, which may already be a name.
+        """
+        return cls if isinstance(cls, str) else cls.__name__
+
+    @staticmethod
+    def __sql_value(value):
+        """
+        SQL Value
+        Returns `value` as stored in a mirrored column.
+        """
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return json.dumps(value)
+
+    def __table_names(self, cls):
+        """
+        Table Names
+        Returns the names of the tables to read: that of `cls` if it
+        has one, or all of them.
+        """
+        if cls is None:
+            return list(self.__tables)
+        class_name = self.__class_name(cls)
+        return [class_name] if class_name in self.__tables else []
+
+    def __table(self, class_name):
+        """
+        Create a Table
+        Creates the table of `class_name` and the indexes of its
+        mirrored columns, adding the columns it misses if it exists.
+        Returns the names of the mirrored columns.
+        """
+        mirrored = self.__tables.get(class_name)
+        if mirrored is not None:
+            return mirrored
+        model = classes[class_name]
+        mirrored = []
+        for attr in model.__indexed__ + model.__columns__ + model.__geo__:
+            if attr not in mirrored:
+                mirrored.append(attr)
+        execute = self.__connection.execute
+        execute('CREATE TABLE IF NOT EXISTS "{}" '
+                '(id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                .format(class_name))
+        existing = {row[1] for row in execute(
+            'PRAGMA table_info("{}")'.format(class_name))}
+        for attr in mirrored:
+            if attr not in existing:
+                execute('ALTER TABLE "{}" ADD COLUMN "{}"'
+                        .format(class_name, attr))
+        for attr in model.__indexed__ + model.__columns__:
+            execute('CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ("{1}")'
+                    .format(class_name, attr))
+        if model.__geo__:
+            execute('CREATE INDEX IF NOT EXISTS "{0}_geo" ON "{0}" '
+                    '("{1}", "{2}")'.format(class_name, *model.__geo__))
+        self.__tables[class_name] = mirrored
+        return mirrored
+
+    def __where(self, class_name, conditions):
+        """
+        Where Clauses
+        Returns the SQL clauses, and their parameters, of the
+        conditions on the mirrored columns of `class_name` with a
+        string or number value. The rows they select are a superset of
+        the matching instances.
+        """
+        clauses = []
+        params = []
+        for attr, op, value in conditions:
+            if attr in self.__tables[class_name] and \
+                    isinstance(value, (str, int, float)) and \
+                    not isinstance(value, bool):
+                clauses.append('"{}" {} ?'.format(
+                    attr, {'==': '=', '!=': 'IS NOT'}.get(op, op)))
+                params.append(value)
+        return clauses, params
+
+    def __query(self, class_name, clauses, params, column='data'):
+        """
+        Query a Table
+        Returns the cursor over `column` of the rows of `class_name`
+        matching every SQL clause.
+        """
+        sql = 'SELECT {} FROM "{}"'.format(column, class_name)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return self.__connection.execute(sql, params)
+
+    def __build(self, data):
+        """
+        Build an Object
+        Returns the instance encoded in `data`, or the instance
+        already built for its key.
+        """
+        value = json.loads(data)
+        key = value['__class__'] + '.' + value['id']
+        obj = self.__identity.get(key)
+        if obj is None:
+            obj = classes[value['__class__']](**value)
+            self.__identity[key] = obj
+        return obj
+
+    def __write(self):
+        """
+        Write the Changes
+        Writes the pending changes in the current transaction, so that
+        the queries see them.
+        """
+        for key in self.__deleted:
+            class_name, _, id = key.partition('.')
+            if class_name in self.__tables:
+                self.__connection.execute(
+                    'DELETE FROM "{}" WHERE id = ?'.format(class_name),
+                    (id,))
+        self.__deleted.clear()
+        for key, obj in self.__dirty.items():
+            class_name = obj.__class__.__name__
+            mirrored = self.__table(class_name)
+            columns = ['id', 'data'] + mirrored
+            values = [obj.id, json.dumps(obj.to_dict())] + [
+                self.__sql_value(getattr(obj, attr, None))
+                for attr in mirrored]
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                    class_name,
+                    ', '.join('"{}"'.format(column) for column in columns),
+                    ', '.join('?' * len(columns))), values)
+        self.__dirty.clear()
@@ -5,15 +5,102 @@ File Storage Module
 This module handles the storage of classes and their management.
 """
 
+import atexit
 import json
+import multiprocessing
+import os
+import re
+import stat
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import wraps
 from os import path
-from models.amenity import Amenity
-from models.base_model import BaseModel
-from models.city import City
-from models.place import Place
-from models.review import Review
-from models.state import State
-from models.user import User
+from models.base_model import classes
+from models.engine.columns import ColumnStore
+from models.engine.geo import GridIndex
+from models.engine.rwlock import RWLock
+from models.engine.serializers import detect, serializer_for
+from models.engine import query, transfer
+from models.isotime import parse_datetime
+import models.amenity
+import models.city
+import models.place
+import models.review
+import models.state
+import models.user
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+_KEY = re.compile(rb'"(?:[^"\\]|\\.)*": ')
+"""re.Pattern: The quoted key starting a line of a JSON snapshot."""
+
+
+class ConflictError(Exception):
+    """
+    Conflict Error
+    Raised by a save in concurrent mode when objects it would write
+    were changed, or deleted, by another process since they were last
+    read.
+    Attributes:
+        keys (list): The keys of the conflicting objects.
+    """
+
+    def __init__(self, keys):
+        """Record the conflicting keys."""
+        super().__init__('changed by another process: ' + ', '.join(keys))
+        self.keys = keys
+
+
+def _reading(indexes=False):
+    """
+    Reading Method
+    Args:
+        indexes (bool): Whether the method reads the indexes.
+
+    Decorates a FileStorage method reading the objects of the class
+    given as its first argument, or of every class, to run it in
+    thread-safe, or write-behind, mode under the shared lock, or under
+    the exclusive one when reading would instantiate objects or
+    refresh the indexes.
+    """
+    def decorate(method):
+        """Decorate `method`."""
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            """Run the method under the lock."""
+            if not self.thread_safe and not self.write_behind:
+                return method(self, *args, **kwargs)
+            cls = args[0] if args else kwargs.get('cls')
+            with self.lock.read():
+                if self._ready(cls, indexes):
+                    return method(self, *args, **kwargs)
+            with self.lock.write():
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _writing(method):
+    """
+    Writing Method
+    Decorates a FileStorage method changing the objects to run it in
+    thread-safe, or write-behind, mode under the exclusive lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """Run the method under the lock."""
+        if not self.thread_safe and not self.write_behind:
+            return method(self, *args, **kwargs)
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class FileStorage:
@@ -21,20 +108,442 @@ class FileStorage:
     File Storage Class
     This class represents the file storage module.
     Attributes:
-        __file_path (str): The path of the JSON file where the
+        __file_path (str): The path of the snapshot file where the
         contents of the `__objects` variable will be stored.
         __objects (dict): Stores all the instances' data.
+        __by_class (dict): Index of `__objects` by class name, mapping
+        each name to a dict of <class name>.id keys to instances.
+        __indexes (dict): Attribute indexes, mapping a
+        (class name, attribute) pair to a dict of values to the
+        instances, by key, holding that value.
+        __indexed_values (dict): The values each key is indexed under.
+        __columns (dict): The column store of the `__columns__`
+        attributes of each class, by class name.
+        __geo (dict): The grid index of the `__geo__` coordinates of
+        each class, by class name.
+        __stale (set): Keys whose indexed attributes were assigned
+        since the indexes were last refreshed.
+        __dirty (set): Keys created or updated since the last save.
+        __fragments (dict): The JSON encoding of the objects not
+        changed since they were last loaded or saved, by key.
+        __deleted (set): Keys deleted since the last save.
+        __offsets (dict): In lazy mode, the objects of the snapshot not
+        materialized yet, as a dict of class names to dicts of keys to
+        the byte offset of their line in the snapshot.
+        __unloaded (dict): With shards, the shard files of each class
+        not read yet, by class name.
+        __shard_files (dict): With shards, the shard files of each
+        class present on disk, by class name.
+        __undo (dict): Within a batch, the state before the batch of
+        each key changed, created or deleted in it, by key.
+        __base (dict): In concurrent mode, the CRC-32 of the JSON each
+        key had on disk when it was last read or written, by key.
+        __generation (int): In concurrent mode, the generation of the
+        files `__base` matches, None before the first reload.
+        journal (bool): When True, `save()` appends the pending
+        changes to a log next to the snapshot instead of rewriting it.
+        journal_limit (int): Size in bytes past which the log is
+        folded back into the snapshot.
+        lazy (bool): When True, `reload()` only scans the snapshot for
+        the offset of each object, which is instantiated on first
+        access. Binary snapshots are always loaded at once.
+        durability (str): When the writes reach the disk: 'always'
+        fsyncs every save, 'batch' groups the saves made within
+        `group_commit_ms` into one fsync, and 'never' leaves it to the
+        operating system. The snapshot is replaced atomically in
+        every case.
+        group_commit_ms (int): The group commit window, in
+        milliseconds, of the 'batch' durability.
+        compact_models (bool): When True, the objects read from the
+        files are instances of the compact variant of their class.
+        format (str): The format the snapshot is written in, 'json' or
+        'binary', or None to pick it from the extension of the file
+        path: '.bin' for binary, JSON otherwise. Snapshots are read in
+        whichever format they were written in.
+        shards (bool): When True, the objects of each class are stored
+        in their own snapshot, next to the file path, such as
+        'objects.User.json', and a save only rewrites the shards
+        holding changed objects. In lazy mode the shards of a class
+        are read on its first access. A single snapshot left by a
+        previous run is split into shards by the next save.
+        partitions (dict): With shards, the number of files the
+        objects of a class are hashed into, by class name, for the
+        classes stored in more than one.
+        workers (int): The number of processes `reload()` decodes a
+        JSON snapshot, or shard, with, None for one per CPU. The
+        objects are still instantiated in the calling process.
+        parallel_threshold (int): The number of objects below which a
+        snapshot is decoded in the calling process.
+        concurrent (bool): When True, several processes may share the
+        files: `reload()`, `refresh()`, `save()` and `compact()` take
+        an advisory lock on a file next to the snapshot, which holds
+        a generation counter bumped by every write. When another
+        process wrote since, only the objects it changed are read
+        again, and a save merges them with the pending changes. The
+        snapshot must be eager JSON without shards.
+        conflicts (str): In concurrent mode, what a save does with the
+        objects changed both by this process and by another one:
+        'reject' raises a ConflictError, 'ours' writes the changes of
+        this process over the others, and 'theirs' drops them.
+        thread_safe (bool): When True, the storage may be used from
+        several threads: the methods reading the objects hold `lock`
+        shared, those changing them exclusive, `all()` returns a copy
+        of the objects, and a batch holds the lock exclusive until it
+        ends. A save copies the JSON of the objects under the shared
+        lock, and writes the snapshot once it is released, so that the
+        reads never wait for it.
+        lock (RWLock): The lock of the thread-safe mode, which may be
+        held shared across several reads to see the same objects.
+        write_behind (bool): When True, `save()` returns at once, and a
+        background thread makes the saves asked for, several at a time
+        when they come together. The storage is then thread-safe.
+        write_behind_ms (int): How long, in milliseconds, the background
+        thread waits after a save is asked for before making it, so
+        that the saves asked for meanwhile are made with it.
     """
     __file_path = 'objects.json'
     __objects = {}
+    __by_class = {}
+    __indexes = {}
+    __indexed_values = {}
+    __columns = {}
+    __geo = {}
+    __stale = set()
+    __dirty = set()
+    __deleted = set()
+    __fragments = {}
+    __offsets = {}
+    __unloaded = {}
+    __shard_files = {}
+    __undo = None
+    __batch_depth = 0
+    __batch_saved = False
+    __batch_sets = None
+    journal = False
+    journal_limit = 4 * 1024 * 1024
+    lazy = False
+    durability = 'never'
+    group_commit_ms = 100
+    compact_models = False
+    format = None
+    shards = False
+    partitions = {}
+    workers = 1
+    parallel_threshold = 50000
+    __commit_lock = threading.Lock()
+    __commit_timer = None
+    __pending_snapshots = {}
+    __unsynced_journal = False
+    concurrent = False
+    conflicts = 'reject'
+    __base = {}
+    __generation = None
+    __disk_generation = None
+    __lock_depth = 0
+    __written = False
+    thread_safe = False
+    lock = RWLock()
+    __save_lock = threading.RLock()
+    write_behind = False
+    write_behind_ms = 20
+    __flusher = None
+    __flush_condition = threading.Condition()
+    __requested = 0
+    __flushed = 0
+    __hurry = False
+    __flush_error = None
 
-    def all(self):
+    @_reading()
+    def all(self, cls=None):
         """
         Get objects information
-        Returns the content of the `__objects` class attribute.
+        Args:
+            cls (class or str): Optional class, or class name, to
+            restrict the result to.
+
+        Returns the content of the `__objects` class attribute, or a
+        dict of the instances of `cls` read from the class index. In
+        thread-safe mode the content is copied.
+        """
+        if cls is None:
+            self.__materialize()
+            if self.thread_safe or self.write_behind:
+                return dict(self.__objects)
+            return self.__objects
+        class_name = self.__class_name(cls)
+        self.__materialize(class_name)
+        return dict(self.__by_class.get(class_name, {}))
+
+    @_reading()
+    def get(self, cls, id):
+        """
+        Get an object
+        Args:
+            cls (class or str): The class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns the stored instance, or None if there is none.
+        """
+        key = self.__class_name(cls) + '.' + id
+        if key.partition('.')[0] in self.__unloaded:
+            self.__materialize(key.partition('.')[0])
+        offsets = self.__offsets.get(key.partition('.')[0])
+        if offsets and key in offsets:
+            self.__pending_sync()
+            with open(self.__file_path, mode='rb') as f:
+                self.__load_line(f, key, offsets.pop(key))
+        return self.__objects.get(key)
+
+    @_reading()
+    def count(self, cls=None):
+        """
+        Count objects
+        Args:
+            cls (class or str): Optional class, or class name, whose
+            instances are counted.
+
+        Returns the number of stored instances, of `cls` if given.
+        """
+        if cls is None:
+            if self.__unloaded:
+                self.__materialize()
+            return len(self.__objects) + sum(
+                len(offsets) for offsets in self.__offsets.values())
+        class_name = self.__class_name(cls)
+        if class_name in self.__unloaded:
+            self.__materialize(class_name)
+        return len(self.__by_class.get(class_name, {})) + \
+            len(self.__offsets.get(class_name, {}))
+
+    @_reading(indexes=True)
+    def find(self, cls, **equals):
+        """
+        Find objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            equals (dict): The attribute values to match.
+
+        Returns a dict of the instances of `cls` whose attributes equal
+        every given value. When one of the attributes is declared in
+        the class `__indexed__` the candidates come from its index,
+        otherwise all the instances of the class are scanned. A value
+        the index cannot hold, such as a list, matches nothing.
+        """
+        class_name = self.__class_name(cls)
+        self.__materialize(class_name)
+        self.__refresh()
+        candidates = None
+        for attr, value in equals.items():
+            index = self.__indexes.get((class_name, attr))
+            if index is not None:
+                try:
+                    candidates = index.get(value, {})
+                except TypeError:
+                    return {}
+                break
+        if candidates is None:
+            candidates = self.__by_class.get(class_name, {})
+        return {key: obj for key, obj in candidates.items()
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in equals.items())}
+
+    @_reading(indexes=True)
+    def select(self, cls, **predicates):
+        """
+        Select objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            predicates (dict): Conditions on attributes listed in the
+            class `__columns__`: a number to match exactly, or a
+            (low, high) pair of inclusive bounds, None for no bound.
+
+        Returns the ids of the instances of `cls` matching every
+        condition, evaluated over the columns of the class.
+        """
+        class_name = self.__class_name(cls)
+        self.__materialize(class_name)
+        self.__refresh()
+        store = self.__columns.get(class_name)
+        if store is None:
+            return []
+        return [key.partition('.')[2] for key in store.select(**predicates)]
+
+    @_reading(indexes=True)
+    def query(self, cls, conditions=(), order_by=None, limit=None):
+        """
+        Query objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            conditions (iterable): (attribute, operator, value) triples
+            the instances must all meet, the operators being those of
+            `query.OPERATORS`.
+            order_by (str): The attribute to order the instances by,
+            prefixed with '-' for the descending order.
+            limit (int): The maximum number of instances returned.
+
+        Returns the list of the matching instances of `cls`. The
+        candidates come from the index of an attribute compared with
+        '==', from the columns of the numeric comparisons, or from a
+        scan of the class, as `explain()` tells; the first instances in
+        order are then picked with a heap when there is a limit.
+        """
+        conditions = query.validate(conditions)
+        plan, candidates = self.__plan(self.__class_name(cls), conditions)
+        objects = (obj for obj in candidates
+                   if query.matches(obj, conditions))
+        return query.top(objects, order_by, limit)
+
+    @_reading(indexes=True)
+    def explain(self, cls, conditions=()):
+        """
+        Explain a Query
+        Args:
+            cls (class or str): The class, or class name, to search.
+            conditions (iterable): The conditions of the query.
+
+        Returns how `query()` finds the candidates of the conditions:
+        'index <attribute>', 'columns <attributes>' or 'scan'.
+        """
+        conditions = query.validate(conditions)
+        return self.__plan(self.__class_name(cls), conditions)[0]
+
+    @_reading(indexes=True)
+    def near(self, cls, latitude, longitude, radius_km):
+        """
+        Near objects
+        Args:
+            cls (class or str): The class, or class name, to search.
+            latitude (float): The latitude of the center, in degrees.
+            longitude (float): The longitude of the center, in degrees.
+            radius_km (float): The radius, in kilometers.
+
+        Returns the instances of `cls` located within the radius,
+        closest first, looked up in the grid index of the class.
+        """
+        grid = self.__grid(cls)
+        if grid is None:
+            return []
+        return [self.__objects[key]
+                for distance, key in grid.near(latitude, longitude,
+                                               radius_km)]
+
+    @_reading(indexes=True)
+    def within(self, cls, south, west, north, east):
+        """
+        Objects within a box
+        Args:
+            cls (class or str): The class, or class name, to search.
+            south (float): The lowest latitude.
+            west (float): The western longitude.
+            north (float): The highest latitude.
+            east (float): The eastern longitude.
+
+        Returns the instances of `cls` located within the box, looked
+        up in the grid index of the class.
         """
-        return self.__objects
+        grid = self.__grid(cls)
+        if grid is None:
+            return []
+        return [self.__objects[key]
+                for key in grid.within(south, west, north, east)]
+
+    def assign(self, obj, name, value):
+        """
+        Assign an Attribute
+        Args:
+            obj (inst): The object the attribute is assigned on.
+            name (str): The name of the attribute.
+            value: The value assigned.
+
+        Touches `obj`, then assigns the attribute. In thread-safe mode
+        both happen under the exclusive lock, so that a save never sees
+        the object marked as changed without the change.
+        """
+        if self.thread_safe or self.write_behind:
+            with self.lock.write():
+                self.touch(obj, name)
+                object.__setattr__(obj, name, value)
+            return
+        self.touch(obj, name)
+        object.__setattr__(obj, name, value)
+
+    def unassign(self, obj, name):
+        """
+        Unassign an Attribute
+        Args:
+            obj (inst): The object the attribute is deleted from.
+            name (str): The name of the attribute.
 
+        Touches `obj`, then deletes the attribute, under the exclusive
+        lock in thread-safe mode as `assign()` does.
+        """
+        if self.thread_safe or self.write_behind:
+            with self.lock.write():
+                self.touch(obj, name)
+                object.__delattr__(obj, name)
+            return
+        self.touch(obj, name)
+        object.__delattr__(obj, name)
+
+    @_writing
+    def touch(self, obj, name):
+        """
+        Touch an Object
+        Args:
+            obj (inst): The object one attribute is about to be
+            assigned on, or deleted from.
+            name (str): The name of the attribute.
+
+        Marks a stored object as changed, so that its cached JSON is
+        dropped and it is written by the next save, and schedules the
+        refresh of its indexes when an indexed attribute, or one kept
+        in the columns, is assigned.
+        """
+        key = obj.__class__.__name__ + '.' + str(getattr(obj, 'id', ''))
+        if self.__objects.get(key) is not obj:
+            return
+        if self.__undo is not None and key not in self.__undo:
+            self.__remember(key)
+        self.__dirty.add(key)
+        self.__fragments.pop(key, None)
+        if name in obj.__indexed__ or name in obj.__columns__ or \
+                name in obj.__geo__:
+            self.__stale.add(key)
+
+    def clear(self):
+        """
+        Clear objects
+        Drops every instance held in memory, without recording any
+        deletion: the files are left untouched. In write-behind mode
+        the saves asked for are made first.
+        """
+        if self.write_behind:
+            self.flush()
+        self.__clear()
+
+    @_writing
+    def __clear(self):
+        """
+        Clear the Objects
+        Drops every instance, index and pending change.
+        """
+        self.__objects.clear()
+        self.__by_class.clear()
+        self.__indexes.clear()
+        self.__indexed_values.clear()
+        self.__columns.clear()
+        self.__geo.clear()
+        self.__stale.clear()
+        self.__dirty.clear()
+        self.__deleted.clear()
+        self.__fragments.clear()
+        self.__offsets.clear()
+        self.__unloaded.clear()
+        self.__shard_files.clear()
+        self.__base.clear()
+        FileStorage.__generation = None
+
+    @_writing
     def new(self, obj):
         """
         Save a New Object
@@ -43,10 +552,33 @@ class FileStorage:
             class attribute.
 
         Sets in the `__objects` class attribute the instance data
-        with a key as <obj class name>.id.
+        with a key as <obj class name>.id, and marks it as changed.
         """
         key = obj.__class__.__name__ + '.' + obj.id
-        self.__objects[key] = obj
+        if self.__undo is not None and key not in self.__undo:
+            self.__remember(key)
+        self.__forget_offset(key)
+        self.__put(key, obj)
+        self.__dirty.add(key)
+        self.__deleted.discard(key)
+
+    @_writing
+    def delete(self, obj=None):
+        """
+        Delete an Object
+        Args:
+            obj (inst): The object to remove from the `__objects`
+            class attribute. Nothing is done if it is None.
+        """
+        if obj is None:
+            return
+        key = obj.__class__.__name__ + '.' + obj.id
+        if self.__undo is not None and key not in self.__undo:
+            self.__remember(key)
+        self.__forget_offset(key)
+        self.__drop(key)
+        self.__dirty.discard(key)
+        self.__deleted.add(key)
 
     def save(self):
         """
@@ -55,22 +587,1262 @@ class FileStorage:
         to the path specified in the `__file_path` class attribute
         in JSON format, with the `created_at` and
         `updated_at` formatted.
+        In journal mode only the objects changed since the last save
+        are appended to the journal, which is compacted once it grows
+        past `journal_limit` bytes.
+        Within a batch nothing is written until the batch ends.
+        In concurrent mode the changes of the other processes are
+        read first, and merged with the pending ones.
+        In thread-safe mode a JSON snapshot is written from a copy of
+        the objects, so that the other threads go on meanwhile.
+        In write-behind mode the save is only asked for, and made by a
+        background thread, as `flush()` tells.
+        """
+        if self.write_behind:
+            with self.lock.read():
+                if self.__batch_depth:
+                    FileStorage.__batch_saved = True
+                    return
+            self.__request_flush()
+            return
+        if self.thread_safe:
+            self.__save_copy()
+            return
+        if self.__batch_depth:
+            FileStorage.__batch_saved = True
+            return
+        self.__persist()
+
+    def __persist(self):
+        """
+        Persist the Changes
+        Saves the pending changes, under the lock of the files in
+        concurrent mode.
+        """
+        if self.concurrent:
+            with self.__locked():
+                self.__catch_up(strict=True)
+                self.__save()
+            return
+        self.__save()
+
+    def __request_flush(self):
+        """
+        Request a Flush
+        Asks the background thread for a save, starting it if needed.
+        """
+        with self.__flush_condition:
+            FileStorage.__requested += 1
+            self.__start_flusher()
+            self.__flush_condition.notify_all()
+
+    def __start_flusher(self):
+        """
+        Start the Flusher
+        Starts the background thread, unless it runs. The saves asked
+        for are flushed at exit. Must be called with
+        `__flush_condition` held.
+        """
+        if self.__flusher is not None and self.__flusher.is_alive():
+            return
+        if self.__flusher is None:
+            atexit.register(self.flush)
+        FileStorage.__flusher = threading.Thread(
+            target=self.__flush_loop, name='FileStorage flusher',
+            daemon=True)
+        FileStorage.__flusher.start()
+
+    def __flush_loop(self):
+        """
+        Flush Loop
+        Body of the background thread: waits for a save to be asked
+        for, and `write_behind_ms` more unless a flush hurries it, then
+        makes one save for every save asked for until then. An error
+        is kept for `flush()` to raise.
+        """
+        condition = self.__flush_condition
+        while True:
+            with condition:
+                while self.__flushed == self.__requested:
+                    condition.wait()
+                condition.wait_for(lambda: self.__hurry,
+                                   self.write_behind_ms / 1000)
+                FileStorage.__hurry = False
+                target = self.__requested
+            error = None
+            try:
+                self.__save_copy()
+            except BaseException as failure:
+                error = failure
+            with condition:
+                if error is not None:
+                    FileStorage.__flush_error = error
+                FileStorage.__flushed = target
+                condition.notify_all()
+
+    def __save_copy(self):
+        """
+        Save a Copy
+        Takes the JSON of every object, encoding the changed ones,
+        under the shared lock, which lets the other threads read but
+        not change the objects meanwhile, then builds and writes the
+        snapshot from it once the lock is released. Saves are written
+        one at a time, in the order they copied the objects. The other
+        layouts, and the concurrent mode, are saved under the
+        exclusive lock instead.
         """
-        json_dict = {}
-        for k, v in self.__objects.items():
-            json_dict[k] = v.to_dict()
-        with open(self.__file_path, mode='w', encoding='utf-8') as f:
-            f.write(json.dumps(json_dict))
+        with self.lock.read():
+            if self.__batch_depth:
+                FileStorage.__batch_saved = True
+                return
+            copy = not self.journal and not self.shards and \
+                not self.concurrent and not any(self.__offsets.values()) \
+                and not path.exists(self.__journal_path()) and \
+                serializer_for(self.__file_path, self.format).name == 'json'
+            if copy:
+                self.__save_lock.acquire()
+                try:
+                    records = [(key, self.__fragment(key, obj))
+                               for key, obj in self.__objects.items()]
+                except BaseException:
+                    self.__save_lock.release()
+                    raise
+                dirty, deleted = set(self.__dirty), set(self.__deleted)
+                self.__dirty.clear()
+                self.__deleted.clear()
+        if not copy:
+            with self.lock.write(), self.__save_lock:
+                self.__persist()
+            return
+        try:
+            lines = [json.dumps(key) + ': ' + fragment
+                     for key, fragment in records]
+            if lines:
+                data = ('{\n' + ',\n'.join(lines) + '\n}\n').encode('utf-8')
+            else:
+                data = b'{}\n'
+            self.__write_snapshot(data)
+        except BaseException:
+            self.__save_lock.release()
+            with self.lock.write():
+                self.__dirty.update(key for key in dirty
+                                    if key in self.__objects)
+                self.__deleted.update(key for key in deleted
+                                      if key not in self.__objects)
+            raise
+        self.__save_lock.release()
+
+    def __save(self):
+        """
+        Save the Changes
+        Writes the pending changes, to the journal or the snapshot.
+        """
+        if not self.journal:
+            self.compact()
+            return
+        self.__append_journal()
+        journal_path = self.__journal_path()
+        if path.exists(journal_path) and \
+                path.getsize(journal_path) >= self.journal_limit:
+            self.compact()
+
+    @contextmanager
+    def batch(self):
+        """
+        Batch of Changes
+        Context manager within which `save()`, and so the `save()` of
+        the models and of the console commands, only records that a
+        save is due, as `__batch()` tells. In thread-safe mode the
+        batch holds the exclusive lock: the other threads wait for it
+        to end.
+        """
+        with self.lock.write() if self.thread_safe or self.write_behind \
+                else nullcontext():
+            with self.__batch():
+                yield self
+
+    @contextmanager
+    def __batch(self):
+        """
+        Batch of Changes
+        Context manager within which `save()`, and so the `save()` of
+        the models and of the console commands, only records that a
+        save is due: a single save happens when the batch ends, if one
+        was asked for. If the batch ends with an exception, every
+        object created, changed or deleted in it is put back in its
+        state before the batch instead, and nothing is written.
+        A batch opened within another one is part of it.
+        """
+        if self.__batch_depth:
+            FileStorage.__batch_depth += 1
+            try:
+                yield self
+            finally:
+                FileStorage.__batch_depth -= 1
+            return
+        FileStorage.__undo = {}
+        FileStorage.__batch_saved = False
+        FileStorage.__batch_sets = (set(self.__dirty), set(self.__deleted))
+        FileStorage.__batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self.__rollback()
+            raise
+        finally:
+            FileStorage.__batch_depth = 0
+            FileStorage.__undo = None
+            FileStorage.__batch_sets = None
+        if self.__batch_saved:
+            FileStorage.__batch_saved = False
+            self.save()
+
+    @_writing
+    def import_file(self, file_path, cls=None, format=None):
+        """
+        Import a File
+        Args:
+            file_path (str): The JSON Lines or CSV file to read.
+            cls (class or str): The class, or class name, of the rows
+            that do not name theirs.
+            format (str): 'jsonl' or 'csv', or None to pick it from the
+            extension of the file.
+
+        Adds an object per row, validated against its class, and saves
+        once. Returns the number of objects imported.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        return transfer.import_file(self, file_path, cls, format)
+
+    def export_file(self, file_path, cls=None, format=None):
+        """
+        Export a File
+        Args:
+            file_path (str): The JSON Lines or CSV file to write.
+            cls (class or str): The class, or class name, of the
+            objects to export, required in CSV.
+            format (str): 'jsonl' or 'csv', or None to pick it from the
+            extension of the file.
+
+        Returns the number of objects exported.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        return transfer.export_file(self, file_path, cls, format)
+
+    @_writing
+    def compact(self):
+        """
+        Compact the Journal
+        Writes every object to the snapshot file and removes the
+        journal, whose records are now part of the snapshot.
+        In JSON, only the objects changed since they were last loaded
+        or saved are encoded again: the cached JSON of the others is
+        reused, and the objects a lazy reload has not instantiated yet
+        are copied from the current snapshot.
+        With shards, only the shards holding objects changed since the
+        last save, or since the journal was started, are written.
+        In concurrent mode the changes of the other processes are
+        merged first.
+        """
+        with self.__save_lock:
+            if self.concurrent:
+                with self.__locked():
+                    self.__catch_up(strict=True)
+                    self.__compact()
+                return
+            self.__compact()
+
+    def __compact(self):
+        """
+        Compact the Snapshot
+        Writes the snapshot, or the shards, and folds the journal.
+        """
+        journal_path = self.__journal_path()
+        folding = path.exists(journal_path)
+        if folding:
+            self.__append_journal()
+        serializer = serializer_for(self.__file_path, self.format)
+        if self.shards:
+            self.__write_shards(serializer, folding)
+        else:
+            if serializer.name == 'json':
+                data = self.__json_snapshot()
+            else:
+                self.__materialize()
+                data = serializer.dumps({
+                    key: dict(obj._attributes(),
+                              __class__=key.partition('.')[0])
+                    for key, obj in self.__objects.items()})
+                FileStorage.__offsets = {}
+            self.__write_snapshot(data, durable=folding)
+        self.__acknowledge()
+        self.__dirty.clear()
+        self.__deleted.clear()
+        if folding:
+            os.remove(journal_path)
+
+    def sync(self):
+        """
+        Sync to Disk
+        Commits the writes the 'batch' durability is holding back:
+        the pending snapshots are fsynced and moved in place, and the
+        journal is fsynced.
+        """
+        with self.__commit_lock:
+            if FileStorage.__commit_timer is not None:
+                FileStorage.__commit_timer.cancel()
+                FileStorage.__commit_timer = None
+            if FileStorage.__pending_snapshots:
+                for target, tmp_path in self.__pending_snapshots.items():
+                    with open(tmp_path, mode='rb') as f:
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, target)
+                FileStorage.__pending_snapshots = {}
+                self.__sync_directory()
+            if FileStorage.__unsynced_journal:
+                FileStorage.__unsynced_journal = False
+                if path.exists(self.__journal_path()):
+                    with open(self.__journal_path(), mode='rb') as f:
+                        os.fsync(f.fileno())
+
+    def flush(self):
+        """
+        Flush the Saves
+        Waits until the saves asked for before the call, in
+        write-behind mode, are made, then commits the writes the
+        'batch' durability is holding back. Raises the error the
+        background thread last ran into, if any. Within a batch, which
+        holds the lock the saves need, nothing is waited for.
+        """
+        if not self.lock.owned():
+            with self.__flush_condition:
+                target = self.__requested
+                if self.__flushed < target:
+                    self.__start_flusher()
+                    FileStorage.__hurry = True
+                    self.__flush_condition.notify_all()
+                while self.__flushed < target:
+                    self.__flush_condition.wait()
+                error = self.__flush_error
+                FileStorage.__flush_error = None
+            if error is not None:
+                raise error
+        self.sync()
 
     def reload(self):
         """
-        Deserialize JSON File
+        Deserialize the Snapshot
         If the file specified in the `__file_path` class attribute exists,
         each object in the file will be deserialized and appended to the
         `__objects` class attribute as an instance with the object data.
+        The records of the journal, if any, are then replayed on top.
+        In lazy mode the objects are only located in the file, and
+        instantiated when first accessed.
+        With shards, the shards of every class are read too, or in
+        lazy mode listed to be read on the first access to the class.
+        In concurrent mode the files are read under the lock.
+        In write-behind mode the saves asked for are made first.
+        """
+        if self.write_behind:
+            self.flush()
+        self.__reload()
+
+    @_writing
+    def __reload(self):
         """
+        Reload the Files
+        Reads the snapshot, the shards and the journal.
+        """
+        if self.concurrent:
+            with self.__locked(exclusive=False):
+                self.__dirty.clear()
+                self.__deleted.clear()
+                self.__base.clear()
+                FileStorage.__generation = None
+                self.__catch_up(strict=True)
+            return
+        self.sync()
+        self.__dirty.clear()
+        self.__deleted.clear()
+        if self.shards:
+            self.__find_shards()
         if path.exists(self.__file_path):
-            with open(self.__file_path, mode='r', encoding='utf-8') as f:
-                json_dict = json.loads(f.read())
-                for k, v in json_dict.items():
-                    self.__objects[k] = eval(v['__class__'])(**v)
+            if not self.__scan():
+                with open(self.__file_path, mode='rb') as f:
+                    data = f.read()
+                for k, v in detect(data).loads(data).items():
+                    self.__put(k, self.__build(v))
+        if path.exists(self.__journal_path()):
+            self.__replay_journal()
+
+    @_writing
+    def refresh(self):
+        """
+        Refresh the Objects
+        In concurrent mode, reads again the objects another process
+        created, changed or deleted since they were last read, unless
+        they have changes pending here, which the next save resolves.
+        Does nothing otherwise.
+        """
+        if self.concurrent:
+            with self.__locked(exclusive=False):
+                self.__catch_up(strict=False)
+
+    @_writing
+    def resolve(self, keys):
+        """
+        Resolve Conflicts
+        Args:
+            keys (list): The keys of the conflicting objects, as a
+            rejected save reports them.
+
+        In concurrent mode, drops the changes pending on `keys` and
+        reads again the objects as the other process wrote them, as
+        the 'theirs' conflicts policy does, so that the next save is
+        not rejected again. Does nothing otherwise.
+        """
+        if self.concurrent:
+            with self.__locked(exclusive=False):
+                theirs = self.__disk_fragments()
+                for key in keys:
+                    self.__take_theirs(key, theirs.get(key))
+
+    def _ready(self, cls=None, indexes=False):
+        """
+        Ready to Read
+        Args:
+            cls (class or str): The class, or class name, whose objects
+            are read, or None for every class.
+            indexes (bool): Whether the indexes are read.
+
+        Returns True when reading changes nothing in the storage: the
+        objects are instantiated and, if read, the indexes up to date.
+        """
+        if indexes and self.__stale:
+            return False
+        if cls is None:
+            return not self.__unloaded and not any(self.__offsets.values())
+        class_name = self.__class_name(cls)
+        return class_name not in self.__unloaded and \
+            not self.__offsets.get(class_name)
+
+    @staticmethod
+    def __class_name(cls):
+        """
+        Class Name
+        Returns the name of `cls`, which may already be a name.
+        """
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __build(self, value):
+        """
+        Build an Object
+        Returns the instance described by the dict `value`, whose
+        class is looked up in the model registry.
+        """
+        cls = classes[value['__class__']]
+        if self.compact_models:
+            cls = cls.compact_class()
+        return cls(**value)
+
+    def __scan(self):
+        """
+        Scan the Snapshot
+        Reads a snapshot written one object per line. Each object is
+        instantiated with its JSON kept as its cached encoding or, in
+        lazy mode, only the offset of its line is recorded.
+        Returns False if the snapshot is not in that layout.
+        """
+        with open(self.__file_path, mode='rb') as f:
+            if f.readline() != b'{\n':
+                return False
+            offset = f.tell()
+            fragments = []
+            for line in f:
+                if line.startswith(b'"'):
+                    key, fragment = self.__split_line(line)
+                    if self.lazy:
+                        self.__drop(key)
+                        class_name = key.partition('.')[0]
+                        self.__offsets.setdefault(class_name, {})[key] = \
+                            offset
+                    else:
+                        fragments.append((key, fragment))
+                offset += len(line)
+        self.__load_fragments(fragments)
+        return True
+
+    def __materialize(self, class_name=None):
+        """
+        Materialize Objects
+        Instantiates the objects of the snapshot not accessed yet, all
+        of them or only those of `class_name`, and reads the shards of
+        the class, or of every class, not read yet.
+        """
+        if class_name is None:
+            for name in list(self.__unloaded):
+                self.__read_shards(name)
+        elif class_name in self.__unloaded:
+            self.__read_shards(class_name)
+        if class_name is None:
+            names = [name for name in self.__offsets if self.__offsets[name]]
+        elif self.__offsets.get(class_name):
+            names = [class_name]
+        else:
+            names = []
+        if not names:
+            return
+        self.__pending_sync()
+        with open(self.__file_path, mode='rb') as f:
+            for name in names:
+                offsets = self.__offsets.pop(name)
+                for key, offset in sorted(offsets.items(),
+                                          key=lambda item: item[1]):
+                    self.__load_line(f, key, offset)
+
+    def __load_line(self, f, key, offset):
+        """
+        Load a Line
+        Instantiates the object stored under `key` on the line found
+        at `offset` in the opened snapshot `f`.
+        """
+        f.seek(offset)
+        self.__load_fragment(key, self.__split_line(f.readline())[1])
+
+    def __load_fragment(self, key, fragment):
+        """
+        Load a Fragment
+        Instantiates the object stored under `key` from its JSON
+        `fragment`, which is kept as the cached encoding of the object.
+        """
+        self.__put(key, self.__build(json.loads(fragment)))
+        self.__fragments[key] = fragment.decode('utf-8')
+
+    def __remember(self, key):
+        """
+        Remember a Key
+        Records in the undo log of the batch the state of `key` before
+        its first change in the batch: its instance and a copy of its
+        attributes, and its snapshot offset if it was not loaded.
+        """
+        obj = self.__objects.get(key)
+        offsets = self.__offsets.get(key.partition('.')[0])
+        self.__undo[key] = (
+            obj, None if obj is None else dict(obj._attributes()),
+            offsets.get(key) if offsets else None)
+
+    def __rollback(self):
+        """
+        Roll Back the Batch
+        Puts every key of the undo log back in its state before the
+        batch, as well as the changes pending before it.
+        """
+        for key, (obj, attributes, offset) in self.__undo.items():
+            self.__forget_offset(key)
+            self.__drop(key)
+            if obj is not None:
+                for name in list(obj._attributes()):
+                    if name not in attributes:
+                        object.__delattr__(obj, name)
+                for name, value in attributes.items():
+                    object.__setattr__(obj, name, value)
+                models.render_cache.discard(obj)
+                self.__put(key, obj)
+            if offset is not None:
+                self.__offsets.setdefault(key.partition('.')[0], {})[key] = \
+                    offset
+        self.__stale.difference_update(self.__undo)
+        dirty, deleted = self.__batch_sets
+        FileStorage.__dirty = dirty
+        FileStorage.__deleted = deleted
+
+    def __load_fragments(self, fragments):
+        """
+        Load Fragments
+        Instantiates the objects of the (key, JSON fragment) pairs
+        `fragments`. When there are enough of them, and `workers`
+        allows it, the fragments are decoded and their timestamps
+        parsed by a pool of processes, in chunks, and the objects
+        built from the results in order. The workers are forked where
+        the platform allows it, so that they do not import `models`,
+        and reload the storage, again; in a worker the fragments are
+        always decoded in the process.
+        """
+        workers = self.workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(fragments) < self.parallel_threshold or \
+                multiprocessing.parent_process() is not None:
+            for key, fragment in fragments:
+                self.__load_fragment(key, fragment)
+            return
+        size = -(-len(fragments) // (workers * 4))
+        chunks = [[fragment for key, fragment in fragments[i:i + size]]
+                  for i in range(0, len(fragments), size)]
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = None
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            values = (value for chunk in pool.map(_decode_fragments, chunks)
+                      for value in chunk)
+            for (key, fragment), value in zip(fragments, values):
+                self.__put(key, self.__build(value))
+                self.__fragments[key] = fragment.decode('utf-8')
+
+    def __fragment(self, key, obj):
+        """
+        Get a Fragment
+        Returns the JSON encoding of `obj`, from the cache unless the
+        object changed since it was last encoded.
+        """
+        fragment = self.__fragments.get(key)
+        if fragment is None:
+            fragment = json.dumps(obj.to_dict())
+            self.__fragments[key] = fragment
+        return fragment
+
+    def __json_snapshot(self):
+        """
+        JSON Snapshot
+        Returns the JSON snapshot of every object, as bytes, and
+        records the offsets the objects not instantiated yet will have
+        in it.
+        """
+        lines = []
+        offsets = {}
+        position = 2
+        for key, obj in self.__objects.items():
+            lines.append(json.dumps(key) + ': ' + self.__fragment(key, obj))
+            position += self.__length(lines[-1]) + 2
+        if any(self.__offsets.values()):
+            self.__pending_sync()
+            with open(self.__file_path, mode='rb') as f:
+                for class_name, class_offsets in self.__offsets.items():
+                    moved = offsets[class_name] = {}
+                    for key, offset in sorted(class_offsets.items(),
+                                              key=lambda item: item[1]):
+                        f.seek(offset)
+                        line = f.readline().rstrip(b',\r\n').decode('utf-8')
+                        lines.append(line)
+                        moved[key] = position
+                        position += self.__length(line) + 2
+        FileStorage.__offsets = offsets
+        if lines:
+            return ('{\n' + ',\n'.join(lines) + '\n}\n').encode('utf-8')
+        return b'{}\n'
+
+    @staticmethod
+    def __split_line(line):
+        """
+        Split a Line
+        Returns the key, JSON decoded, and the JSON fragment, as bytes,
+        of a `line` of a snapshot written one object per line.
+        """
+        match = _KEY.match(line)
+        if match is None:
+            raise ValueError('malformed snapshot line')
+        return (json.loads(line[:match.end() - 2]),
+                line[match.end():].rstrip(b',\r\n'))
+
+    @staticmethod
+    def __length(line):
+        """
+        Line Length
+        Returns the length in bytes of `line` once encoded.
+        """
+        return len(line) if line.isascii() else len(line.encode('utf-8'))
+
+    def __forget_offset(self, key):
+        """
+        Forget an Offset
+        Drops the snapshot offset of `key`, whose object is replaced.
+        """
+        offsets = self.__offsets.get(key.partition('.')[0])
+        if offsets:
+            offsets.pop(key, None)
+
+    def __put(self, key, obj):
+        """
+        Store an Object
+        Adds `obj` under `key` to `__objects` and to the class index.
+        """
+        self.__unindex(key)
+        self.__fragments.pop(key, None)
+        self.__objects[key] = obj
+        class_name = key.partition('.')[0]
+        self.__by_class.setdefault(class_name, {})[key] = obj
+        self.__index(key, obj)
+
+    def __drop(self, key):
+        """
+        Remove an Object
+        Removes `key` from `__objects` and from the class index.
+        """
+        self.__objects.pop(key, None)
+        self.__fragments.pop(key, None)
+        instances = self.__by_class.get(key.partition('.')[0])
+        if instances is not None:
+            instances.pop(key, None)
+        self.__unindex(key)
+
+    def __index(self, key, obj):
+        """
+        Index an Object
+        Adds `obj` to the index of each of its `__indexed__` attributes,
+        its `__columns__` attributes to the columns of its class, and
+        its `__geo__` coordinates to the grid index of its class.
+        """
+        class_name = key.partition('.')[0]
+        if obj.__columns__:
+            store = self.__columns.get(class_name)
+            if store is None:
+                store = ColumnStore(obj.__columns__)
+                self.__columns[class_name] = store
+            store.set(key, obj)
+        if obj.__geo__:
+            grid = self.__geo.get(class_name)
+            if grid is None:
+                grid = self.__geo[class_name] = GridIndex()
+            latitude, longitude = obj.__geo__
+            grid.set(key, getattr(obj, latitude, None),
+                     getattr(obj, longitude, None))
+        if not obj.__indexed__:
+            return
+        values = {}
+        for attr in obj.__indexed__:
+            value = getattr(obj, attr, None)
+            index = self.__indexes.setdefault((class_name, attr), {})
+            index.setdefault(value, {})[key] = obj
+            values[attr] = value
+        self.__indexed_values[key] = values
+
+    def __unindex(self, key):
+        """
+        Unindex an Object
+        Removes `key` from the attribute indexes it is listed in, from
+        the columns and from the grid index.
+        """
+        class_name = key.partition('.')[0]
+        store = self.__columns.get(class_name)
+        if store is not None:
+            store.remove(key)
+        grid = self.__geo.get(class_name)
+        if grid is not None:
+            grid.remove(key)
+        values = self.__indexed_values.pop(key, None)
+        if values is None:
+            return
+        for attr, value in values.items():
+            index = self.__indexes[(class_name, attr)]
+            index[value].pop(key, None)
+            if not index[value]:
+                del index[value]
+
+    def __plan(self, class_name, conditions):
+        """
+        Plan a Query
+        Returns the plan of the conditions on `class_name` and the
+        candidate instances it yields, which still have to be matched
+        against every condition.
+        """
+        self.__materialize(class_name)
+        self.__refresh()
+        for attr, op, value in conditions:
+            index = self.__indexes.get((class_name, attr))
+            if op == '==' and index is not None:
+                try:
+                    return 'index ' + attr, index.get(value, {}).values()
+                except TypeError:
+                    return 'index ' + attr, ()
+        store = self.__columns.get(class_name)
+        bounds = {}
+        for attr, op, value in conditions:
+            if store is None or attr not in store.fields or \
+                    op == '!=' or isinstance(value, bool) or \
+                    not isinstance(value, (int, float)):
+                continue
+            low, high = bounds.get(attr, (None, None))
+            if op in ('==', '>', '>=') and (low is None or value > low):
+                low = value
+            if op in ('==', '<', '<=') and (high is None or value < high):
+                high = value
+            bounds[attr] = (low, high)
+        instances = self.__by_class.get(class_name, {})
+        if bounds:
+            return 'columns ' + ', '.join(bounds), [
+                instances[key] for key in store.select(**bounds)]
+        return 'scan', instances.values()
+
+    def __grid(self, cls):
+        """
+        Grid of a Class
+        Returns the up to date grid index of `cls`, if it has one.
+        """
+        class_name = self.__class_name(cls)
+        self.__materialize(class_name)
+        self.__refresh()
+        return self.__geo.get(class_name)
+
+    def __refresh(self):
+        """
+        Refresh the Indexes
+        Re-indexes the objects whose indexed attributes changed.
+        """
+        while self.__stale:
+            key = self.__stale.pop()
+            self.__unindex(key)
+            obj = self.__objects.get(key)
+            if obj is not None:
+                self.__index(key, obj)
+
+    def __shard_paths(self, class_name):
+        """
+        Shard Paths
+        Returns the paths of the shards of `class_name`, one per
+        partition.
+        """
+        root, extension = path.splitext(self.__file_path)
+        count = self.partitions.get(class_name, 1)
+        if count <= 1:
+            return [root + '.' + class_name + extension]
+        return ['{}.{}.{}{}'.format(root, class_name, number, extension)
+                for number in range(count)]
+
+    @staticmethod
+    def __shard_of(key, paths):
+        """
+        Shard of a Key
+        Returns the path, among the shard `paths` of its class, of the
+        shard `key` is stored in.
+        """
+        if len(paths) == 1:
+            return paths[0]
+        id = key.partition('.')[2]
+        return paths[zlib.crc32(id.encode('utf-8')) % len(paths)]
+
+    def __find_shards(self):
+        """
+        Find the Shards
+        Lists the shard files of the registered classes present next to
+        the file path, and reads them unless in lazy mode. They are
+        left unread while a single snapshot, which is more recent,
+        remains to be split.
+        """
+        root, extension = path.splitext(self.__file_path)
+        directory = path.dirname(path.abspath(self.__file_path))
+        prefix = path.basename(root) + '.'
+        pattern = re.compile(r'(\w+?)(?:\.\d+)?' + re.escape(extension) + '$')
+        for name in sorted(os.listdir(directory)):
+            match = pattern.match(name[len(prefix):])
+            if not name.startswith(prefix) or not match or \
+                    match.group(1) not in classes:
+                continue
+            shard = path.join(path.dirname(self.__file_path), name)
+            self.__shard_files.setdefault(match.group(1), set()).add(shard)
+            if not path.exists(self.__file_path):
+                self.__unloaded.setdefault(match.group(1), []).append(shard)
+        if not self.lazy:
+            for class_name in list(self.__unloaded):
+                self.__read_shards(class_name)
+
+    def __read_shards(self, class_name):
+        """
+        Read the Shards
+        Instantiates the objects stored in the shards of `class_name`
+        not read yet, except those changed or deleted since.
+        """
+        self.__pending_sync()
+        for shard in self.__unloaded.pop(class_name, []):
+            with open(shard, mode='rb') as f:
+                data = f.read()
+            if data.startswith(b'{\n'):
+                fragments = []
+                for line in data.splitlines():
+                    if line.startswith(b'"'):
+                        key, fragment = self.__split_line(line)
+                        if key not in self.__dirty and \
+                                key not in self.__deleted:
+                            fragments.append((key, fragment))
+                self.__load_fragments(fragments)
+            else:
+                for key, value in detect(data).loads(data).items():
+                    if key not in self.__dirty and \
+                            key not in self.__deleted:
+                        self.__put(key, self.__build(value))
+
+    def __write_shards(self, serializer, folding):
+        """
+        Write the Shards
+        Writes the shards holding the objects changed since the last
+        save, every shard of the loaded classes when the journal is
+        folded, and every shard when the single snapshot is split.
+        Shards left by a previous partitioning are removed.
+        """
+        splitting = path.exists(self.__file_path)
+        if splitting:
+            self.__materialize()
+            names = set(self.__by_class) | set(self.__shard_files)
+        else:
+            names = {key.partition('.')[0]
+                     for key in self.__dirty | self.__deleted}
+            if folding:
+                names.update(name for name in self.__by_class
+                             if name not in self.__unloaded)
+        for class_name in sorted(names):
+            self.__materialize(class_name)
+            paths = self.__shard_paths(class_name)
+            stale = self.__shard_files.get(class_name, set()) - set(paths)
+            if splitting or folding or stale:
+                changed = set(paths)
+            else:
+                changed = {self.__shard_of(key, paths)
+                           for key in self.__dirty | self.__deleted
+                           if key.partition('.')[0] == class_name}
+            contents = {shard: {} for shard in changed}
+            instances = self.__by_class.get(class_name, {})
+            if len(paths) == 1:
+                contents[paths[0]] = instances
+            else:
+                for key, obj in instances.items():
+                    records = contents.get(self.__shard_of(key, paths))
+                    if records is not None:
+                        records[key] = obj
+            for shard, records in contents.items():
+                if serializer.name == 'json':
+                    lines = [json.dumps(key) + ': ' + self.__fragment(key, obj)
+                             for key, obj in records.items()]
+                    data = ('{\n' + ',\n'.join(lines) + '\n}\n'
+                            if lines else '{}\n').encode('utf-8')
+                else:
+                    data = serializer.dumps({
+                        key: dict(obj._attributes(), __class__=class_name)
+                        for key, obj in records.items()})
+                self.__write_snapshot(data, durable=splitting or folding,
+                                      target=shard)
+            for shard in stale:
+                os.remove(shard)
+            self.__shard_files[class_name] = set(
+                self.__shard_files.get(class_name, set()) - stale) | changed
+        if splitting:
+            os.remove(self.__file_path)
+            FileStorage.__offsets = {}
+
+    def __write_snapshot(self, data, durable=False, target=None):
+        """
+        Write the Snapshot
+        Writes the bytes `data` to a temporary file next to the snapshot,
+        or the `target` shard, then renames it over the snapshot so that
+        a crash never leaves a truncated file behind. With the 'batch'
+        durability, and unless `durable` is set, the rename waits for
+        the group commit, or for the file lock of the concurrent mode
+        to be released.
+        """
+        policy = self.durability
+        if policy not in ('always', 'batch', 'never'):
+            raise ValueError('unknown durability: {}'.format(policy))
+        if target is None:
+            target = self.__file_path
+        directory = path.dirname(path.abspath(target))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.' + path.basename(target),
+            suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode='wb') as f:
+                f.write(data)
+                f.flush()
+                if durable or policy == 'always':
+                    os.fsync(f.fileno())
+            if path.exists(target):
+                mode = stat.S_IMODE(os.stat(target).st_mode)
+            else:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with self.__commit_lock:
+            pending = self.__pending_snapshots.pop(target, None)
+            if pending is not None:
+                os.remove(pending)
+            FileStorage.__written = True
+            if policy == 'batch' and not durable:
+                self.__pending_snapshots[target] = tmp_path
+                self.__schedule_commit()
+                return
+            os.replace(tmp_path, target)
+        if durable or policy == 'always':
+            self.__sync_directory()
+
+    def __pending_sync(self):
+        """
+        Sync a Pending Snapshot
+        Commits the snapshots held back by the group commit, if any,
+        before a snapshot file is read.
+        """
+        if self.__pending_snapshots:
+            self.sync()
+
+    def __schedule_commit(self):
+        """
+        Schedule a Commit
+        Starts the timer of the group commit, unless one is running.
+        Must be called with `__commit_lock` held.
+        """
+        if FileStorage.__commit_timer is None:
+            timer = threading.Timer(self.group_commit_ms / 1000, self.sync)
+            FileStorage.__commit_timer = timer
+            timer.start()
+
+    def __sync_directory(self):
+        """
+        Sync the Directory
+        Fsyncs the directory of the snapshot so that the rename of the
+        snapshot is durable too.
+        """
+        directory = path.dirname(path.abspath(self.__file_path))
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __journal_path(self):
+        """
+        Journal Path
+        Returns the path of the journal kept next to the snapshot.
+        """
+        return self.__file_path + '.log'
+
+    def __append_journal(self):
+        """
+        Append to the Journal
+        Writes one record per pending change: an `upsert` with the
+        object data or a `delete` with only its key.
+        """
+        records = []
+        for key in self.__dirty:
+            obj = self.__objects.get(key)
+            if obj is not None:
+                records.append('{{"op": "upsert", "key": {}, "value": {}}}'
+                               .format(json.dumps(key),
+                                       self.__fragment(key, obj)))
+        for key in self.__deleted:
+            records.append(json.dumps({'op': 'delete', 'key': key}))
+        if records:
+            with open(self.__journal_path(), mode='a',
+                      encoding='utf-8') as f:
+                f.write('\n'.join(records) + '\n')
+                f.flush()
+                if self.durability == 'always':
+                    os.fsync(f.fileno())
+            if self.durability == 'batch':
+                with self.__commit_lock:
+                    FileStorage.__unsynced_journal = True
+                    self.__schedule_commit()
+            FileStorage.__written = True
+        self.__acknowledge()
+        self.__dirty.clear()
+        self.__deleted.clear()
+
+    def __replay_journal(self):
+        """
+        Replay the Journal
+        Applies the journal records in order. A torn last record,
+        left by a crash in the middle of an append, is ignored.
+        """
+        with open(self.__journal_path(), mode='r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                class_name = record['key'].partition('.')[0]
+                if class_name in self.__unloaded:
+                    self.__read_shards(class_name)
+                if record['op'] == 'upsert':
+                    self.__forget_offset(record['key'])
+                    self.__put(record['key'], self.__build(record['value']))
+                else:
+                    self.__forget_offset(record['key'])
+                    self.__drop(record['key'])
+
+    @contextmanager
+    def __locked(self, exclusive=True):
+        """
+        Lock the Files
+        Context manager holding the advisory lock of the files, shared
+        or exclusive, and reading the generation they are at. If they
+        were written under it, the writes held back by the durability
+        are committed and the generation is bumped before the lock is
+        released. Taking the lock again while holding it does nothing.
+        """
+        if self.__lock_depth:
+            FileStorage.__lock_depth += 1
+            try:
+                yield
+            finally:
+                FileStorage.__lock_depth -= 1
+            return
+        if fcntl is None:
+            raise ValueError('concurrent mode needs fcntl locks')
+        if self.lazy or self.shards or \
+                serializer_for(self.__file_path, self.format).name != 'json':
+            raise ValueError('concurrent mode needs an eager JSON snapshot '
+                             'without shards')
+        with open(self.__file_path + '.lock', mode='a+') as f:
+            fcntl.flock(f.fileno(),
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            FileStorage.__lock_depth = 1
+            FileStorage.__written = False
+            try:
+                f.seek(0)
+                text = f.read().strip()
+                FileStorage.__disk_generation = int(text) if text else 0
+                yield
+                if self.__written:
+                    self.sync()
+                    generation = self.__disk_generation + 1
+                    f.seek(0)
+                    f.truncate()
+                    f.write(str(generation))
+                    f.flush()
+                    FileStorage.__disk_generation = generation
+                    FileStorage.__generation = generation
+            finally:
+                FileStorage.__lock_depth = 0
+                FileStorage.__written = False
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def __catch_up(self, strict):
+        """
+        Catch Up with the Files
+        When another process wrote since the files were last read, the
+        objects whose JSON on disk changed since are read again, and
+        those no longer on disk dropped. The objects also changed, or
+        deleted, here are conflicts: when `strict`, they are resolved
+        as `conflicts` tells, otherwise they are left for the next
+        save to resolve.
+        """
+        if self.__generation == self.__disk_generation:
+            return
+        theirs = self.__disk_fragments()
+        conflicts = []
+        for key, fragment in theirs.items():
+            crc = zlib.crc32(fragment)
+            if self.__base.get(key) == crc:
+                continue
+            if key in self.__dirty or key in self.__deleted:
+                conflicts.append(key)
+                continue
+            self.__load_fragment(key, fragment)
+            self.__base[key] = crc
+        for key in [key for key in self.__base if key not in theirs]:
+            if key in self.__dirty:
+                conflicts.append(key)
+                continue
+            self.__drop(key)
+            del self.__base[key]
+        if conflicts and not strict:
+            return
+        if conflicts and self.conflicts == 'reject':
+            raise ConflictError(sorted(conflicts))
+        if conflicts and self.conflicts not in ('ours', 'theirs'):
+            raise ValueError('unknown conflicts: {}'.format(self.conflicts))
+        for key in conflicts:
+            fragment = theirs.get(key)
+            if self.conflicts == 'ours':
+                if fragment is None:
+                    self.__base.pop(key, None)
+                else:
+                    self.__base[key] = zlib.crc32(fragment)
+                continue
+            self.__take_theirs(key, fragment)
+        FileStorage.__generation = self.__disk_generation
+
+    def __take_theirs(self, key, fragment):
+        """
+        Take Theirs
+        Drops the changes pending on `key`, then reads it again from
+        its JSON `fragment` on disk, or drops it if None.
+        """
+        self.__dirty.discard(key)
+        self.__deleted.discard(key)
+        if fragment is None:
+            self.__drop(key)
+            self.__base.pop(key, None)
+        else:
+            self.__load_fragment(key, fragment)
+            self.__base[key] = zlib.crc32(fragment)
+
+    def __disk_fragments(self):
+        """
+        Fragments on Disk
+        Returns the JSON of every object stored in the snapshot and
+        the journal, as bytes, by key.
+        """
+        fragments = {}
+        if path.exists(self.__file_path):
+            with open(self.__file_path, mode='rb') as f:
+                data = f.read()
+            if data.startswith(b'{\n'):
+                for line in data.splitlines():
+                    if line.startswith(b'"'):
+                        key, fragment = self.__split_line(line)
+                        fragments[key] = fragment
+            else:
+                for key, value in detect(data).loads(data).items():
+                    fragments[key] = json.dumps(value).encode('utf-8')
+        if path.exists(self.__journal_path()):
+            with open(self.__journal_path(), mode='rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record['op'] == 'upsert':
+                        value = line[line.index(b'"value": ') + 9:]
+                        fragments[record['key']] = value.rstrip()[:-1]
+                    else:
+                        fragments.pop(record['key'], None)
+        return fragments
+
+    def __acknowledge(self):
+        """
+        Acknowledge the Changes
+        In concurrent mode, records the JSON the pending changes are
+        written with as the one on disk.
+        """
+        if not self.concurrent:
+            return
+        for key in self.__dirty:
+            obj = self.__objects.get(key)
+            if obj is not None:
+                self.__base[key] = zlib.crc32(
+                    self.__fragment(key, obj).encode('utf-8'))
+        for key in self.__deleted:
+            self.__base.pop(key, None)
+
+
+def _decode_fragments(fragments):
+    """
+    Decode Fragments
+    Args:
+        fragments (list): JSON fragments, as bytes.
+
+    Returns the decoded fragments, with their timestamps parsed, in
+    a worker process of the parallel reload.
+    """
+    values = []
+    for fragment in fragments:
+        value = json.loads(fragment)
+        for name in ('created_at', 'updated_at'):
+            if name in value:
+                value[name] = parse_datetime(value[name])
+        values.append(value)
+    return values
@@ -0,0 +1,199 @@
+#!/usr/bin/python3
+
+"""
+Geo Module
+This module indexes the stored objects by location, on a grid of
+latitude and longitude cells, to answer bounding box and radius
+queries without computing the distance to every object.
+"""
+
+from math import asin, cos, floor, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Distance
+    Returns the great-circle distance, in kilometers, between two
+    points given in degrees.
+    """
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """
+    Bounding Boxes
+    Args:
+        latitude (float): The latitude of the center.
+        longitude (float): The longitude of the center.
+        radius_km (float): The radius, in kilometers.
+
+    Returns the (south, north, spans) bounds of the boxes containing
+    the circle, where spans lists the (west, east) longitude ranges,
+    two of them when the circle crosses the antimeridian.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    south = max(-90.0, latitude - delta_lat)
+    north = min(90.0, latitude + delta_lat)
+    widest = max(abs(south), abs(north))
+    if widest >= 90 or radius_km >= KM_PER_DEGREE * 90:
+        return south, north, [(-180.0, 180.0)]
+    delta_lon = delta_lat / cos(radians(widest))
+    west = longitude - delta_lon
+    east = longitude + delta_lon
+    if delta_lon >= 180:
+        spans = [(-180.0, 180.0)]
+    elif west < -180:
+        spans = [(west + 360, 180.0), (-180.0, east)]
+    elif east > 180:
+        spans = [(west, 180.0), (-180.0, east - 360)]
+    else:
+        spans = [(west, east)]
+    return south, north, spans
+
+
+class GridIndex:
+    """
+    Grid Index Class
+    This class maps each key to its point and each grid cell to the
+    keys of the points it contains.
+    Attributes:
+        cell_degrees (float): The side of a cell, in degrees.
+        cells (dict): The keys in each (row, column) cell.
+        points (dict): The (latitude, longitude) of each key.
+    """
+
+    def __init__(self, cell_degrees=0.1):
+        """
+        Grid Index Initialization
+        Args:
+            cell_degrees (float): The side of a cell, in degrees.
+        """
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.points = {}
+
+    def __len__(self):
+        """
+        Length
+        Returns the number of points indexed.
+        """
+        return len(self.points)
+
+    def set(self, key, latitude, longitude):
+        """
+        Set a Point
+        Args:
+            key (str): The key of the object.
+            latitude (float): Its latitude, in degrees.
+            longitude (float): Its longitude, in degrees.
+
+        An object whose coordinates are not valid is not indexed.
+        """
+        self.remove(key)
+        try:
+            latitude = float(latitude)
+            longitude = float(longitude)
+        except (TypeError, ValueError):
+            return
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return
+        self.points[key] = (latitude, longitude)
+        self.cells.setdefault(self.__cell(latitude, longitude),
+                              set()).add(key)
+
+    def remove(self, key):
+        """
+        Remove a Point
+        Args:
+            key (str): The key of the object to remove.
+        """
+        point = self.points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    def within(self, south, west, north, east):
+        """
+        Bounding Box Query
+        Args:
+            south (float): The lowest latitude.
+            west (float): The western longitude.
+            north (float): The highest latitude.
+            east (float): The eastern longitude, lower than `west` for
+            a box crossing the antimeridian.
+
+        Returns the keys of the points within the box.
+        """
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180.0), (-180.0, east)]
+        found = []
+        for low, high in spans:
+            for key in self.__candidates(south, low, north, high):
+                latitude, longitude = self.points[key]
+                if south <= latitude <= north and low <= longitude <= high:
+                    found.append(key)
+        return found
+
+    def near(self, latitude, longitude, radius_km):
+        """
+        Radius Query
+        Args:
+            latitude (float): The latitude of the center.
+            longitude (float): The longitude of the center.
+            radius_km (float): The radius, in kilometers.
+
+        Returns the (distance, key) pairs of the points within the
+        radius, closest first.
+        """
+        south, north, spans = bounding_boxes(latitude, longitude, radius_km)
+        found = []
+        for low, high in spans:
+            for key in self.__candidates(south, low, north, high):
+                distance = distance_km(latitude, longitude,
+                                       *self.points[key])
+                if distance <= radius_km:
+                    found.append((distance, key))
+        found.sort()
+        return found
+
+    def __candidates(self, south, west, north, east):
+        """
+        Candidates
+        Yields the keys of the cells overlapping the box, visiting the
+        occupied cells instead when the box spans more cells than are
+        occupied.
+        """
+        first_row, first_col = self.__cell(south, west)
+        last_row, last_col = self.__cell(north, east)
+        spanned = (last_row - first_row + 1) * (last_col - first_col + 1)
+        if spanned > len(self.cells):
+            for (row, col), keys in self.cells.items():
+                if first_row <= row <= last_row and \
+                        first_col <= col <= last_col:
+                    yield from keys
+            return
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                keys = self.cells.get((row, col))
+                if keys:
+                    yield from keys
+
+    def __cell(self, latitude, longitude):
+        """
+        Cell
+        Returns the (row, column) of the cell containing a point.
+        """
+        return (floor(latitude / self.cell_degrees),
+                floor(longitude / self.cell_degrees))
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+
+"""
+Query Module
+This module evaluates the conditions of the storage queries on the
+instances and orders the results. A condition is an
+(attribute, operator, value) triple whose operator is one of
+OPERATORS; an instance matches it when the comparison of its
+attribute with the value holds, values of types that do not compare
+never matching.
+"""
+
+import heapq
+import operator
+from itertools import islice
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+MISSING = object()
+
+
+def validate(conditions):
+    """
+    Validate Conditions
+    Args:
+        conditions (iterable): The (attribute, operator, value) triples.
+
+    Returns the conditions as a list. Raises ValueError for an unknown
+    operator.
+    """
+    conditions = list(conditions)
+    for attr, op, value in conditions:
+        if op not in OPERATORS:
+            raise ValueError('unknown operator: {}'.format(op))
+    return conditions
+
+
+def matches(obj, conditions):
+    """
+    Match an Instance
+    Args:
+        obj (inst): The instance.
+        conditions (list): The (attribute, operator, value) triples.
+
+    Returns True if `obj` meets every condition. An attribute the
+    instance does not have never matches.
+    """
+    for attr, op, value in conditions:
+        current = getattr(obj, attr, MISSING)
+        if current is MISSING:
+            return False
+        try:
+            if not OPERATORS[op](current, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def sort_key(value):
+    """
+    Sort Key
+    Args:
+        value: An attribute value, or MISSING.
+
+    Returns a key ordering the numbers first, then the strings, then
+    the other values by their string, then the missing values, so
+    that values of any type can be sorted together.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, '')
+    if isinstance(value, str):
+        return (1, 0, value)
+    if value is MISSING:
+        return (3, 0, '')
+    return (2, 0, str(value))
+
+
+def top(objects, order_by=None, limit=None):
+    """
+    Top Instances
+    Args:
+        objects (iterable): The instances.
+        order_by (str): The attribute to order the instances by,
+        prefixed with '-' for the descending order, or None to keep
+        the order of `objects`.
+        limit (int): The number of instances to return, or None for
+        all of them.
+
+    Returns the list of the first `limit` instances in that order,
+    selected with a heap, without sorting all the instances, when a
+    limit is given. The instances without the attribute come last in
+    either order.
+    """
+    if order_by is None:
+        return list(islice(objects, limit))
+    descending = order_by.startswith('-')
+    attr = order_by.lstrip('-')
+
+    def key(obj):
+        """Sort key of an instance"""
+        value = getattr(obj, attr, MISSING)
+        if descending and value is MISSING:
+            return (-1, 0, '')
+        return sort_key(value)
+
+    if limit is None:
+        return sorted(objects, key=key, reverse=descending)
+    if descending:
+        return heapq.nlargest(limit, objects, key=key)
+    return heapq.nsmallest(limit, objects, key=key)
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+"""
+Readers-Writer Lock Module
+This module provides the lock of the thread-safe mode of the file
+storage: any number of threads may hold it shared to read, or a
+single thread exclusive to write.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Readers-Writer Lock Class
+    This class is a lock held either shared, by any number of readers,
+    or exclusive, by one writer. A waiting writer goes before the
+    readers arriving after it, so that a stream of readers does not
+    starve it. Both holds are reentrant, and the writer may take the
+    lock shared too; a reader taking it exclusive would deadlock with
+    another one doing the same, and is refused.
+    Attributes:
+        __condition (Condition): Guards the state of the lock.
+        __readers (dict): The depth of the shared hold of each
+        reading thread, by thread id.
+        __writer (int): The id of the writing thread, or None.
+        __depth (int): The depth of the exclusive hold.
+        __waiting (int): The number of writers waiting.
+    """
+
+    def __init__(self):
+        """
+        Lock Initialization
+        Creates a lock held by no thread.
+        """
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = {}
+        self.__writer = None
+        self.__depth = 0
+        self.__waiting = 0
+
+    def owned(self):
+        """
+        Owned
+        Returns True if the calling thread holds the lock exclusive.
+        """
+        return self.__writer == threading.get_ident()
+
+    @contextmanager
+    def read(self):
+        """
+        Shared Hold
+        Context manager holding the lock shared, once no writer holds
+        it or waits for it, unless the thread already holds it.
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer == me:
+                owned = False
+            else:
+                owned = True
+                if me not in self.__readers:
+                    while self.__writer is not None or self.__waiting:
+                        self.__condition.wait()
+                self.__readers[me] = self.__readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            if owned:
+                with self.__condition:
+                    self.__readers[me] -= 1
+                    if not self.__readers[me]:
+                        del self.__readers[me]
+                        self.__condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """
+        Exclusive Hold
+        Context manager holding the lock exclusive, once no other
+        thread holds it. Raises RuntimeError if the thread holds it
+        shared.
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer != me:
+                if me in self.__readers:
+                    raise RuntimeError('cannot write while reading')
+                self.__waiting += 1
+                try:
+                    while self.__writer is not None or self.__readers:
+                        self.__condition.wait()
+                finally:
+                    self.__waiting -= 1
+                self.__writer = me
+            self.__depth += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__depth -= 1
+                if not self.__depth:
+                    self.__writer = None
+                    self.__condition.notify_all()
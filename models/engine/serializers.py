@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+
+"""
+Serializers Module
+This module encodes and decodes the snapshots of the file storage.
+A snapshot is written from records, a dict of <class name>.id keys
+to the attributes of each object with its `__class__`, and read back
+as the same records. Two formats are available: the JSON one, one
+object per line, and a binary one, a pickle in which the timestamps
+are integers and the class names are small tags.
+"""
+
+import io
+import json
+import marshal
+import pickle
+from datetime import datetime
+from os import path
+from models.isotime import format_datetime, from_microseconds, \
+    to_microseconds
+
+TIMESTAMPS = ('created_at', 'updated_at')
+
+
+class JSONSerializer:
+    """
+    JSON Serializer Class
+    This class writes the records as a JSON object, one record per
+    line, which is the layout the file storage scans.
+    Attributes:
+        name (str): The name of the format.
+    """
+    name = 'json'
+
+    def dumps(self, records):
+        """
+        Encode Records
+        Args:
+            records (dict): The records to encode, by key. The
+            timestamps may be datetimes or ISO 8601 strings.
+
+        Returns the encoded snapshot, as bytes.
+        """
+        lines = []
+        for key, value in records.items():
+            if any(isinstance(value.get(name), datetime)
+                   for name in TIMESTAMPS):
+                value = dict(value)
+                for name in TIMESTAMPS:
+                    if isinstance(value.get(name), datetime):
+                        value[name] = format_datetime(value[name])
+            lines.append(json.dumps(key) + ': ' + json.dumps(value))
+        if not lines:
+            return b'{}\n'
+        return ('{\n' + ',\n'.join(lines) + '\n}\n').encode('utf-8')
+
+    def loads(self, data):
+        """
+        Decode Records
+        Args:
+            data (bytes): An encoded snapshot.
+
+        Returns the records of the snapshot, by key, with ISO 8601
+        string timestamps.
+        """
+        return json.loads(data)
+
+
+class RecordUnpickler(pickle.Unpickler):
+    """
+    Record Unpickler Class
+    This class reads pickles of the built-in types only: the records
+    need no other, and loading any other class or function could run
+    code from a malformed or malicious snapshot.
+    """
+
+    def find_class(self, module, name):
+        """
+        Find a Class
+        Refuses every global. Raises pickle.UnpicklingError.
+        """
+        raise pickle.UnpicklingError(
+            'global {}.{} is forbidden'.format(module, name))
+
+
+class BinarySerializer:
+    """
+    Binary Serializer Class
+    This class writes the records as a pickle, protocol 5, after a
+    magic header, of the list of the class names and of one tuple per
+    record: the index of its class name, its id, its timestamps in
+    microseconds since the epoch, and its other attributes. Unlike a
+    `marshal` dump, which the first version of the format was and
+    which may change with the interpreter, the pickle protocol stays
+    readable by the later versions of Python. The snapshots of the
+    first version are still read, and written in the current one by
+    the next save.
+    Attributes:
+        name (str): The name of the format.
+        magic (bytes): The header of the binary snapshots.
+        legacy_magic (bytes): The header of the `marshal` snapshots.
+    """
+    name = 'binary'
+    magic = b'HBNB\x02'
+    legacy_magic = b'HBNB\x01'
+
+    def dumps(self, records):
+        """
+        Encode Records
+        Args:
+            records (dict): The records to encode, by key. The
+            timestamps may be datetimes or ISO 8601 strings, and the
+            other attributes must be of the types JSON supports.
+
+        Returns the encoded snapshot, as bytes.
+        """
+        tags = {}
+        rows = []
+        for value in records.values():
+            attributes = dict(value)
+            class_name = attributes.pop('__class__')
+            tag = tags.get(class_name)
+            if tag is None:
+                tag = tags[class_name] = len(tags)
+            rows.append((tag, attributes.pop('id'),
+                         to_microseconds(attributes.pop('created_at')),
+                         to_microseconds(attributes.pop('updated_at')),
+                         attributes))
+        return self.magic + pickle.dumps((list(tags), rows), protocol=5)
+
+    def loads(self, data):
+        """
+        Decode Records
+        Args:
+            data (bytes): An encoded snapshot.
+
+        Returns the records of the snapshot, by key, with datetime
+        timestamps. Raises ValueError if `data` is not a binary
+        snapshot.
+        """
+        if data.startswith(self.magic):
+            names, rows = RecordUnpickler(
+                io.BytesIO(data[len(self.magic):])).load()
+        elif data.startswith(self.legacy_magic):
+            names, rows = marshal.loads(data[len(self.legacy_magic):])
+        else:
+            raise ValueError('not a binary snapshot')
+        records = {}
+        for tag, id, created_at, updated_at, attributes in rows:
+            attributes['__class__'] = names[tag]
+            attributes['id'] = id
+            attributes['created_at'] = from_microseconds(created_at)
+            if updated_at == created_at:
+                attributes['updated_at'] = attributes['created_at']
+            else:
+                attributes['updated_at'] = from_microseconds(updated_at)
+            records[names[tag] + '.' + id] = attributes
+        return records
+
+
+SERIALIZERS = {'json': JSONSerializer(), 'binary': BinarySerializer()}
+EXTENSIONS = {'.json': 'json', '.bin': 'binary'}
+
+
+def serializer_for(file_path, format=None):
+    """
+    Get a Serializer
+    Args:
+        file_path (str): The path of the snapshot.
+        format (str): The name of the format, or None to pick it from
+        the extension of `file_path`, JSON by default.
+
+    Returns the serializer of the format. Raises ValueError for an
+    unknown format.
+    """
+    if format is None:
+        format = EXTENSIONS.get(path.splitext(file_path)[1].lower(), 'json')
+    try:
+        return SERIALIZERS[format]
+    except KeyError:
+        raise ValueError('unknown format: {}'.format(format)) from None
+
+
+def detect(data):
+    """
+    Detect a Format
+    Args:
+        data (bytes): An encoded snapshot.
+
+    Returns the serializer `data` was written with.
+    """
+    if data.startswith((BinarySerializer.magic,
+                        BinarySerializer.legacy_magic)):
+        return SERIALIZERS['binary']
+    return SERIALIZERS['json']
+
+
+def convert(source, destination, format=None):
+    """
+    Convert a Snapshot
+    Args:
+        source (str): The path of the snapshot to read, in any format.
+        destination (str): The path of the snapshot to write.
+        format (str): The format to write, or None to pick it from the
+        extension of `destination`.
+
+    Returns the number of records converted.
+    """
+    serializer = serializer_for(destination, format)
+    with open(source, mode='rb') as f:
+        data = f.read()
+    records = detect(data).loads(data)
+    with open(destination, mode='wb') as f:
+        f.write(serializer.dumps(records))
+    return len(records)
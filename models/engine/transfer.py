@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+
+"""
+Transfer Module
+This module imports and exports the objects of a storage in bulk, as
+JSON Lines, one object per line, or as CSV, one class per file with
+a header row. Rows are read and written one at a time, and the
+attributes declared on the model class are checked and converted to
+the type of their default value.
+"""
+
+import csv
+import json
+import uuid
+from datetime import datetime
+from os import path
+from models.base_model import classes
+from models.isotime import format_datetime, parse_datetime
+
+FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+BUILTIN = ('id', 'created_at', 'updated_at')
+
+
+def format_of(file_path, format=None):
+    """
+    Format of a File
+    Args:
+        file_path (str): The path of the file.
+        format (str): 'jsonl' or 'csv', or None to pick it from the
+        extension of `file_path`.
+
+    Returns the name of the format. Raises ValueError for an unknown
+    format or extension.
+    """
+    if format is None:
+        format = FORMATS.get(path.splitext(file_path)[1].lower())
+    if format not in ('jsonl', 'csv'):
+        raise ValueError('unknown format: {}'.format(
+            format or path.basename(file_path)))
+    return format
+
+
+def coerce(schema, name, value):
+    """
+    Coerce a Value
+    Args:
+        schema (dict): The attributes declared on the model class,
+        with their default values, as returned by `schema()`.
+        name (str): The name of the attribute.
+        value: The value read, a string in CSV.
+
+    Returns `value` converted to the type of the default value of a
+    declared attribute, or unchanged for the others, as the console
+    `update` command leaves them. Raises ValueError if the value does
+    not convert.
+    """
+    if name in ('created_at', 'updated_at'):
+        return parse_datetime(value)
+    if name == 'id':
+        if not isinstance(value, str):
+            raise ValueError('invalid id: {!r}'.format(value))
+        return value
+    if name not in schema:
+        return value
+    default = schema[name]
+    if isinstance(default, list):
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, list):
+            raise ValueError('{} is not a list'.format(name))
+        return value
+    if isinstance(value, bool) or \
+            not isinstance(value, (str, int, float)) or \
+            isinstance(default, int) and isinstance(value, float) and \
+            not value.is_integer():
+        raise ValueError('invalid {}: {!r}'.format(name, value))
+    try:
+        return type(default)(value)
+    except ValueError:
+        raise ValueError('invalid {}: {!r}'.format(name, value)) from None
+
+
+def build(cls, row, now=None, schema=None):
+    """
+    Build an Object
+    Args:
+        cls (class): The model class.
+        row (dict): The attributes read, by name. Empty CSV cells are
+        left to the class default.
+        now (datetime): The timestamps of an object without any.
+        schema (dict): The schema of `cls`, if already known.
+
+    Returns the instance of `cls` holding the attributes, with a new
+    id and timestamps if the row has none, built without being saved
+    or added to the storage.
+    """
+    if schema is None:
+        schema = cls.schema()
+    kwargs = {}
+    for name, value in row.items():
+        if name == '__class__' or value == '' or value is None:
+            continue
+        kwargs[name] = coerce(schema, name, value)
+    if 'id' not in kwargs:
+        kwargs['id'] = str(uuid.uuid4())
+    if 'created_at' not in kwargs:
+        kwargs['created_at'] = now or datetime.now()
+    if 'updated_at' not in kwargs:
+        kwargs['updated_at'] = kwargs['created_at']
+    return cls(**kwargs)
+
+
+def read_rows(f, format, cls=None):
+    """
+    Read Rows
+    Args:
+        f (file): The opened file.
+        format (str): 'jsonl' or 'csv'.
+        cls (class): The class of the rows without a `__class__`.
+
+    Yields the line number, class and attributes of each row. Raises
+    ValueError on a malformed row or an unknown class.
+    """
+    if format == 'csv':
+        rows = enumerate(csv.DictReader(f), 2)
+    else:
+        rows = ((number, line) for number, line in enumerate(f, 1)
+                if line.strip())
+    for number, row in rows:
+        if format == 'jsonl':
+            try:
+                row = json.loads(row)
+            except ValueError as error:
+                raise ValueError('line {}: {}'.format(number, error))
+        if not isinstance(row, dict):
+            raise ValueError('line {}: not an object'.format(number))
+        name = row.get('__class__')
+        if name:
+            if name not in classes or cls is not None and \
+                    name != cls.__name__:
+                raise ValueError('line {}: unexpected class {}'.format(
+                    number, name))
+            yield number, classes[name], row
+        elif cls is None:
+            raise ValueError('line {}: class missing'.format(number))
+        else:
+            yield number, cls, row
+
+
+def import_file(storage, file_path, cls=None, format=None):
+    """
+    Import a File
+    Args:
+        storage (inst): The storage to add the objects to.
+        file_path (str): The JSON Lines or CSV file to read.
+        cls (class): The class of the rows without a `__class__`
+        column or key, required for CSV files without one.
+        format (str): 'jsonl' or 'csv', or None to pick it from the
+        extension of the file.
+
+    Adds an object per row to the storage within a batch, so that the
+    storage is saved once, and nothing is imported if a row is
+    invalid. The objects are instances of the compact variant of their
+    class when the storage uses those. Returns the number of objects
+    imported. Raises ValueError on the first invalid row, with its line
+    number.
+    """
+    format = format_of(file_path, format)
+    count = 0
+    now = datetime.now()
+    schemas = {}
+    compact = getattr(storage, 'compact_models', False)
+    with open(file_path, mode='r', encoding='utf-8', newline='') as f, \
+            storage.batch():
+        for number, row_cls, row in read_rows(f, format, cls):
+            schema = schemas.get(row_cls)
+            if schema is None:
+                schema = schemas[row_cls] = row_cls.schema()
+            if compact:
+                row_cls = row_cls.compact_class()
+            try:
+                obj = build(row_cls, row, now, schema)
+            except (TypeError, ValueError) as error:
+                raise ValueError('line {}: {}'.format(number, error))
+            storage.new(obj)
+            count += 1
+        storage.save()
+    return count
+
+
+def export_file(storage, file_path, cls=None, format=None):
+    """
+    Export a File
+    Args:
+        storage (inst): The storage to read the objects from.
+        file_path (str): The JSON Lines or CSV file to write.
+        cls (class): The class whose objects are exported, required
+        in CSV, or None for every object.
+        format (str): 'jsonl' or 'csv', or None to pick it from the
+        extension of the file.
+
+    Writes a line per object and returns the number of objects
+    exported. In CSV the columns are the id, the timestamps and the
+    attributes declared on the class, followed by any other attribute
+    found on the objects, and lists are written as JSON.
+    """
+    format = format_of(file_path, format)
+    if format == 'csv' and cls is None:
+        raise ValueError('class name missing')
+    objects = storage.all(cls).values()
+    with open(file_path, mode='w', encoding='utf-8', newline='') as f:
+        if format == 'jsonl':
+            for obj in objects:
+                f.write(json.dumps(obj.to_dict()) + '\n')
+            return len(objects)
+        columns = list(BUILTIN) + list(cls.schema())
+        extra = {}
+        for obj in objects:
+            for name in obj._attributes():
+                if name not in extra and name not in columns:
+                    extra[name] = None
+        writer = csv.writer(f)
+        writer.writerow(columns + list(extra))
+        for obj in objects:
+            values = []
+            for name in columns + list(extra):
+                value = getattr(obj, name, '')
+                if isinstance(value, datetime):
+                    value = format_datetime(value)
+                elif isinstance(value, (list, dict)):
+                    value = json.dumps(value)
+                values.append(value)
+            writer.writerow(values)
+    return len(objects)
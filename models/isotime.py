@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+"""
+ISO Time Module
+This module converts the `created_at` and `updated_at` timestamps
+of the models to and from the ISO 8601 strings stored in the files,
+without going through `datetime.strptime`, and to and from the
+integer microseconds of the binary snapshots.
+"""
+
+from datetime import datetime, timedelta
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_datetime(value):
+    """
+    Parse a Timestamp
+    Args:
+        value (str): An ISO 8601 timestamp as written by `format_datetime`,
+        with or without microseconds. A datetime is returned unchanged.
+
+    Returns the datetime the string represents.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, ISO_FORMAT)
+
+
+def format_datetime(value):
+    """
+    Format a Timestamp
+    Args:
+        value (datetime): The timestamp to format.
+
+    Returns the ISO 8601 string of the timestamp, which only carries
+    microseconds when they are not zero.
+    """
+    return value.isoformat()
+
+
+def to_microseconds(value):
+    """
+    Timestamp to Microseconds
+    Args:
+        value (datetime or str): The timestamp, or its ISO 8601 string.
+
+    Returns the number of microseconds from the epoch to the timestamp.
+    """
+    return (parse_datetime(value) - EPOCH) // MICROSECOND
+
+
+def from_microseconds(value):
+    """
+    Microseconds to Timestamp
+    Args:
+        value (int): A number of microseconds since the epoch.
+
+    Returns the datetime `value` microseconds after the epoch.
+    """
+    return EPOCH + timedelta(microseconds=value)
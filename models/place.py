@@ -25,8 +25,16 @@ class Place(BaseModel):
         latitude (float): The latitude of the Place
         longitude (float): The longitude of the Place
         amenity_ids (list): A list that contains all the Amenities in the Place
+        __indexed__ (tuple): Attributes indexed by the storage
+        __columns__ (tuple): Attributes kept in columns by the storage
+        __geo__ (tuple): Coordinates indexed by the storage
 
     """
+    __indexed__ = ('city_id', 'user_id')
+    __columns__ = ('number_rooms', 'number_bathrooms', 'max_guest',
+                   'price_by_night', 'latitude', 'longitude')
+    __geo__ = ('latitude', 'longitude')
+
     city_id = ''
     user_id = ''
     name = ''
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+"""
+Render Cache Module
+This module keeps the rendered forms of the models, the string of
+`__str__` and the dictionary of `to_dict()`, so that the objects read
+far more often than they change are not formatted again on every read.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Render Cache Class
+    This class is a bounded cache of the forms rendered for objects,
+    least recently used first out. An entry keeps its object, so that
+    the id it is keyed by is not reused while it lives, and is dropped
+    when the object changes. A render started before a change is not
+    kept, even when it ends after it. The changes made in place,
+    without an assignment, are caught by the state kept with each
+    form: a form rendered in another state than the current one is
+    rendered again.
+    Attributes:
+        size (int): The most objects kept, 0 to keep none.
+        hits (int): The forms found in the cache.
+        misses (int): The forms rendered.
+        __entries (OrderedDict): The object and its forms, with the
+        state they were rendered in, by form name, by object id, least
+        recently used first.
+        __changes (int): The number of discards so far.
+        __lock (Lock): Guards the entries.
+    """
+
+    def __init__(self, size=1024):
+        """
+        Render Cache Initialization
+        Args:
+            size (int): The most objects kept.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__changes = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        """
+        Length
+        Returns the number of objects kept.
+        """
+        return len(self.__entries)
+
+    def get(self, obj, form, render, state=None):
+        """
+        Get a Form
+        Args:
+            obj (inst): The object rendered.
+            form (str): The name of the form.
+            render (function): Renders the form of an object.
+            state (function): Returns the state of an object that
+            changes without an assignment, if any.
+
+        Returns the form of `obj` from the cache, or rendered and
+        kept in it.
+        """
+        key = id(obj)
+        current = None if state is None else state(obj)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] is obj and form in entry[1]:
+                value, rendered = entry[1][form]
+                if rendered == current:
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            changes = self.__changes
+        value = render(obj)
+        with self.__lock:
+            if self.size > 0 and changes == self.__changes:
+                entry = self.__entries.get(key)
+                if entry is None or entry[0] is not obj:
+                    entry = self.__entries[key] = (obj, {})
+                self.__entries.move_to_end(key)
+                entry[1][form] = (value, current)
+                while len(self.__entries) > self.size:
+                    self.__entries.popitem(last=False)
+        return value
+
+    def discard(self, obj):
+        """
+        Discard an Object
+        Args:
+            obj (inst): The object that changed.
+
+        Drops the forms of `obj`, and any render in progress. The lock
+        is only taken when the object is in the cache: a render kept
+        before the count of discards is bumped is found here, one
+        ending after it sees the count changed and is not kept.
+        """
+        self.__changes += 1
+        key = id(obj)
+        if key in self.__entries:
+            with self.__lock:
+                entry = self.__entries.get(key)
+                if entry is not None and entry[0] is obj:
+                    del self.__entries[key]
+
+    def clear(self):
+        """
+        Clear
+        Drops every form and resets the counters.
+        """
+        with self.__lock:
+            self.__changes += 1
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -17,8 +17,11 @@ class Review(BaseModel):
         place_id (str): The Place the Review belongs to
         user_id (str): The User that made the review
         text (str): The message the User wrote about the Place
+        __indexed__ (tuple): Attributes indexed by the storage
 
     """
+    __indexed__ = ('place_id', 'user_id')
+
     place_id = ''
     user_id = ''
     text = ''
@@ -5,13 +5,25 @@ Test Console
 This module contains unit tests for checking the creation
 and inheritance of required classes in the console.
 """
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+import models
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models.engine.file_storage import ConflictError, FileStorage
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
 from models.place import Place
 from models.review import Review
 from models.state import State
+from models.user import User
 
 
 class TestConsole(unittest.TestCase):
@@ -52,3 +64,313 @@ class TestConsole(unittest.TestCase):
         self.assertTrue(issubclass(state1.__class__, BaseModel))
         self.assertTrue(issubclass(rev1.__class__, BaseModel))
         self.assertTrue(issubclass(place1.__class__, BaseModel))
+
+    def test_create_registered(self):
+        """
+        Create a Registered Class
+        This test checks that the console creates instances of
+        any registered model class.
+        """
+        class Booking(BaseModel):
+            """Model known only through the registry"""
+        try:
+            with patch('sys.stdout', new=StringIO()) as out:
+                HBNBCommand().onecmd('create Booking')
+            key = 'Booking.' + out.getvalue().strip()
+            self.assertIsInstance(models.storage.all()[key], Booking)
+            models.storage.delete(models.storage.all()[key])
+        finally:
+            del HBNBCommand.allowed_classes['Booking']
+
+    def test_near(self):
+        """
+        Near Command
+        This test checks that <class>.near() lists the instances
+        around a point.
+        """
+        place = Place()
+        place.latitude = 34.0209
+        place.longitude = -6.8416
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd(HBNBCommand().precmd(
+                'Place.near(34.02, -6.84, 1)'))
+        self.assertIn(place.id, out.getvalue())
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('near City 1 2 3')
+        self.assertEqual(out.getvalue(), '** class has no location **\n')
+
+    def test_conflict(self):
+        """
+        Conflicts
+        This test checks that a save rejected because another process
+        changed the same objects is reported.
+        """
+        error = ConflictError(['User.1'])
+        with patch.object(models.storage, 'save', side_effect=error), \
+                patch('sys.stdout', new=StringIO()) as out:
+            self.assertFalse(HBNBCommand().onecmd('create User'))
+        self.assertEqual(out.getvalue(),
+                         '** changed by another process: User.1 **\n')
+
+    def test_conflict_resolved(self):
+        """
+        Conflicts
+        This test checks that after a rejected save the changes of the
+        other process are kept and the next commands are saved.
+        """
+        def rename(id):
+            storage = FileStorage()
+            storage.clear()
+            storage.reload()
+            storage.get(User, id).first_name = 'Theirs'
+            storage.save()
+
+        FileStorage.concurrent = True
+        try:
+            user = User()
+            user.save()
+            user.first_name = 'Mine'
+            process = multiprocessing.get_context('fork').Process(
+                target=rename, args=(user.id,))
+            process.start()
+            process.join()
+            with patch('sys.stdout', new=StringIO()) as out:
+                console = HBNBCommand()
+                for line in ('update User {} last_name "Holberton"'
+                             .format(user.id), 'create State'):
+                    console.onecmd(console.precmd(line))
+            lines = out.getvalue().splitlines()
+            self.assertEqual(lines[0], '** changed by another process: '
+                             'User.{} **'.format(user.id))
+            state_id = lines[1]
+            models.storage.reload()
+            self.assertIsNotNone(models.storage.get(State, state_id))
+            user = models.storage.get(User, user.id)
+            self.assertEqual(user.first_name, 'Theirs')
+            self.assertEqual(user.last_name, '')
+        finally:
+            FileStorage.concurrent = False
+            models.storage.reload()
+
+    def test_run_batch_error(self):
+        """
+        Run a Batch
+        This test checks that a command raising an error is reported
+        without undoing the commands run before it.
+        """
+        lines = ['create State', 'update State 1 name "unclosed',
+                 'create State']
+        with patch('sys.stdout', new=StringIO()) as out:
+            count = HBNBCommand().run_batch(lines, report=None)
+        self.assertEqual(count, 3)
+        first, error, second = out.getvalue().splitlines()
+        self.assertEqual(error, '** ValueError: No closing quotation **')
+        for id in (first, second):
+            self.assertIsNotNone(models.storage.get(State, id))
+            models.storage.delete(models.storage.get(State, id))
+
+    def test_run_batch_conflict(self):
+        """
+        Run a Batch
+        This test checks that a save rejected at the end of a batch is
+        reported, and the other commands of the batch saved.
+        """
+        def lines(id):
+            yield 'update User {} first_name "Mine"'.format(id)
+            subprocess.run([sys.executable, '-c',
+                            'import models; from models.user import User; '
+                            'type(models.storage).concurrent = True; '
+                            'models.storage.reload(); '
+                            'models.storage.get(User, {!r}).first_name = '
+                            '"Theirs"; models.storage.save()'.format(id)],
+                           check=True)
+            yield 'create State'
+
+        FileStorage.concurrent = True
+        try:
+            user = User()
+            user.save()
+            report = StringIO()
+            with patch('sys.stdout', new=StringIO()) as out:
+                count = HBNBCommand().run_batch(lines(user.id),
+                                                report=report)
+            self.assertEqual(count, 2)
+            state_id, conflict = out.getvalue().splitlines()
+            self.assertEqual(conflict, '** changed by another process: '
+                             'User.{} **'.format(user.id))
+            self.assertTrue(report.getvalue().startswith('2 commands in '))
+            models.storage.reload()
+            self.assertIsNotNone(models.storage.get(State, state_id))
+            self.assertEqual(models.storage.get(User, user.id).first_name,
+                             'Theirs')
+        finally:
+            FileStorage.concurrent = False
+            models.storage.reload()
+
+    def test_quit_flushes(self):
+        """
+        Quit Command
+        This test checks that quit and EOF wait for the saves.
+        """
+        for command in ('quit', 'EOF'):
+            with patch.object(models.storage, 'flush') as flush:
+                self.assertTrue(HBNBCommand().onecmd(command))
+            flush.assert_called_once_with()
+
+    def test_where(self):
+        """
+        Where Command
+        This test checks that <class>.where() lists the instances
+        meeting the conditions, in order, up to the limit.
+        """
+        cheap = Place()
+        cheap.name = 'Cheap Place'
+        cheap.price_by_night = 90001
+        dear = Place()
+        dear.price_by_night = 90002
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd(HBNBCommand().precmd(
+                'Place.where(price_by_night >= 90001, '
+                'order_by=-price_by_night, limit=1)'))
+        self.assertIn(dear.id, out.getvalue())
+        self.assertNotIn(cheap.id, out.getvalue())
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('where Place name = "Cheap Place"')
+        self.assertIn(cheap.id, out.getvalue())
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('where Place name ~ x')
+        self.assertEqual(out.getvalue(), '** invalid condition: name ~ x **\n')
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('where Place limit=-1')
+        self.assertEqual(out.getvalue(), '** invalid limit **\n')
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('where Nothing')
+        self.assertEqual(out.getvalue(), "** class doesn't exist **\n")
+
+    def test_convert(self):
+        """
+        Convert Command
+        This test checks that convert rewrites a snapshot in the
+        format of the destination and back.
+        """
+        directory = tempfile.mkdtemp()
+        source = os.path.join(directory, 'objects.json')
+        binary = os.path.join(directory, 'objects.bin')
+        back = os.path.join(directory, 'back.json')
+        with open(source, mode='w') as f:
+            f.write('{"City.1": {"__class__": "City", "id": "1", '
+                    '"created_at": "2020-02-17T16:32:39.023915", '
+                    '"updated_at": "2020-02-17T16:32:39.023915", '
+                    '"name": "Rabat"}}')
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('convert {} {}'.format(source, binary))
+            HBNBCommand().onecmd('convert {} {}'.format(binary, back))
+            HBNBCommand().onecmd('convert {} {} xml'.format(source, back))
+            HBNBCommand().onecmd('convert {}'.format(source))
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['1', '1', '** unknown format: xml **',
+                          '** file name missing **'])
+        with open(binary, mode='rb') as f:
+            self.assertTrue(f.read().startswith(b'HBNB'))
+        with open(source) as f, open(back) as g:
+            self.assertEqual(json.load(f), json.load(g))
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    def test_import_export(self):
+        """
+        Import and Export Commands
+        This test checks that import and export move objects through
+        a file, and report the errors.
+        """
+        directory = tempfile.mkdtemp()
+        file_path = os.path.join(directory, 'cities.csv')
+        city = City()
+        city.name = 'Tangier'
+        with patch('sys.stdout', new=StringIO()) as out:
+            HBNBCommand().onecmd('export {} City'.format(file_path))
+            models.storage.delete(city)
+            HBNBCommand().onecmd('import {} City'.format(file_path))
+            HBNBCommand().onecmd('import {} Nope'.format(file_path))
+            HBNBCommand().onecmd('import {}'.format(file_path + '.txt'))
+            HBNBCommand().onecmd('import')
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1:],
+                         [lines[0], "** class doesn't exist **",
+                          '** unknown format: cities.csv.txt **',
+                          '** file name missing **'])
+        self.assertEqual(models.storage.get(City, city.id).name, 'Tangier')
+        models.storage.delete(models.storage.get(City, city.id))
+        os.remove(file_path)
+        os.rmdir(directory)
+
+    def test_all_streaming(self):
+        """
+        All Command
+        This test checks that all prints the same list as before,
+        pages through the instances and prints JSON lines.
+        """
+        class Stay(BaseModel):
+            """Model whose instances only this test creates"""
+        try:
+            stays = [Stay() for i in range(5)]
+            for stay in stays:
+                stay.nights = 2
+
+            def run(line):
+                with patch('sys.stdout', new=StringIO()) as out:
+                    HBNBCommand().onecmd(HBNBCommand().precmd(line))
+                return out.getvalue()
+
+            self.assertEqual(run('all Stay'),
+                             str([str(stay) for stay in stays]) + '\n')
+            self.assertEqual(run('Stay.all()'), run('all Stay'))
+            self.assertEqual(run('all Stay limit=2 offset=1'),
+                             str([str(stay) for stay in stays[1:3]]) + '\n')
+            self.assertEqual(run('Stay.all(limit=2, after={})'.format(
+                stays[2].id)), str([str(stay) for stay in stays[3:]]) + '\n')
+            self.assertEqual(run('all Stay offset=5'), '[]\n')
+            lines = run('all Stay format=jsonl limit=3').splitlines()
+            self.assertEqual([json.loads(line) for line in lines],
+                             [stay.to_dict() for stay in stays[:3]])
+            for dic in map(json.loads, lines):
+                self.assertEqual(dic['nights'], 2)
+            self.assertEqual(run('all Stay after=nope'),
+                             '** no instance found **\n')
+            self.assertEqual(run('all Stay limit=-1'), '** invalid page **\n')
+            self.assertEqual(run('all Stay format=xml'),
+                             '** invalid format **\n')
+            self.assertEqual(run('all Stay color=red'),
+                             '** invalid option: color=red **\n')
+            self.assertEqual(run('all Nope'), "** class doesn't exist **\n")
+        finally:
+            for stay in stays:
+                models.storage.delete(stay)
+            del HBNBCommand.allowed_classes['Stay']
+
+    def test_run_batch(self):
+        """
+        Run a Batch
+        This test checks that a batch runs its commands with one save
+        per flush, stops at quit and reports the timings.
+        """
+        lines = ['create City', '', 'create City', 'City.count()',
+                 'create City', 'quit', 'create City']
+        report = StringIO()
+        with patch.object(models.storage, 'save',
+                          wraps=models.storage.save) as save, \
+                patch('sys.stdout', new=StringIO()) as out:
+            count = HBNBCommand().run_batch(lines, flush_every=2,
+                                            report=report)
+        self.assertEqual(count, 5)
+        ids = out.getvalue().splitlines()
+        self.assertEqual(len(ids), 4)
+        for id in ids[:2] + ids[3:]:
+            self.assertIsNotNone(models.storage.get(City, id))
+            models.storage.delete(models.storage.get(City, id))
+        self.assertEqual(save.call_count, 3 + 2)
+        lines = report.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('5 commands in '))
+        self.assertEqual([line.split()[:2] for line in lines[1:]],
+                         [['count', '1'], ['create', '3'], ['quit', '1']])
@@ -12,7 +12,7 @@ import pep8
 import unittest
 import uuid
 from datetime import datetime
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
 from models.city import City
 from models.place import Place
 from models.amenity import Amenity
@@ -267,6 +267,71 @@ class TestBaseModel(unittest.TestCase):
         self.assertIsInstance(base_dict['created_at'], str)
         self.assertIsInstance(base_dict['updated_at'], str)
 
+    def test_registry(self):
+        """
+        the model classes are registered by name
+        """
+        for cls in (BaseModel, City, Place, Amenity, State, Review):
+            self.assertIs(classes[cls.__name__], cls)
+
+        class Booking(BaseModel):
+            """Model defined after the others"""
+        self.assertIs(classes["Booking"], Booking)
+        del classes["Booking"]
+
+
+class TestCompactModel(unittest.TestCase):
+    """Test Class for the compact variants of the models."""
+
+    def test_compact_class(self):
+        """
+        the compact variant is a cached, unregistered subclass
+        """
+        compact = Place.compact_class()
+        self.assertIs(Place.compact_class(), compact)
+        self.assertIs(compact.compact_class(), compact)
+        self.assertTrue(issubclass(compact, Place))
+        self.assertEqual(compact.__name__, "Place")
+        self.assertIs(classes["Place"], Place)
+
+    def test_schema(self):
+        """
+        the schema lists the class attributes and their defaults
+        """
+        schema = City.schema()
+        self.assertEqual(schema, {"state_id": "", "name": ""})
+
+    def test_compact_instance(self):
+        """
+        compact instances behave as the regular ones
+        """
+        dic = {"id": "7734cf23-6c89-4662-8483-284727324c77", "created_at":
+               "2020-02-17T16:32:39.023915", "updated_at":
+               "2020-02-17T16:32:39.023940", "__class__": "Place",
+               "name": "Riad", "max_guest": 4}
+        regular = Place(**dic)
+        compact = Place.compact_class()(**dic)
+        self.assertEqual(compact.to_dict(), regular.to_dict())
+        self.assertEqual(str(compact), str(regular))
+        self.assertEqual(compact.city_id, "")
+        self.assertEqual(compact.__dict__, {})
+        setattr(compact, "wifi", "yes")
+        compact.max_guest = 6
+        self.assertEqual(compact.to_dict()["wifi"], "yes")
+        self.assertEqual(compact.to_dict()["max_guest"], 6)
+        with self.assertRaises(AttributeError):
+            compact.missing
+
+    def test_interned_foreign_keys(self):
+        """
+        indexed foreign keys are shared between compact instances
+        """
+        compact = Review.compact_class()
+        place_id = "".join(["place", "-", "1"])
+        first = compact(id="1", place_id=place_id)
+        second = compact(id="2", place_id="".join(["place", "-", "1"]))
+        self.assertIs(first.place_id, second.place_id)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+"""
+Test Async Storage
+This module contains unit tests for the AsyncStorage class
+in the engine module
+"""
+
+import asyncio
+import json
+import os
+import pep8
+import time
+import unittest
+from unittest.mock import patch
+import models
+from models.city import City
+from models.engine.async_storage import AsyncStorage
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+class TestAsyncStorage(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the AsyncStorage class in the engine module.
+    """
+
+    def setUp(self):
+        """Wrap the storage, emptied, in thread-safe mode."""
+        models.storage.clear()
+        FileStorage.thread_safe = True
+        self.storage = AsyncStorage(models.storage)
+
+    def tearDown(self):
+        """Leave the thread-safe mode and remove the snapshot."""
+        FileStorage.thread_safe = False
+        models.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_pep8_conformance_async_storage(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/async_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_thread_safe_mode(self):
+        """The storage must be in a thread-safe mode already"""
+        FileStorage.thread_safe = False
+        with self.assertRaises(ValueError):
+            AsyncStorage(models.storage)
+        self.assertFalse(FileStorage.thread_safe)
+        FileStorage.write_behind = True
+        try:
+            AsyncStorage(models.storage)
+        finally:
+            FileStorage.write_behind = False
+
+    async def test_save_and_reload(self):
+        """Saves and reloads run in the executor"""
+        user = User()
+        await self.storage.asave()
+        with open("objects.json", "r") as f:
+            self.assertIn("User." + user.id, json.load(f))
+        self.storage.clear()
+        await self.storage.areload()
+        self.assertEqual(self.storage.get(User, user.id).id, user.id)
+        await self.storage.aflush()
+
+    async def test_loop_not_blocked(self):
+        """The loop goes on while a save writes the snapshot"""
+        ticks = []
+
+        def slow_save(storage):
+            time.sleep(0.2)
+
+        async def tick():
+            for i in range(10):
+                ticks.append(i)
+                await asyncio.sleep(0.01)
+
+        with patch.object(FileStorage, "save", slow_save):
+            await asyncio.gather(self.storage.asave(), tick())
+        self.assertEqual(len(ticks), 10)
+
+    async def test_coalesced(self):
+        """Saves asked for while another one runs are made together"""
+        saves = []
+
+        def slow_save(storage):
+            saves.append(storage)
+            time.sleep(0.05)
+
+        with patch.object(FileStorage, "save", slow_save):
+            await asyncio.gather(*(self.storage.asave() for i in range(10)))
+            self.assertEqual(len(saves), 1)
+            first = asyncio.ensure_future(self.storage.asave())
+            await asyncio.sleep(0.01)
+            await asyncio.gather(first,
+                                 *(self.storage.asave() for i in range(5)))
+        self.assertEqual(len(saves), 3)
+
+    async def test_error(self):
+        """The error of a save is raised to the coroutines asking for it"""
+        def fail(storage):
+            raise OSError("disk full")
+
+        with patch.object(FileStorage, "save", fail):
+            results = await asyncio.gather(self.storage.asave(),
+                                           self.storage.asave(),
+                                           return_exceptions=True)
+        self.assertTrue(all(isinstance(result, OSError)
+                            for result in results))
+        await self.storage.asave()
+
+    async def test_all(self):
+        """Instances are iterated asynchronously, in chunks"""
+        self.storage.chunk = 2
+        cities = [City() for i in range(5)]
+        User()
+        found = [obj async for obj in self.storage.aall(City)]
+        self.assertEqual(sorted(obj.id for obj in found),
+                         sorted(city.id for city in cities))
+        self.assertEqual(len([obj async for obj in self.storage.aall()]), 6)
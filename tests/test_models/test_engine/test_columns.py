@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""
+Test Columns
+This module contains unit tests for the ColumnStore class
+in the engine module
+"""
+
+import pep8
+import unittest
+from models.engine import columns
+from models.engine.columns import ColumnStore
+from models.place import Place
+
+
+class TestColumnStore(unittest.TestCase):
+    """
+    Unit tests for the ColumnStore class in the engine module.
+    """
+
+    def setUp(self):
+        """Store a few places."""
+        self.store = ColumnStore(("price_by_night", "max_guest"))
+        for i, (price, guests) in enumerate([(80, 2), (120, 4),
+                                             (60, 6), (200, 8)]):
+            place = Place(id=str(i), price_by_night=price, max_guest=guests)
+            self.store.set("Place." + str(i), place)
+
+    def test_pep8_conformance_columns(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/columns.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def check_queries(self):
+        """Run the queries checked by both implementations"""
+        self.assertEqual(sorted(self.store.select(price_by_night=(None,
+                                                                  100))),
+                         ["Place.0", "Place.2"])
+        self.assertEqual(self.store.select(price_by_night=(70, 150),
+                                           max_guest=(4, None)),
+                         ["Place.1"])
+        self.assertEqual(self.store.select(max_guest=6), ["Place.2"])
+        self.assertEqual(len(self.store.select()), 4)
+
+    def test_select(self):
+        """Range and equality conditions select the matching keys"""
+        self.check_queries()
+
+    def test_select_without_numpy(self):
+        """The queries give the same keys without NumPy"""
+        numpy = columns.numpy
+        columns.numpy = None
+        try:
+            self.check_queries()
+        finally:
+            columns.numpy = numpy
+
+    def test_update_and_remove(self):
+        """Rows follow updates and freed rows are reused"""
+        self.store.set("Place.0", Place(id="0", price_by_night=500))
+        self.assertEqual(self.store.select(price_by_night=500), ["Place.0"])
+        self.store.remove("Place.1")
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.select(max_guest=4), [])
+        self.store.set("Place.9", Place(id="9", max_guest=4))
+        self.assertEqual(self.store.select(max_guest=4), ["Place.9"])
+        self.assertEqual(len(self.store.keys), 4)
+
+    def test_not_a_number(self):
+        """Values that are not numbers never match"""
+        self.store.set("Place.0", Place(id="0", price_by_night="free"))
+        self.assertNotIn("Place.0", self.store.select(price_by_night=(None,
+                                                                      None)))
+
+    def test_unknown_field(self):
+        """Conditions on attributes not stored are rejected"""
+        with self.assertRaises(KeyError):
+            self.store.select(name="Riad")
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""
+Test DB Storage
+This module contains unit tests for the DBStorage class
+in the engine module
+"""
+
+import models
+import os
+import pep8
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from models.city import City
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.user import User
+
+
+class TestDBStorage(unittest.TestCase):
+    """
+    Unit tests for the DBStorage class in the engine module.
+    """
+
+    def setUp(self):
+        """Open a new database and use it as the storage."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'hbnb.db')
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+        self.previous = models.storage
+        models.storage = self.storage
+
+    def tearDown(self):
+        """Restore the storage and remove the database."""
+        models.storage = self.previous
+        self.storage.close()
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def make(cls, **attributes):
+        """Create an instance of cls with the given attributes."""
+        obj = cls()
+        for name, value in attributes.items():
+            setattr(obj, name, value)
+        return obj
+
+    def test_pep8_conformance_db_storage(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/db_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_wal_and_tables(self):
+        """Test the database is in WAL mode with one table per class"""
+        connection = sqlite3.connect(self.path)
+        mode, = connection.execute('PRAGMA journal_mode').fetchone()
+        tables = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        connection.close()
+        self.assertEqual(mode, 'wal')
+        self.assertTrue({'User', 'City', 'Place', 'Review'} <= tables)
+        self.assertIn('City_state_id', indexes)
+        self.assertIn('Place_city_id', indexes)
+
+    def test_save_and_reload(self):
+        """Test saved objects are read back from a new connection"""
+        user = self.make(User, email='a@b.c')
+        user.save()
+        key = 'User.' + user.id
+        self.assertIs(self.storage.all()[key], user)
+        self.assertIs(self.storage.get(User, user.id), user)
+        other = DBStorage(self.path)
+        other.reload()
+        loaded = other.get('User', user.id)
+        other.close()
+        self.assertIsNot(loaded, user)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+
+    def test_reload_discards_uncommitted(self):
+        """Test reload discards the changes not saved"""
+        user = User()
+        user.save()
+        self.storage.new(User())
+        user.first_name = 'Betty'
+        self.storage.count()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.storage.get(User, user.id).first_name, '')
+
+    def test_update_and_delete(self):
+        """Test an attribute change is saved and deletion removes it"""
+        city = self.make(City, name='Paris', state_id='1')
+        city.save()
+        city.state_id = '2'
+        self.storage.save()
+        self.assertEqual(list(self.storage.find(City, state_id='2')),
+                         ['City.' + city.id])
+        self.assertEqual(self.storage.find(City, state_id='1'), {})
+        self.storage.delete(city)
+        self.storage.save()
+        self.assertEqual(self.storage.count(City), 0)
+        self.assertIsNone(self.storage.get(City, city.id))
+        self.assertIsNone(self.storage.delete(None))
+
+    def test_deletion_saved(self):
+        """Test an attribute deletion is saved"""
+        user = self.make(User, nickname='Betty')
+        user.save()
+        del user.nickname
+        self.storage.save()
+        other = DBStorage(self.path)
+        other.reload()
+        loaded = other.get('User', user.id)
+        other.close()
+        self.assertFalse(hasattr(loaded, 'nickname'))
+
+    def test_find_on_other_attributes(self):
+        """Test find filters attributes without a column"""
+        self.make(City, name='Paris', state_id='1')
+        self.make(City, name='Lyon', state_id='1')
+        found = self.storage.find(City, state_id='1', name='Lyon')
+        self.assertEqual([obj.name for obj in found.values()], ['Lyon'])
+
+    def test_query(self):
+        """Test query filters in SQL and in Python, orders and limits"""
+        paris = self.make(Place, name='Paris', price_by_night=120)
+        self.make(Place, name='Versailles', price_by_night=80)
+        lyon = self.make(Place, name='Lyon', price_by_night=200)
+        found = self.storage.query(Place, [('price_by_night', '>', 100)],
+                                   '-price_by_night', 1)
+        self.assertEqual(found, [lyon])
+        found = self.storage.query('Place', [('price_by_night', '>=', 80),
+                                             ('name', '<', 'S')],
+                                   'name')
+        self.assertEqual(found, [lyon, paris])
+        self.assertIn('price_by_night', self.storage.explain(
+            Place, [('price_by_night', '>', 100)]))
+        self.assertEqual(self.storage.query(User), [])
+
+    def test_select_near_within(self):
+        """Test the numeric and location queries"""
+        paris = self.make(Place, price_by_night=120,
+                          latitude=48.8566, longitude=2.3522)
+        versailles = self.make(Place, price_by_night=80,
+                               latitude=48.8049, longitude=2.1204)
+        lyon = self.make(Place, price_by_night='cheap',
+                         latitude=45.764, longitude=4.8357)
+        self.assertEqual(sorted(self.storage.select(
+            Place, price_by_night=(None, 150))),
+            sorted([paris.id, versailles.id]))
+        self.assertEqual(self.storage.select(Place, price_by_night=80),
+                         [versailles.id])
+        with self.assertRaises(KeyError):
+            self.storage.select(Place, name='x')
+        self.assertEqual(self.storage.near(Place, 48.8566, 2.3522, 30),
+                         [paris, versailles])
+        self.assertEqual(self.storage.near(Place, 48.8566, 2.3522, 1000),
+                         [paris, versailles, lyon])
+        self.assertEqual(self.storage.within(Place, 45, 4, 46, 5), [lyon])
+        self.assertEqual(self.storage.within(User, 45, 4, 46, 5), [])
+
+    def test_batch(self):
+        """Test a batch commits once, or rolls back on an exception"""
+        with self.storage.batch():
+            users = [self.make(User, email='{}@b.c'.format(i))
+                     for i in range(3)]
+            for user in users:
+                user.save()
+            other = DBStorage(self.path)
+            other.reload()
+            self.assertEqual(other.count(User), 0)
+        other.reload()
+        self.assertEqual(other.count(User), 3)
+        other.close()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                users[0].email = 'changed'
+                users[0].save()
+                self.storage.delete(users[1])
+                self.storage.save()
+                raise RuntimeError('abort')
+        self.assertEqual(self.storage.count(User), 3)
+        self.assertEqual(self.storage.get(User, users[0].id).email, '0@b.c')
+
+
+if __name__ == '__main__':
+    unittest.main()
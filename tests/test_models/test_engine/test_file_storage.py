@@ -6,21 +6,32 @@ in the engine module
 """
 
 import json
+import multiprocessing
+import threading
 import unittest
 import uuid
 import pep8
 import os
 from datetime import datetime
+from unittest.mock import patch
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
-from models.engine.file_storage import FileStorage
+from models.engine.file_storage import ConflictError, FileStorage
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 
 
+def user_with_id(id):
+    """Add a user with the given id to the storage."""
+    now = datetime.now().isoformat()
+    user = User(id=id, created_at=now, updated_at=now)
+    FileStorage().new(user)
+    return user
+
+
 class TestFileStorage(unittest.TestCase):
     """
     Unit tests for the FileStorage class in the engine module.
@@ -123,3 +134,1210 @@ class TestFileStorage(unittest.TestCase):
         result = pep8style.check_files(['models/engine/file_storage.py'])
         self.assertEqual(result.total_errors, 0,
                          "Found code style errors (and warnings).")
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """
+    Unit tests for the journal mode of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Enable the journal and start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.storage.save()
+        FileStorage.journal = True
+
+    def tearDown(self):
+        """Disable the journal and remove the files it produced."""
+        FileStorage.journal = False
+        FileStorage.journal_limit = 4 * 1024 * 1024
+        for name in ("objects.json", "objects.json.log"):
+            try:
+                os.remove(name)
+            except Exception:
+                pass
+
+    def test_save_appends_records(self):
+        """save() appends one record per change, not a snapshot"""
+        user = User()
+        user.save()
+        with open("objects.json", "r") as f:
+            self.assertEqual(json.load(f), {})
+        with open("objects.json.log", "r") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["op"], "upsert")
+        self.assertEqual(records[0]["key"], "User." + user.id)
+
+    def test_reload_replays_journal(self):
+        """reload() replays upserts and deletes on top of the snapshot"""
+        user = User()
+        user.first_name = "Betty"
+        user.save()
+        city = City()
+        city.save()
+        self.storage.delete(city)
+        self.storage.save()
+        self.storage.clear()
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertEqual(objs["User." + user.id].first_name, "Betty")
+        self.assertNotIn("City." + city.id, objs)
+
+    def test_torn_record_is_ignored(self):
+        """A partial last record does not prevent the reload"""
+        user = User()
+        user.save()
+        with open("objects.json.log", "a") as f:
+            f.write('{"op": "upsert", "key": "User.x", "val')
+        self.storage.clear()
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+        self.assertNotIn("User.x", self.storage.all())
+
+    def test_compaction(self):
+        """The journal is folded into the snapshot past its limit"""
+        FileStorage.journal_limit = 1
+        user = User()
+        user.save()
+        self.assertFalse(os.path.exists("objects.json.log"))
+        with open("objects.json", "r") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+    def test_nothing_to_save(self):
+        """A save with nothing pending and no journal does nothing"""
+        self.storage.save()
+        self.assertFalse(os.path.exists("objects.json.log"))
+        FileStorage.journal_limit = 1
+        User().save()
+        self.storage.save()
+        self.assertFalse(os.path.exists("objects.json.log"))
+
+
+class TestFileStorageClassIndex(unittest.TestCase):
+    """
+    Unit tests for the class-scoped queries of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+
+    def tearDown(self):
+        """Remove the file written by the tests."""
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_all_cls(self):
+        """all(cls) only returns the instances of cls"""
+        user = User()
+        City()
+        self.assertEqual(self.storage.all(User), {"User." + user.id: user})
+        self.assertEqual(self.storage.all("User"), {"User." + user.id: user})
+        self.assertEqual(self.storage.all(State), {})
+
+    def test_count(self):
+        """count() counts all instances or those of one class"""
+        User()
+        User()
+        City()
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertEqual(self.storage.count("City"), 1)
+
+    def test_shared_prefix(self):
+        """Classes whose names share a prefix are kept apart"""
+        class PlaceTag(BaseModel):
+            """Model whose name starts with Place"""
+        Place()
+        PlaceTag()
+        self.assertEqual(self.storage.count(Place), 1)
+        self.assertEqual(self.storage.count(PlaceTag), 1)
+
+    def test_delete_and_reload(self):
+        """The index follows deletions and reloads"""
+        user = User()
+        city = City()
+        self.storage.save()
+        self.storage.delete(city)
+        self.assertEqual(self.storage.count(City), 0)
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(City), 1)
+        self.assertIn("User." + user.id, self.storage.all(User))
+
+
+class TestFileStorageFind(unittest.TestCase):
+    """
+    Unit tests for the attribute indexes of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+
+    def test_find_indexed(self):
+        """find() answers foreign key lookups"""
+        city = City()
+        city.state_id = "s1"
+        other = City()
+        other.state_id = "s2"
+        self.assertEqual(self.storage.find(City, state_id="s1"),
+                         {"City." + city.id: city})
+        self.assertEqual(self.storage.find("City", state_id="s3"), {})
+
+    def test_find_follows_updates(self):
+        """The indexes follow attribute assignments and deletions"""
+        review = Review()
+        review.place_id = "p1"
+        review.user_id = "u1"
+        self.assertEqual(len(self.storage.find(Review, place_id="p1")), 1)
+        setattr(review, "place_id", "p2")
+        self.assertEqual(self.storage.find(Review, place_id="p1"), {})
+        self.assertEqual(len(self.storage.find(Review, place_id="p2",
+                                               user_id="u1")), 1)
+        self.storage.delete(review)
+        self.assertEqual(self.storage.find(Review, place_id="p2"), {})
+
+    def test_find_unhashable(self):
+        """An unhashable value matches nothing"""
+        City().state_id = "x"
+        self.assertEqual(self.storage.find(City, state_id=["x"]), {})
+
+    def test_find_not_indexed(self):
+        """find() scans the class for attributes without an index"""
+        user = User()
+        user.email = "a@b.c"
+        User()
+        self.assertEqual(self.storage.find(User, email="a@b.c"),
+                         {"User." + user.id: user})
+
+    def test_query_plans(self):
+        """query() uses an index, the columns, or a scan"""
+        city = City()
+        city.state_id = "s1"
+        city.name = "Rabat"
+        other = City()
+        other.state_id = "s1"
+        other.name = "Sale"
+        self.assertEqual(self.storage.query(City, [("state_id", "==", "s1"),
+                                                   ("name", "!=", "Sale")]),
+                         [city])
+        conditions = [("name", "==", "x"), ("state_id", "==", "s1")]
+        self.assertEqual(self.storage.explain(City, conditions),
+                         "index state_id")
+        self.assertEqual(self.storage.explain("City", [("name", "<", "S")]),
+                         "scan")
+        Place().price_by_night = 90
+        self.assertEqual(self.storage.explain(Place, [
+            ("price_by_night", ">", 10), ("price_by_night", "<=", 90)]),
+            "columns price_by_night")
+        with self.assertRaises(ValueError):
+            self.storage.query(City, [("name", "~", "R")])
+
+    def test_query_order_and_limit(self):
+        """query() orders the matching instances and keeps the first"""
+        places = []
+        for price in (50, 120, 80, 200):
+            place = Place()
+            place.price_by_night = price
+            places.append(place)
+        found = self.storage.query(Place, [("price_by_night", ">=", 80)],
+                                   "-price_by_night", 2)
+        self.assertEqual(found, [places[3], places[1]])
+        found = self.storage.query(Place, [("price_by_night", "<", 150)],
+                                   "price_by_night")
+        self.assertEqual(found, [places[0], places[2], places[1]])
+        self.assertEqual(len(self.storage.query(Place, limit=3)), 3)
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """
+    Unit tests for the lazy reload mode of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Save a few objects and reload them lazily."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.city = City()
+        self.city.state_id = "s1"
+        self.storage.save()
+        self.storage.clear()
+        FileStorage.lazy = True
+        self.storage.reload()
+
+    def tearDown(self):
+        """Disable the lazy mode and remove the snapshot."""
+        FileStorage.lazy = False
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_nothing_materialized(self):
+        """reload() only records offsets"""
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.storage._FileStorage__objects, {})
+
+    def test_get(self):
+        """get() materializes a single object"""
+        user = self.storage.get(User, self.user.id)
+        self.assertEqual(user.first_name, "Betty")
+        self.assertIs(self.storage.get("User", self.user.id), user)
+        self.assertEqual(len(self.storage._FileStorage__objects), 1)
+        self.assertIsNone(self.storage.get(User, "nope"))
+
+    def test_all_cls(self):
+        """all(cls) materializes only the objects of cls"""
+        cities = self.storage.all(City)
+        self.assertEqual(list(cities), ["City." + self.city.id])
+        self.assertNotIn("User." + self.user.id,
+                         self.storage._FileStorage__objects)
+        self.assertEqual(len(self.storage.find(City, state_id="s1")), 1)
+
+    def test_all_and_save(self):
+        """all() and save() materialize every object"""
+        self.assertEqual(len(self.storage.all()), 2)
+        self.storage.get(User, self.user.id).last_name = "Holberton"
+        self.storage.save()
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, self.user.id).last_name,
+                         "Holberton")
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_legacy_layout(self):
+        """A snapshot written on a single line is loaded eagerly"""
+        with open("objects.json", "w") as f:
+            json.dump({"User.1": {"__class__": "User", "id": "1",
+                                  "created_at": "2020-02-17T16:32:39.023915",
+                                  "updated_at": "2020-02-17T16:32:39.023940"}},
+                      f)
+        self.storage.clear()
+        self.storage.reload()
+        self.assertIn("User.1", self.storage._FileStorage__objects)
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    """
+    Unit tests for the atomic writes of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty snapshot."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.storage.save()
+
+    def tearDown(self):
+        """Restore the default policy and remove the snapshot."""
+        self.storage.sync()
+        FileStorage.durability = 'never'
+        FileStorage.group_commit_ms = 100
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def saved_keys(self):
+        """Return the keys of the snapshot on disk"""
+        with open("objects.json", "r") as f:
+            return list(json.load(f))
+
+    def test_always(self):
+        """The snapshot is replaced without leaving temporary files"""
+        FileStorage.durability = 'always'
+        user = User()
+        user.save()
+        self.assertEqual(self.saved_keys(), ["User." + user.id])
+        leftovers = [name for name in os.listdir(".")
+                     if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_batch(self):
+        """The batch policy holds the snapshot until the group commit"""
+        FileStorage.durability = 'batch'
+        FileStorage.group_commit_ms = 60000
+        user = User()
+        user.save()
+        self.assertEqual(self.saved_keys(), [])
+        self.storage.sync()
+        self.assertEqual(self.saved_keys(), ["User." + user.id])
+
+    def test_batch_timer(self):
+        """The group commit happens on its own after the window"""
+        FileStorage.durability = 'batch'
+        FileStorage.group_commit_ms = 10
+        user = User()
+        user.save()
+        timer = self.storage._FileStorage__commit_timer
+        if timer is not None:
+            timer.join()
+        self.assertEqual(self.saved_keys(), ["User." + user.id])
+
+    def test_unknown_policy(self):
+        """An unknown policy is rejected"""
+        FileStorage.durability = 'sometimes'
+        with self.assertRaises(ValueError):
+            self.storage.save()
+
+
+class TestFileStorageDirty(unittest.TestCase):
+    """
+    Unit tests for the dirty tracking of the FileStorage class.
+    """
+
+    class Counted(BaseModel):
+        """Model counting its encodings"""
+        encoded = 0
+
+        def to_dict(self):
+            """Count the call"""
+            type(self).encoded += 1
+            return super().to_dict()
+
+    def setUp(self):
+        """Start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.Counted.encoded = 0
+
+    def tearDown(self):
+        """Remove the snapshot."""
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_only_dirty_encoded(self):
+        """save() only encodes the objects changed since the last save"""
+        first = self.Counted()
+        self.Counted()
+        self.storage.save()
+        self.assertEqual(self.Counted.encoded, 2)
+        self.storage.save()
+        self.assertEqual(self.Counted.encoded, 2)
+        first.name = "changed"
+        self.storage.save()
+        self.assertEqual(self.Counted.encoded, 3)
+        with open("objects.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["Counted." + first.id]["name"], "changed")
+
+    def test_deletion_saved(self):
+        """A deleted attribute is dropped from the file, the indexes
+        and, on a rollback, put back"""
+        user = User()
+        user.first_name = "A"
+        user.nickname = "B"
+        user.save()
+        del user.first_name
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            self.assertNotIn("first_name", json.load(f)["User." + user.id])
+        city = City()
+        city.state_id = "1"
+        del city.state_id
+        self.assertEqual(self.storage.find(City, state_id="1"), {})
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                del user.nickname
+                raise RuntimeError("abort")
+        self.assertEqual(user.nickname, "B")
+
+    def test_reload_keeps_encoding(self):
+        """Reloaded objects are not encoded again until they change"""
+        user = User()
+        user.first_name = "Betty"
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            before = f.read()
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage._FileStorage__fragments,
+                         {"User." + user.id:
+                          json.dumps(json.loads(before)["User." + user.id])})
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            self.assertEqual(f.read(), before)
+
+    def test_lazy_save_moves_offsets(self):
+        """Objects not instantiated yet survive a save in lazy mode"""
+        users = [User() for i in range(3)]
+        city = City()
+        self.storage.save()
+        self.storage.clear()
+        FileStorage.lazy = True
+        try:
+            self.storage.reload()
+            self.storage.get(City, city.id).name = "Rabat"
+            self.storage.save()
+            for user in users:
+                self.assertEqual(self.storage.get(User, user.id).id, user.id)
+            self.storage.clear()
+            self.storage.reload()
+            self.assertEqual(self.storage.get(City, city.id).name, "Rabat")
+            self.assertEqual(self.storage.count(User), 3)
+        finally:
+            FileStorage.lazy = False
+
+    def test_escaped_ids(self):
+        """Ids escaped in JSON are read back as they were"""
+        ids = ["caf\u00e9", "a\\b", 'q"x', 'odd": id']
+        for lazy in (False, True):
+            self.storage.clear()
+            for id in ids:
+                user_with_id(id)
+            self.storage.save()
+            FileStorage.lazy = lazy
+            try:
+                for i in range(2):
+                    self.storage.clear()
+                    self.storage.reload()
+                    self.assertEqual(sorted(self.storage.all(User)),
+                                     sorted("User." + id for id in ids))
+                    for id in ids:
+                        self.assertEqual(self.storage.get(User, id).id, id)
+                    self.storage.save()
+            finally:
+                FileStorage.lazy = False
+
+
+class TestFileStorageCompact(unittest.TestCase):
+    """
+    Unit tests for the compact models mode of the FileStorage class.
+    """
+
+    def tearDown(self):
+        """Disable the mode and remove the snapshot."""
+        FileStorage.compact_models = False
+        FileStorage().clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_reload_compact(self):
+        """Reloaded objects are compact and saved back unchanged"""
+        storage = FileStorage()
+        storage.clear()
+        place = Place()
+        place.name = "Riad"
+        storage.save()
+        storage.clear()
+        FileStorage.compact_models = True
+        storage.reload()
+        loaded = storage.get(Place, place.id)
+        self.assertIs(type(loaded), Place.compact_class())
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        loaded.name = "Dar"
+        loaded.save()
+        storage.clear()
+        storage.reload()
+        self.assertEqual(storage.get(Place, place.id).name, "Dar")
+
+
+class TestFileStorageSelect(unittest.TestCase):
+    """
+    Unit tests for the column queries of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+
+    def test_select(self):
+        """select() follows creations, updates and deletions"""
+        cheap = Place()
+        cheap.price_by_night = 50
+        cheap.max_guest = 4
+        dear = Place()
+        dear.price_by_night = 300
+        self.assertEqual(self.storage.select(Place, price_by_night=(None,
+                                                                    100)),
+                         [cheap.id])
+        dear.price_by_night = 90
+        self.assertEqual(sorted(self.storage.select("Place",
+                                                    price_by_night=(0, 100))),
+                         sorted([cheap.id, dear.id]))
+        self.storage.delete(cheap)
+        self.assertEqual(self.storage.select(Place, max_guest=4), [])
+        self.assertEqual(self.storage.select(City), [])
+
+    def test_near_and_within(self):
+        """The grid index follows creations, updates and deletions"""
+        rabat = Place()
+        rabat.latitude = 34.0209
+        rabat.longitude = -6.8416
+        casa = Place()
+        casa.latitude = 33.5731
+        casa.longitude = -7.5898
+        self.assertEqual(self.storage.near(Place, 34, -6.8, 10), [rabat])
+        self.assertEqual(self.storage.near("Place", 34, -6.8, 100),
+                         [rabat, casa])
+        casa.latitude = 34.03
+        casa.longitude = -6.84
+        self.assertEqual(len(self.storage.within(Place, 34, -7, 35, -6)), 2)
+        self.storage.delete(rabat)
+        self.assertEqual(self.storage.near(Place, 34, -6.8, 10), [casa])
+        self.assertEqual(self.storage.near(City, 34, -6.8, 10), [])
+
+
+class TestFileStorageFormat(unittest.TestCase):
+    """
+    Unit tests for the snapshot formats of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+
+    def tearDown(self):
+        """Restore the JSON format and remove the snapshot."""
+        FileStorage.format = None
+        FileStorage.lazy = False
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_binary_round_trip(self):
+        """A binary snapshot is read back whatever the format setting"""
+        FileStorage.format = "binary"
+        place = Place()
+        place.name = "Dar"
+        place.latitude = 34.02
+        place.amenity_ids = ["1", "2"]
+        place.save()
+        with open("objects.json", "rb") as f:
+            self.assertTrue(f.read().startswith(b"HBNB"))
+        FileStorage.format = None
+        FileStorage.lazy = True
+        self.storage.clear()
+        self.storage.reload()
+        loaded = self.storage.get(Place, place.id)
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertEqual(self.storage.near(Place, 34.02, 0, 1), [loaded])
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            self.assertIn("Place." + place.id, json.load(f))
+
+    def test_unknown_format(self):
+        """An unknown format is rejected"""
+        FileStorage.format = "xml"
+        with self.assertRaises(ValueError):
+            self.storage.save()
+
+
+class TestFileStorageShards(unittest.TestCase):
+    """
+    Unit tests for the sharded snapshots of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Enable the shards and start from an empty storage."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        FileStorage.shards = True
+
+    def tearDown(self):
+        """Disable the shards and remove the files they produced."""
+        FileStorage.shards = False
+        FileStorage.partitions = {}
+        FileStorage.lazy = False
+        FileStorage.journal = False
+        self.storage.clear()
+        for name in os.listdir("."):
+            if name.startswith("objects.") and name != "objects.py":
+                os.remove(name)
+
+    def test_only_changed_shards_written(self):
+        """save() rewrites the shards of the changed objects only"""
+        user = User()
+        city = City()
+        city.save()
+        self.assertFalse(os.path.exists("objects.json"))
+        with open("objects.User.json", "r") as f:
+            self.assertEqual(list(json.load(f)), ["User." + user.id])
+        before = os.stat("objects.User.json").st_ino
+        city.name = "Rabat"
+        self.storage.save()
+        self.assertEqual(os.stat("objects.User.json").st_ino, before)
+        with open("objects.City.json", "r") as f:
+            self.assertEqual(json.load(f)["City." + city.id]["name"],
+                             "Rabat")
+        self.storage.delete(city)
+        self.storage.save()
+        with open("objects.City.json", "r") as f:
+            self.assertEqual(json.load(f), {})
+
+    def test_lazy_class_loading(self):
+        """In lazy mode a class is read on its first access"""
+        user = User()
+        city = City()
+        city.save()
+        FileStorage.lazy = True
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage._FileStorage__objects, {})
+        self.assertEqual(self.storage.get(City, city.id).id, city.id)
+        self.assertNotIn("User." + user.id, self.storage.all(City))
+        self.assertEqual(len(self.storage._FileStorage__objects), 1)
+        other = User()
+        other.save()
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_escaped_ids(self):
+        """Ids escaped in JSON are read back from the shards"""
+        ids = ["caf\u00e9", 'q"x']
+        for id in ids:
+            user_with_id(id)
+        self.storage.save()
+        FileStorage.lazy = True
+        self.storage.clear()
+        self.storage.reload()
+        for id in ids:
+            self.assertEqual(self.storage.get(User, id).id, id)
+
+    def test_partitions(self):
+        """Partitioned classes are hashed into several files"""
+        FileStorage.partitions = {"Review": 4}
+        reviews = [Review() for i in range(20)]
+        self.storage.save()
+        names = [name for name in os.listdir(".")
+                 if name.startswith("objects.Review.")]
+        self.assertEqual(len(names), 4)
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(sorted(self.storage.all(Review)),
+                         sorted("Review." + r.id for r in reviews))
+        FileStorage.partitions = {}
+        self.storage.get(Review, reviews[0].id).text = "Great"
+        self.storage.save()
+        self.assertEqual([name for name in os.listdir(".")
+                          if name.startswith("objects.Review.")],
+                         ["objects.Review.json"])
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(Review), 20)
+
+    def test_split_and_journal(self):
+        """A single snapshot is split, and the journal folded in shards"""
+        FileStorage.shards = False
+        state = State()
+        state.save()
+        FileStorage.shards = True
+        FileStorage.journal = True
+        self.storage.clear()
+        self.storage.reload()
+        amenity = Amenity()
+        self.storage.save()
+        self.assertTrue(os.path.exists("objects.json.log"))
+        self.storage.compact()
+        self.assertFalse(os.path.exists("objects.json"))
+        self.assertFalse(os.path.exists("objects.json.log"))
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(sorted(self.storage.all()),
+                         sorted(["State." + state.id,
+                                 "Amenity." + amenity.id]))
+
+
+class TestFileStorageParallel(unittest.TestCase):
+    """
+    Unit tests for the parallel reload of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Decode in two processes from the first object."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        FileStorage.workers = 2
+        FileStorage.parallel_threshold = 1
+
+    def tearDown(self):
+        """Decode in the calling process again and remove the files."""
+        FileStorage.workers = 1
+        FileStorage.parallel_threshold = 50000
+        FileStorage.shards = False
+        self.storage.clear()
+        for name in os.listdir("."):
+            if name.startswith("objects.") and name != "objects.py":
+                os.remove(name)
+
+    def test_parallel_reload(self):
+        """Objects decoded by the workers are built as in one process"""
+        places = []
+        for i in range(30):
+            place = Place()
+            place.name = "Place {}".format(i)
+            place.city_id = str(i % 3)
+            places.append(place)
+        user = User()
+        self.storage.save()
+        for shards in (False, True):
+            FileStorage.shards = shards
+            self.storage.save()
+            self.storage.clear()
+            self.storage.reload()
+            self.assertEqual(self.storage.count(), 31)
+            for place in places:
+                loaded = self.storage.get(Place, place.id)
+                self.assertIsNot(loaded, place)
+                self.assertEqual(loaded.to_dict(), place.to_dict())
+            self.assertEqual(len(self.storage.find(Place, city_id="1")), 10)
+            self.assertIsInstance(self.storage.get(User, user.id).created_at,
+                                  datetime)
+
+    def test_invalid_timestamp(self):
+        """A malformed timestamp decoded by a worker is reported"""
+        with open("objects.json", "w") as f:
+            f.write('{\n"User.1": {"__class__": "User", "id": "1", '
+                    '"created_at": "yesterday", '
+                    '"updated_at": "yesterday"}\n}\n')
+        with self.assertRaises(ValueError):
+            self.storage.reload()
+
+
+class TestFileStorageBatch(unittest.TestCase):
+    """
+    Unit tests for the batches of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage and snapshot."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.storage.save()
+
+    def tearDown(self):
+        """Remove the snapshot."""
+        FileStorage.journal = False
+        FileStorage.lazy = False
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_single_save(self):
+        """Saves within a batch are written once, when it ends"""
+        before = os.stat("objects.json").st_ino
+        with self.storage.batch():
+            users = [User() for i in range(5)]
+            for user in users:
+                user.save()
+            with self.storage.batch():
+                users[0].first_name = "Betty"
+                users[0].save()
+            self.assertEqual(os.stat("objects.json").st_ino, before)
+        with open("objects.json", "r") as f:
+            data = json.load(f)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data["User." + users[0].id]["first_name"], "Betty")
+
+    def test_no_save_asked(self):
+        """A batch in which nothing is saved writes nothing"""
+        before = os.stat("objects.json").st_ino
+        with self.storage.batch():
+            User()
+        self.assertEqual(os.stat("objects.json").st_ino, before)
+
+    def test_rollback(self):
+        """An exception puts back the state before the batch"""
+        city = City()
+        city.name = "Rabat"
+        city.state_id = "1"
+        kept = State()
+        self.storage.save()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                city.name = "Paris"
+                city.state_id = "2"
+                city.country = "France"
+                city.save()
+                self.assertIn("France", str(city))
+                self.storage.delete(kept)
+                created = User()
+                created.save()
+                raise RuntimeError("abort")
+        self.assertEqual(city.name, "Rabat")
+        self.assertFalse(hasattr(city, "country"))
+        self.assertNotIn("France", str(city))
+        self.assertIs(self.storage.get(State, kept.id), kept)
+        self.assertIsNone(self.storage.get(User, created.id))
+        self.assertEqual(list(self.storage.find(City, state_id="1")),
+                         ["City." + city.id])
+        self.assertEqual(self.storage.find(City, state_id="2"), {})
+        with open("objects.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 2)
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            self.assertEqual(json.load(f)["City." + city.id]["name"],
+                             "Rabat")
+
+    def test_rollback_lazy(self):
+        """Objects not loaded yet are left to load after a rollback"""
+        state = State()
+        self.storage.save()
+        FileStorage.lazy = True
+        self.storage.clear()
+        self.storage.reload()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                self.storage.new(State(**state.to_dict()))
+                raise RuntimeError("abort")
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertIsNot(self.storage.get(State, state.id), state)
+
+
+def run_process(target, *args):
+    """Run `target` in a forked process and return its exit code."""
+    context = multiprocessing.get_context("fork")
+    process = context.Process(target=target, args=args)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def rename_user(id, name):
+    """Rename a user in another process."""
+    storage = FileStorage()
+    storage.clear()
+    storage.reload()
+    storage.get(User, id).first_name = name
+    storage.save()
+
+
+def create_users(count):
+    """Create users one save at a time in another process."""
+    storage = FileStorage()
+    storage.clear()
+    storage.reload()
+    for i in range(count):
+        User().save()
+        storage.refresh()
+
+
+class TestFileStorageConcurrent(unittest.TestCase):
+    """
+    Unit tests for the concurrent mode of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Share a snapshot holding one user."""
+        FileStorage.concurrent = True
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.storage.save()
+
+    def tearDown(self):
+        """Leave the concurrent mode and remove the files."""
+        FileStorage.concurrent = False
+        FileStorage.conflicts = "reject"
+        FileStorage.durability = "never"
+        FileStorage.journal = False
+        FileStorage.shards = False
+        self.storage.clear()
+        for name in os.listdir("."):
+            if name.startswith("objects.") and name != "objects.py":
+                os.remove(name)
+
+    def test_merge(self):
+        """A save keeps the writes of the other processes"""
+        created = City()
+        self.assertEqual(run_process(rename_user, self.user.id, "Holberton"),
+                         0)
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            data = json.load(f)
+        self.assertEqual(sorted(data), sorted(["City." + created.id,
+                                               "User." + self.user.id]))
+        self.assertEqual(data["User." + self.user.id]["first_name"],
+                         "Holberton")
+        self.assertEqual(self.storage.get(User, self.user.id).first_name,
+                         "Holberton")
+
+    def test_refresh(self):
+        """refresh() only reads again the objects changed elsewhere"""
+        city = City()
+        self.storage.save()
+        self.assertEqual(run_process(create_users, 2), 0)
+        self.assertEqual(run_process(rename_user, self.user.id, "Holberton"),
+                         0)
+        self.storage.refresh()
+        self.assertEqual(self.storage.count(User), 3)
+        self.assertIs(self.storage.get(City, city.id), city)
+        self.assertEqual(self.storage.get(User, self.user.id).first_name,
+                         "Holberton")
+
+    def test_conflicts(self):
+        """Objects changed in two processes are rejected or resolved"""
+        self.user.first_name = "Mine"
+        self.assertEqual(run_process(rename_user, self.user.id, "Theirs"),
+                         0)
+        self.storage.refresh()
+        self.assertEqual(self.user.first_name, "Mine")
+        with self.assertRaises(ConflictError) as context:
+            self.storage.save()
+        self.assertEqual(context.exception.keys, ["User." + self.user.id])
+        FileStorage.conflicts = "ours"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, self.user.id).first_name,
+                         "Mine")
+        self.storage.get(User, self.user.id).first_name = "Dropped"
+        self.assertEqual(run_process(rename_user, self.user.id, "Theirs"),
+                         0)
+        FileStorage.conflicts = "theirs"
+        self.storage.save()
+        self.assertEqual(self.storage.get(User, self.user.id).first_name,
+                         "Theirs")
+
+    def test_escaped_ids(self):
+        """Ids escaped in JSON are merged under their own key"""
+        user = user_with_id("caf\u00e9")
+        self.storage.save()
+        self.assertEqual(run_process(rename_user, user.id, "Theirs"), 0)
+        City().save()
+        self.assertEqual(self.storage.get(User, user.id).first_name,
+                         "Theirs")
+        self.assertEqual(self.storage.count(User), 2)
+
+    def test_batch_durability(self):
+        """A snapshot held back by the group commit is moved in place
+        before the lock is released"""
+        FileStorage.durability = "batch"
+        FileStorage.group_commit_ms = 60000
+        try:
+            self.assertEqual(run_process(create_users, 1), 0)
+            state = State()
+            state.save()
+            with open("objects.json", "r") as f:
+                data = json.load(f)
+            self.assertIn("State." + state.id, data)
+            self.assertEqual(sum(key.startswith("User.") for key in data),
+                             2)
+        finally:
+            FileStorage.group_commit_ms = 100
+
+    def test_stress(self):
+        """No save is lost when processes write at the same time"""
+        for journal, durability in ((False, "never"), (True, "never"),
+                                    (False, "batch"), (True, "batch")):
+            FileStorage.journal = journal
+            FileStorage.durability = durability
+            self.storage.reload()
+            before = self.storage.count(User)
+            context = multiprocessing.get_context("fork")
+            processes = [context.Process(target=create_users, args=(20,))
+                         for i in range(4)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+            self.storage.reload()
+            self.assertEqual(self.storage.count(User), before + 80)
+
+    def test_unsupported(self):
+        """Shards are not shared between processes"""
+        FileStorage.shards = True
+        with self.assertRaises(ValueError):
+            self.storage.save()
+
+
+class TestFileStorageThreadSafe(unittest.TestCase):
+    """
+    Unit tests for the thread-safe mode of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty storage and snapshot."""
+        FileStorage.thread_safe = True
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.storage.save()
+
+    def tearDown(self):
+        """Leave the thread-safe mode and remove the snapshot."""
+        FileStorage.thread_safe = False
+        FileStorage.lazy = False
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_threads(self):
+        """Threads read, write and save at the same time"""
+        errors = []
+
+        def write():
+            try:
+                for i in range(50):
+                    city = City()
+                    city.state_id = str(i % 5)
+                    city.save()
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            try:
+                for i in range(200):
+                    self.storage.query(City, [("state_id", "==", "1")])
+                    for obj in self.storage.all().values():
+                        obj.to_dict()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=target)
+                   for target in (write, write, read, read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.storage.find(City, state_id="1")), 20)
+        with open("objects.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 100)
+
+    def test_save_does_not_block(self):
+        """Objects are read and changed while a save writes the file"""
+        user = User()
+        writing = threading.Event()
+        release = threading.Event()
+        write_snapshot = FileStorage._FileStorage__write_snapshot
+
+        def slow_write(storage, data, **kwargs):
+            writing.set()
+            release.wait(5)
+            write_snapshot(storage, data, **kwargs)
+
+        with patch.object(FileStorage, "_FileStorage__write_snapshot",
+                          slow_write):
+            saver = threading.Thread(target=self.storage.save)
+            saver.start()
+            writing.wait(5)
+            self.assertEqual(self.storage.count(User), 1)
+            user.first_name = "Betty"
+            release.set()
+            saver.join()
+        with open("objects.json", "r") as f:
+            self.assertNotIn("first_name", json.load(f)["User." + user.id])
+        self.storage.save()
+        with open("objects.json", "r") as f:
+            self.assertEqual(json.load(f)["User." + user.id]["first_name"],
+                             "Betty")
+
+    def test_lazy_reads(self):
+        """Reads instantiating lazy objects take the lock exclusive"""
+        users = [User() for i in range(3)]
+        self.storage.save()
+        FileStorage.lazy = True
+        self.storage.clear()
+        self.storage.reload()
+        self.assertFalse(self.storage._ready(User))
+        self.assertEqual(self.storage.get(User, users[0].id).id,
+                         users[0].id)
+        self.assertEqual(len(self.storage.all(User)), 3)
+        self.assertTrue(self.storage._ready(User))
+
+
+class TestFileStorageWriteBehind(unittest.TestCase):
+    """
+    Unit tests for the write-behind mode of the FileStorage class.
+    """
+
+    def setUp(self):
+        """Start from an empty snapshot, saving in the background."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.storage.save()
+        FileStorage.write_behind = True
+        FileStorage.write_behind_ms = 10000
+
+    def tearDown(self):
+        """Save in the foreground again and remove the snapshot."""
+        self.storage.flush()
+        FileStorage.write_behind = False
+        FileStorage.write_behind_ms = 20
+        self.storage.clear()
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def test_flush(self):
+        """Saves are written in the background, and coalesced"""
+        write_snapshot = FileStorage._FileStorage__write_snapshot
+        writes = []
+
+        def count_write(storage, data, **kwargs):
+            writes.append(data)
+            write_snapshot(storage, data, **kwargs)
+
+        with patch.object(FileStorage, "_FileStorage__write_snapshot",
+                          count_write):
+            users = [User() for i in range(5)]
+            for user in users:
+                user.save()
+            with open("objects.json", "r") as f:
+                self.assertEqual(json.load(f), {})
+            self.storage.flush()
+        self.assertEqual(len(writes), 1)
+        with open("objects.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 5)
+
+    def test_reload_flushes(self):
+        """A reload reads the saves asked for before it"""
+        user = User()
+        user.save()
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, user.id).id, user.id)
+
+    def test_error(self):
+        """The error of a background save is raised by flush()"""
+        def fail(storage, data, **kwargs):
+            raise OSError("disk full")
+
+        user = User()
+        with patch.object(FileStorage, "_FileStorage__write_snapshot", fail):
+            user.save()
+            with self.assertRaises(OSError):
+                self.storage.flush()
+        self.storage.flush()
+        self.storage.save()
+        self.storage.flush()
+        with open("objects.json", "r") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+    def test_batch(self):
+        """A batch asks for one save, when it ends"""
+        with self.storage.batch():
+            User().save()
+            self.storage.flush()
+            with open("objects.json", "r") as f:
+                self.assertEqual(json.load(f), {})
+        self.storage.flush()
+        with open("objects.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 1)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Test Geo
+This module contains unit tests for the GridIndex class
+in the engine module
+"""
+
+import pep8
+import unittest
+from models.engine.geo import GridIndex, distance_km
+
+
+class TestGridIndex(unittest.TestCase):
+    """
+    Unit tests for the GridIndex class in the engine module.
+    """
+
+    def setUp(self):
+        """Index a few cities."""
+        self.grid = GridIndex()
+        self.grid.set("rabat", 34.0209, -6.8416)
+        self.grid.set("sale", 34.0531, -6.7985)
+        self.grid.set("casablanca", 33.5731, -7.5898)
+        self.grid.set("fiji", -17.7134, 178.0650)
+        self.grid.set("samoa", -13.7590, -172.1046)
+
+    def test_pep8_conformance_geo(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_distance(self):
+        """Distances are computed on the sphere"""
+        self.assertAlmostEqual(distance_km(34.0209, -6.8416,
+                                           33.5731, -7.5898), 85.2, 1)
+        self.assertEqual(distance_km(10, 10, 10, 10), 0)
+
+    def test_near(self):
+        """Radius queries return the closest points first"""
+        found = self.grid.near(34.0209, -6.8416, 10)
+        self.assertEqual([key for distance, key in found], ["rabat", "sale"])
+        self.assertEqual(len(self.grid.near(34.0209, -6.8416, 100)), 3)
+
+    def test_near_antimeridian(self):
+        """Radius queries cross the antimeridian"""
+        found = self.grid.near(-16.0, 179.9, 1500)
+        self.assertEqual(sorted(key for distance, key in found),
+                         ["fiji", "samoa"])
+
+    def test_within(self):
+        """Box queries return the points inside the box"""
+        self.assertEqual(sorted(self.grid.within(33, -8, 35, -6)),
+                         ["casablanca", "rabat", "sale"])
+        self.assertEqual(sorted(self.grid.within(-20, 170, -10, -170)),
+                         ["fiji", "samoa"])
+
+    def test_update_and_remove(self):
+        """Points follow updates and removals"""
+        self.grid.set("rabat", 0, 0)
+        self.assertEqual(len(self.grid.near(34.0209, -6.8416, 10)), 1)
+        self.grid.remove("sale")
+        self.grid.remove("sale")
+        self.assertEqual(self.grid.near(34.0209, -6.8416, 10), [])
+        self.grid.set("nowhere", "north", None)
+        self.assertEqual(len(self.grid), 4)
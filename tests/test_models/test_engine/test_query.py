@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Test Query
+This module contains unit tests for the query functions
+in the engine module
+"""
+
+import pep8
+import unittest
+from models.engine import query
+
+
+class Item:
+    """An object with the given attributes."""
+
+    def __init__(self, **kwargs):
+        """Set the attributes."""
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        """The attributes."""
+        return repr(self.__dict__)
+
+
+class TestQuery(unittest.TestCase):
+    """
+    Unit tests for the query functions in the engine module.
+    """
+
+    def test_pep8_conformance_query(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/query.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_validate(self):
+        """Unknown operators are rejected"""
+        conditions = query.validate(iter([('a', '<', 1)]))
+        self.assertEqual(conditions, [('a', '<', 1)])
+        with self.assertRaises(ValueError):
+            query.validate([('a', '~', 1)])
+
+    def test_matches(self):
+        """Every condition must hold"""
+        item = Item(name='Rabat', rooms=3)
+        self.assertTrue(query.matches(item, []))
+        self.assertTrue(query.matches(item, [('rooms', '>=', 3),
+                                             ('name', '!=', 'Sale')]))
+        self.assertFalse(query.matches(item, [('rooms', '>', 3)]))
+        self.assertFalse(query.matches(item, [('email', '!=', 'x')]))
+        self.assertFalse(query.matches(item, [('name', '<', 3)]))
+
+    def test_top(self):
+        """Instances are ordered, missing values last, and limited"""
+        items = [Item(rooms=2), Item(rooms='many'), Item(), Item(rooms=1),
+                 Item(rooms=5)]
+        rooms = [getattr(item, 'rooms', None)
+                 for item in query.top(items, 'rooms')]
+        self.assertEqual(rooms, [1, 2, 5, 'many', None])
+        rooms = [item.rooms for item in query.top(items, 'rooms', 2)]
+        self.assertEqual(rooms, [1, 2])
+        rooms = [item.rooms for item in query.top(iter(items), '-rooms', 3)]
+        self.assertEqual(rooms, ['many', 5, 2])
+        self.assertEqual(query.top(iter(items), None, 2), items[:2])
+        self.assertEqual(query.top(items, 'rooms', 0), [])
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Test RWLock
+This module contains unit tests for the RWLock class
+in the engine module
+"""
+
+import pep8
+import threading
+import unittest
+from models.engine.rwlock import RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    """
+    Unit tests for the RWLock class in the engine module.
+    """
+
+    def setUp(self):
+        """Create a lock."""
+        self.lock = RWLock()
+
+    def start(self, target):
+        """Start `target` in a thread, give it time to run, return it."""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(0.2)
+        return thread
+
+    def test_pep8_conformance_rwlock(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/rwlock.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_shared(self):
+        """Readers hold the lock together, writers wait for them"""
+        def read():
+            with self.lock.read():
+                pass
+
+        def write():
+            with self.lock.write():
+                pass
+
+        with self.lock.read():
+            self.assertFalse(self.start(read).is_alive())
+            writer = self.start(write)
+            self.assertTrue(writer.is_alive())
+        writer.join()
+
+    def test_exclusive(self):
+        """A writer keeps the readers out"""
+        done = []
+
+        def read():
+            with self.lock.read():
+                done.append("read")
+
+        with self.lock.write():
+            reader = self.start(read)
+            self.assertTrue(reader.is_alive())
+            self.assertEqual(done, [])
+        reader.join()
+        self.assertEqual(done, ["read"])
+
+    def test_writer_first(self):
+        """A waiting writer goes before the readers arriving after it"""
+        order = []
+
+        def write():
+            with self.lock.write():
+                order.append("write")
+
+        def read():
+            with self.lock.read():
+                order.append("read")
+
+        with self.lock.read():
+            writer = self.start(write)
+            reader = self.start(read)
+            self.assertTrue(reader.is_alive())
+        writer.join()
+        reader.join()
+        self.assertEqual(order, ["write", "read"])
+
+    def test_reentrant(self):
+        """Holds are reentrant, and a reader may not write"""
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                pass
+            with self.assertRaises(RuntimeError):
+                with self.lock.write():
+                    pass
+        with self.lock.write():
+            pass
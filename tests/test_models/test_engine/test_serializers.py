@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Test Serializers
+This module contains unit tests for the snapshot serializers
+in the engine module
+"""
+
+import json
+import marshal
+import pep8
+import pickle
+import unittest
+from datetime import datetime
+from models.engine.serializers import BinarySerializer, JSONSerializer, \
+    detect, serializer_for
+
+
+class TestSerializers(unittest.TestCase):
+    """
+    Unit tests for the serializers module.
+    """
+
+    def setUp(self):
+        """Build records of two classes."""
+        stamp = datetime(2020, 2, 17, 16, 32, 39, 23915)
+        self.records = {
+            "City.1": {"__class__": "City", "id": "1", "name": "Rabat",
+                       "created_at": stamp, "updated_at": stamp},
+            "User.2": {"__class__": "User", "id": "2",
+                       "created_at": stamp.isoformat(),
+                       "updated_at": "2020-02-17T16:32:39",
+                       "tags": ["a", 1, 2.5, None, {"b": True}]},
+            "City.3": {"__class__": "City", "id": "3",
+                       "created_at": stamp, "updated_at": stamp},
+        }
+
+    def test_pep8_conformance_serializers(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/serializers.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_json(self):
+        """JSON snapshots hold one record per line"""
+        data = JSONSerializer().dumps(self.records)
+        self.assertEqual(len(data.splitlines()), 5)
+        records = JSONSerializer().loads(data)
+        self.assertEqual(records["City.1"]["created_at"],
+                         "2020-02-17T16:32:39.023915")
+        self.assertEqual(records["User.2"]["tags"],
+                         self.records["User.2"]["tags"])
+        self.assertEqual(JSONSerializer().dumps({}), b"{}\n")
+
+    def test_binary(self):
+        """Binary snapshots decode to the records, with datetimes"""
+        serializer = BinarySerializer()
+        data = serializer.dumps(self.records)
+        records = serializer.loads(data)
+        self.assertEqual(list(records), list(self.records))
+        self.assertEqual(records["City.1"], self.records["City.1"])
+        self.assertEqual(records["User.2"]["updated_at"],
+                         datetime(2020, 2, 17, 16, 32, 39))
+        self.assertEqual(records["User.2"]["tags"],
+                         self.records["User.2"]["tags"])
+        self.assertLess(len(data), len(JSONSerializer().dumps(self.records)))
+        self.assertEqual(serializer.loads(serializer.dumps({})), {})
+        with self.assertRaises(ValueError):
+            serializer.loads(b"{}")
+
+    def test_binary_safe(self):
+        """Binary snapshots may only hold the built-in types, and those
+        of the marshal version are still read"""
+        serializer = BinarySerializer()
+        data = serializer.magic + pickle.dumps(([], [datetime.now()]))
+        with self.assertRaises(pickle.UnpicklingError):
+            serializer.loads(data)
+        rows = [(0, "1", 0, 0, {"name": "Rabat"})]
+        data = serializer.legacy_magic + marshal.dumps((["City"], rows))
+        self.assertEqual(detect(data).name, "binary")
+        self.assertEqual(serializer.loads(data)["City.1"]["name"], "Rabat")
+
+    def test_choice(self):
+        """The format follows the name, the extension, or the content"""
+        self.assertEqual(serializer_for("objects.json").name, "json")
+        self.assertEqual(serializer_for("objects.BIN").name, "binary")
+        self.assertEqual(serializer_for("objects").name, "json")
+        self.assertEqual(serializer_for("objects.json", "binary").name,
+                         "binary")
+        with self.assertRaises(ValueError):
+            serializer_for("objects.json", "xml")
+        self.assertEqual(detect(BinarySerializer().dumps({})).name, "binary")
+        self.assertEqual(detect(b"{}\n").name, "json")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""
+Test Transfer
+This module contains unit tests for the bulk import and export
+of the engine module
+"""
+
+import json
+import os
+import pep8
+import shutil
+import tempfile
+import unittest
+from models.city import City
+from models.engine import transfer
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestTransfer(unittest.TestCase):
+    """
+    Unit tests for the transfer module.
+    """
+
+    def setUp(self):
+        """Start from an empty storage and a temporary directory."""
+        self.storage = FileStorage()
+        self.storage.clear()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the files written."""
+        self.storage.clear()
+        shutil.rmtree(self.directory)
+        try:
+            os.remove("objects.json")
+        except Exception:
+            pass
+
+    def path(self, name):
+        """Return the path of a file of the temporary directory."""
+        return os.path.join(self.directory, name)
+
+    def write(self, name, text):
+        """Write a file of the temporary directory."""
+        with open(self.path(name), "w") as f:
+            f.write(text)
+        return self.path(name)
+
+    def test_pep8_conformance_transfer(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/engine/transfer.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_jsonl_round_trip(self):
+        """Exported objects are imported back as they were"""
+        user = User()
+        user.email = "a@b.c"
+        user.nickname = "betty"
+        place = Place()
+        place.amenity_ids = ["1", "2"]
+        place.max_guest = 4
+        expected = {"User." + user.id: user.to_dict(),
+                    "Place." + place.id: place.to_dict()}
+        file_path = self.path("objects.jsonl")
+        self.assertEqual(self.storage.export_file(file_path), 2)
+        self.storage.clear()
+        self.assertEqual(self.storage.import_file(file_path), 2)
+        self.assertEqual({key: obj.to_dict() for key, obj
+                          in self.storage.all().items()}, expected)
+        with open("objects.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_csv_import(self):
+        """CSV cells are converted to the types of the class attributes"""
+        file_path = self.write("places.csv",
+                               "id,name,number_rooms,latitude,amenity_ids\n"
+                               "p1,Dar,3,34.02,\"[\"\"a\"\"]\"\n"
+                               ",Riad,,,\n")
+        self.assertEqual(self.storage.import_file(file_path, "Place"), 2)
+        dar = self.storage.get(Place, "p1")
+        self.assertEqual((dar.name, dar.number_rooms, dar.latitude,
+                          dar.amenity_ids), ("Dar", 3, 34.02, ["a"]))
+        self.assertEqual(self.storage.select(Place, number_rooms=3), ["p1"])
+        riad, = self.storage.find(Place, name="Riad").values()
+        self.assertEqual(riad.number_rooms, 0)
+        self.assertEqual(riad.created_at, riad.updated_at)
+
+    def test_csv_round_trip(self):
+        """Objects exported to CSV are imported back"""
+        for name in ("Rabat", "Fes"):
+            city = City()
+            city.name = name
+            city.state_id = "1"
+        city.zip = "30000"
+        expected = {key: obj.to_dict()
+                    for key, obj in self.storage.all().items()}
+        file_path = self.path("cities.csv")
+        with self.assertRaises(ValueError):
+            self.storage.export_file(file_path)
+        self.assertEqual(self.storage.export_file(file_path, City), 2)
+        self.storage.clear()
+        self.assertEqual(self.storage.import_file(file_path, City), 2)
+        self.assertEqual({key: obj.to_dict() for key, obj
+                          in self.storage.all().items()}, expected)
+
+    def test_invalid_rows(self):
+        """Nothing is imported from a file with an invalid row"""
+        user = User()
+        self.storage.save()
+        cases = [
+            ("a.csv", "name,number_rooms\nDar,2\nRiad,many\n", Place,
+             "line 3: invalid number_rooms: 'many'"),
+            ("b.jsonl", '{"__class__": "City", "name": "Fes"}\n'
+             '{"name": "Rabat"}\n', None, "line 2: class missing"),
+            ("c.jsonl", '{"__class__": "Place", "max_guest": 2.5}\n',
+             None, "line 1: invalid max_guest: 2.5"),
+            ("d.jsonl", '{"__class__": "City"}\n{oops\n', None, "line 2: "),
+            ("e.jsonl", '{"__class__": "Nope"}\n', None,
+             "line 1: unexpected class Nope"),
+        ]
+        for name, text, cls, message in cases:
+            file_path = self.write(name, text)
+            with self.assertRaises(ValueError) as context:
+                self.storage.import_file(file_path, cls)
+            self.assertTrue(str(context.exception).startswith(message),
+                            str(context.exception))
+            self.assertEqual(list(self.storage.all()), ["User." + user.id])
+
+    def test_format_of(self):
+        """The format follows the name or the extension"""
+        self.assertEqual(transfer.format_of("a.JSONL"), "jsonl")
+        self.assertEqual(transfer.format_of("a.ndjson"), "jsonl")
+        self.assertEqual(transfer.format_of("a.txt", "csv"), "csv")
+        with self.assertRaises(ValueError):
+            transfer.format_of("a.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Test ISO Time
+This module contains unit tests for the timestamp codec
+of the models.
+"""
+import pep8
+import unittest
+from datetime import datetime
+from models.base_model import BaseModel
+from models.isotime import format_datetime, from_microseconds, \
+    parse_datetime, to_microseconds
+
+
+class TestIsoTime(unittest.TestCase):
+    """
+    Unittests for the isotime module.
+    """
+
+    def test_pep8_conformance_isotime(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/isotime.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_round_trip(self):
+        """A timestamp is read back as it was written"""
+        stamp = datetime(2020, 2, 17, 16, 32, 39, 23915)
+        text = format_datetime(stamp)
+        self.assertEqual(text, "2020-02-17T16:32:39.023915")
+        self.assertEqual(parse_datetime(text), stamp)
+
+    def test_without_microseconds(self):
+        """Timestamps whose microseconds are zero are accepted"""
+        stamp = datetime(2020, 2, 17, 16, 32, 39)
+        text = format_datetime(stamp)
+        self.assertEqual(text, "2020-02-17T16:32:39")
+        self.assertEqual(parse_datetime(text), stamp)
+        dic = {"id": "1", "created_at": text, "updated_at": text}
+        self.assertEqual(BaseModel(**dic).to_dict()["created_at"], text)
+
+    def test_datetime_unchanged(self):
+        """A datetime is returned as is"""
+        stamp = datetime.now()
+        self.assertIs(parse_datetime(stamp), stamp)
+
+    def test_invalid(self):
+        """Malformed timestamps are rejected"""
+        with self.assertRaises(ValueError):
+            parse_datetime("17/02/2020")
+
+    def test_microseconds(self):
+        """Timestamps convert to and from microseconds since the epoch"""
+        stamp = datetime(2020, 2, 17, 16, 32, 39, 23915)
+        self.assertEqual(to_microseconds(datetime(1970, 1, 1, 0, 0, 1)),
+                         1000000)
+        self.assertEqual(to_microseconds(format_datetime(stamp)),
+                         to_microseconds(stamp))
+        self.assertEqual(from_microseconds(to_microseconds(stamp)), stamp)
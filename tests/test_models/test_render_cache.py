@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""
+Test Render Cache
+This module contains unit tests for the cache of the rendered
+forms of the models.
+"""
+import models
+import pep8
+import unittest
+from models.base_model import BaseModel
+from models.place import Place
+from models.render_cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    """
+    Unittests for the RenderCache class.
+    """
+
+    def setUp(self):
+        """Create a cache of two objects."""
+        self.cache = RenderCache(2)
+        self.renders = []
+
+    def render(self, obj):
+        """Record the render of `obj`."""
+        self.renders.append(obj)
+        return len(self.renders)
+
+    def test_pep8_conformance_render_cache(self):
+        """Test that we conform to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/render_cache.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_hits(self):
+        """A form is rendered once, then found, each form on its own"""
+        obj = object()
+        self.assertEqual(self.cache.get(obj, 'str', self.render), 1)
+        self.assertEqual(self.cache.get(obj, 'str', self.render), 1)
+        self.assertEqual(self.cache.get(obj, 'dict', self.render), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual(len(self.cache), 1)
+
+    def test_least_recently_used(self):
+        """The least recently used object goes first"""
+        first, second, third = object(), object(), object()
+        self.cache.get(first, 'str', self.render)
+        self.cache.get(second, 'str', self.render)
+        self.cache.get(first, 'str', self.render)
+        self.cache.get(third, 'str', self.render)
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get(first, 'str', self.render)
+        self.cache.get(second, 'str', self.render)
+        self.assertEqual(self.renders, [first, second, third, second])
+
+    def test_discard(self):
+        """A discarded object, or one changed while rendering, is
+        rendered again"""
+        obj = object()
+        self.cache.get(obj, 'str', self.render)
+        self.cache.discard(obj)
+        self.assertEqual(len(self.cache), 0)
+        self.cache.get(obj, 'str',
+                       lambda obj: self.cache.discard(obj) or 'stale')
+        self.assertEqual(len(self.cache), 0)
+        self.cache.get(obj, 'str', self.render)
+        self.cache.clear()
+        self.assertEqual((len(self.cache), self.cache.hits,
+                          self.cache.misses), (0, 0, 0))
+
+    def test_state(self):
+        """A form rendered in another state is rendered again"""
+        obj = object()
+        state = [1]
+        self.cache.get(obj, 'str', self.render, lambda obj: list(state))
+        self.cache.get(obj, 'str', self.render, lambda obj: list(state))
+        state.append(2)
+        self.cache.get(obj, 'str', self.render, lambda obj: list(state))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_size(self):
+        """A cache of size 0 keeps nothing"""
+        self.cache.size = 0
+        obj = object()
+        self.cache.get(obj, 'str', self.render)
+        self.cache.get(obj, 'str', self.render)
+        self.assertEqual(len(self.renders), 2)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestRenderedModels(unittest.TestCase):
+    """
+    Unittests for the models read through the render cache.
+    """
+
+    def setUp(self):
+        """Clear the cache."""
+        models.render_cache.clear()
+
+    def test_str(self):
+        """The string is cached until an attribute changes"""
+        model = BaseModel()
+        text = str(model)
+        self.assertIs(str(model), text)
+        self.assertEqual(models.render_cache.hits, 1)
+        model.name = 'Betty'
+        self.assertIn("'name': 'Betty'", str(model))
+        del model.name
+        self.assertEqual(str(model), text)
+        self.assertIsNot(str(model), text)
+
+    def test_to_dict(self):
+        """The dictionary is a copy, dropped when an attribute changes"""
+        model = BaseModel.compact_class()()
+        first = model.to_dict()
+        first['name'] = 'Betty'
+        self.assertNotIn('name', model.to_dict())
+        self.assertEqual(models.render_cache.hits, 1)
+        model.name = 'Holberton'
+        self.assertEqual(model.to_dict()['name'], 'Holberton')
+        self.assertEqual(model.to_dict(), model._render_dict())
+
+    def test_changed_in_place(self):
+        """A list changed in place is seen by both forms"""
+        place = Place()
+        place.amenity_ids = ['a']
+        str(place)
+        place.to_dict()
+        place.amenity_ids.append('b')
+        self.assertIn("'amenity_ids': ['a', 'b']", str(place))
+        self.assertEqual(place.to_dict()['amenity_ids'], ['a', 'b'])
+        self.assertEqual(str(place), place._render_str())
+        self.assertEqual(models.render_cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
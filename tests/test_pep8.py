@@ -74,6 +74,13 @@ class Testpep8(unittest.TestCase):
         self.assertEqual(result.total_errors, 0,
                          "Found code style errors (and warnings).")
 
+    def test_pep8_conformance_isotime(self):
+        """Test that we are conforming to PEP8."""
+        pep8style = pep8.StyleGuide(quiet=True)
+        result = pep8style.check_files(['models/isotime.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
     def test_pep8_conformance_file_storage(self):
         """Test that we are conforming to PEP8."""
         pep8style = pep8.StyleGuide(quiet=True)